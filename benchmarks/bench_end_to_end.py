@@ -0,0 +1,151 @@
+"""
+Offline end-to-end run of process_video_download: local mirror pages + throttled CDN
+(fake_provider) in, fake Telegram client (fake_telegram) out, with the real scheduler,
+pipeline, downloader and uploader in between. Reports files/min, MB/s and p50/p95 job latency
+per file size and concurrency, plus one folder job, as a baseline for performance changes.
+The duplicate scenario sends the same bytes under new file ids, which the content index
+should answer by re-sending the first upload instead of downloading again; the same-URL
+scenario runs every job on one file id at once, which should download and upload it once.
+With workers > 0 scraping and downloads run in that many worker processes (always via disk).
+
+    python benchmarks/bench_end_to_end.py [sizes_mb] [concurrencies] [files] [stream|disk] [workers]
+    python benchmarks/bench_end_to_end.py 8,32 1,4,8 8 stream
+    python benchmarks/bench_end_to_end.py 8,32 1,4,8 8 disk 4
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# bot.config reads credentials at import time; nothing here talks to Telegram
+for key, value in (('API_ID', '0'), ('API_HASH', 'bench'), ('BOT_TOKEN', 'bench'), ('METRICS_PORT', '0')):
+    os.environ.setdefault(key, value)
+
+import bot.handlers as handlers
+import core.uploader as uploader
+import core.provider.async_poop_download as async_poop_download
+from core.http_session import close_session
+from core.metrics import metrics
+from core.media_cache import media_cache
+from core.dedup import content_index
+from core.progress import ProgressBus
+from core.storage import storage
+from core.provider.metadata_cache import metadata_cache
+from core.workers import worker_pool
+from benchmarks.fake_cdn import start_server
+from benchmarks.fake_provider import make_provider_app
+from benchmarks.fake_telegram import FakeMessage, FakeTelegramClient
+
+CDN_BANDWIDTH = 8 * 1024 * 1024  # bytes/s per CDN connection
+CDN_LATENCY = 0.05  # seconds before the first byte
+PAGE_LATENCY = 0.05  # seconds per mirror/vplayer page
+UPLOAD_BANDWIDTH = 16 * 1024 * 1024  # bytes/s per Telegram upload
+SEND_LATENCY = 0.1  # seconds per send_file
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def run_jobs(client: FakeTelegramClient, urls: list[str], concurrency: int) -> tuple[float, list[float], int]:
+    """Run one process_video_download per url, at most concurrency at once; returns (wall, latencies, failures)"""
+    dashboard = ProgressBus(FakeMessage(), 'bench')
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run_one(url: str) -> bool:
+        async with limit:
+            start = time.perf_counter()
+            ok = await handlers.process_video_download(client, 0, url, dashboard)
+            latencies.append(time.perf_counter() - start)
+            return ok
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_one(url) for url in urls))
+    return time.perf_counter() - start, latencies, results.count(False)
+
+def report(label: str, files: int, size: int, wall: float, latencies: list[float], failures: int):
+    print(f'{label:>22}: {files / wall * 60:7.1f} files/min  {files * size / 1024 / 1024 / wall:7.2f} MB/s  '
+          f'p50 {percentile(latencies, 0.5):6.2f}s  p95 {percentile(latencies, 0.95):6.2f}s'
+          + (f'  {failures} gagal' if failures else ''))
+
+def configure(folder: str, base_url: str):
+    """Point caches, storage and the provider at the bench folder and server (also run in every worker)"""
+    uploader.DOWNLOAD_FOLDER = storage.folder = folder
+    metadata_cache.path = os.path.join(folder, 'metadata_cache.sqlite3')
+    media_cache.path = os.path.join(folder, 'media_cache.sqlite3')
+    content_index.path = os.path.join(folder, 'content_index.sqlite3')
+    async_poop_download.VPLAYER_URL = f'{base_url}/vplayer?id={{}}'
+
+async def main(sizes_mb: list[int], concurrencies: list[int], files: int, mode: str, workers: int):
+    handlers.STREAM_UPLOAD = mode == 'stream'
+
+    with tempfile.TemporaryDirectory() as folder:
+        videos, folders = {}, {}
+        runner, base_url = await start_server(make_provider_app(
+            videos, folders, bandwidth_per_conn=CDN_BANDWIDTH, latency=CDN_LATENCY, page_latency=PAGE_LATENCY
+        ))
+        configure(folder, base_url)
+        if workers:
+            worker_pool.start(workers, initializer=configure, initargs=(folder, base_url))
+        client = FakeTelegramClient(upload_bandwidth=UPLOAD_BANDWIDTH, send_latency=SEND_LATENCY)
+
+        print(f'mode {"disk (worker)" if workers else mode}, {workers or "tanpa"} worker, {files} file per skenario, '
+              f'CDN {CDN_BANDWIDTH // 1024 // 1024}MB/s per koneksi, upload {UPLOAD_BANDWIDTH // 1024 // 1024}MB/s')
+        try:
+            for size_mb in sizes_mb:
+                # Ids and content are unique per scenario so no cache can short-circuit a run
+                data = os.urandom(size_mb * 1024 * 1024)
+                for concurrency in concurrencies:
+                    file_ids = [f'{size_mb}m{concurrency}c{index}' for index in range(files)]
+                    videos.update({file_id: os.urandom(16) + data[16:] for file_id in file_ids})
+                    wall, latencies, failures = await run_jobs(client, [f'{base_url}/d/{file_id}' for file_id in file_ids], concurrency)
+                    report(f'{size_mb}MB x{concurrency}', files, len(data), wall, latencies, failures)
+                    for file_id in file_ids:
+                        del videos[file_id]
+
+                folder_id = f'{size_mb}mfolder'
+                folders[folder_id] = [f'{folder_id}{index}' for index in range(files)]
+                videos.update({file_id: os.urandom(16) + data[16:] for file_id in folders[folder_id]})
+                wall, latencies, failures = await run_jobs(client, [f'{base_url}/f/{folder_id}'], 1)
+                report(f'{size_mb}MB folder', files, len(data), wall, latencies, failures)
+
+                # One upload, then the same bytes under new ids (another mirror / catalogue)
+                sent_before = len(client.sent)
+                uploaded_before = client.bytes_uploaded
+                dup_ids = [f'{size_mb}mdup{index}' for index in range(files)]
+                videos.update(dict.fromkeys(dup_ids, data))
+                wall, latencies, failures = await run_jobs(client, [f'{base_url}/d/{file_id}' for file_id in dup_ids], 1)
+                report(f'{size_mb}MB duplikat', files, len(data), wall, latencies, failures)
+                print(f'{"":>22}  {len(client.sent) - sent_before} pesan, '
+                      f'{(client.bytes_uploaded - uploaded_before) / 1024 / 1024:.0f}MB diunggah')
+
+                # Every user pastes the same URL at the same moment
+                sent_before = len(client.sent)
+                uploaded_before = client.bytes_uploaded
+                same_id = f'{size_mb}msame'
+                videos[same_id] = os.urandom(16) + data[16:]
+                wall, latencies, failures = await run_jobs(client, [f'{base_url}/d/{same_id}'] * files, files)
+                report(f'{size_mb}MB URL sama', files, len(data), wall, latencies, failures)
+                print(f'{"":>22}  {len(client.sent) - sent_before} pesan, '
+                      f'{(client.bytes_uploaded - uploaded_before) / 1024 / 1024:.0f}MB diunggah')
+        finally:
+            worker_pool.stop()
+            await close_session()
+            await runner.cleanup()
+
+    print(f'{"upload":>22}: {len(client.sent)} pesan ({client.thumbs} dengan thumbnail), '
+          f'{client.bytes_uploaded / 1024 / 1024:.0f}MB, retry {metrics.retries_total.total():.0f}, '
+          f'digabung scrape {metrics.coalesced_total.get("scrape"):.0f} / item {metrics.coalesced_total.get("item"):.0f}')
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.ERROR)
+    sizes_mb = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else [8, 32]
+    concurrencies = [int(count) for count in sys.argv[2].split(',')] if len(sys.argv) > 2 else [1, 4, 8]
+    files = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    mode = sys.argv[4] if len(sys.argv) > 4 else 'stream'
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+    asyncio.run(main(sizes_mb, concurrencies, files, mode, workers))
@@ -0,0 +1,45 @@
+"""
+Regex fast path vs BeautifulSoup tree parser over the saved sample pages.
+Fails if the two ever disagree, so it doubles as a regression check for the extractors.
+
+    python benchmarks/bench_extractors.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.provider.extractors import FOLDER_FILE_IDS, FILE_INFORMATION
+
+SAMPLES = os.path.join(os.path.dirname(__file__), 'samples')
+
+CASES = [
+    ('folder_page.html', FOLDER_FILE_IDS),
+    ('file_page.html', FILE_INFORMATION),
+]
+
+def timed(func, content: bytes, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(content)
+    return (time.perf_counter() - start) / iterations
+
+def main(iterations: int):
+    for sample, extractor in CASES:
+        with open(os.path.join(SAMPLES, sample), 'rb') as f:
+            content = f.read()
+
+        text = content.decode('utf-8')
+        fast = extractor.fast_paths[0](text)
+        tree = extractor.fallback(content)
+        assert extractor.validate(text, fast), f'{sample}: fast path tidak lolos validasi'
+        assert fast == tree, f'{sample}: fast path {fast!r} != tree {tree!r}'
+
+        fast_time = timed(extractor, content, iterations)
+        tree_time = timed(extractor.fallback, content, iterations)
+        print(f'{extractor.name:>18} ({len(content) // 1024:3d}KB): '
+              f'tree {tree_time * 1000:7.2f}ms  fast {fast_time * 1000:6.3f}ms  {tree_time / fast_time:6.1f}x')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
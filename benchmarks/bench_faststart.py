@@ -0,0 +1,144 @@
+"""
+MP4 faststart on synthetic files: moov at the end (stco and co64) and already in front.
+Checks that the spliced upload stream starts with ftyp+moov, that every rewritten chunk
+offset still points at the same chunk bytes and that duration/dimensions are read back,
+then times planning + reading the spliced stream against reading the file as-is and
+against copying it (what a remux to a second file would cost before the upload).
+
+    python benchmarks/bench_faststart.py [size_mb]
+"""
+import os
+import sys
+import time
+import struct
+import asyncio
+import shutil
+import tempfile
+import aiofiles
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.mp4 import iter_boxes, read_box_header, plan_faststart, scan_head
+
+CHUNK = 256 * 1024
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+def full_box(box_type: bytes, payload: bytes, version: int = 0) -> bytes:
+    return box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+def build_moov(chunk_offsets: list[int], co64: bool, duration: int = 90_000, timescale: int = 1000) -> bytes:
+    mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, timescale, duration) + bytes(80))
+    tkhd = full_box(b'tkhd', bytes(76) + struct.pack('>II', 1280 << 16, 720 << 16))
+    hdlr = full_box(b'hdlr', struct.pack('>I4s', 0, b'vide') + bytes(12) + b'video\x00')
+    if co64:
+        table = full_box(b'co64', struct.pack(f'>I{len(chunk_offsets)}Q', len(chunk_offsets), *chunk_offsets))
+    else:
+        table = full_box(b'stco', struct.pack(f'>I{len(chunk_offsets)}I', len(chunk_offsets), *chunk_offsets))
+    stbl = box(b'stbl', full_box(b'stsd', struct.pack('>I', 0)) + table)
+    minf = box(b'minf', full_box(b'vmhd', bytes(8)) + stbl)
+    mdia = box(b'mdia', full_box(b'mdhd', bytes(20)) + hdlr + minf)
+    return box(b'moov', mvhd + box(b'trak', tkhd + mdia))
+
+def build_file(path: str, size: int, moov_at_end: bool, co64: bool = False):
+    """ftyp + mdat of numbered chunks + moov, or ftyp + moov + mdat"""
+    ftyp = box(b'ftyp', b'isom\x00\x00\x02\x00isomiso2avc1mp41')
+    count = max(1, size // CHUNK)
+    chunks = [struct.pack('>I', index) * (CHUNK // 4) for index in range(count)]
+    mdat_payload_size = count * CHUNK
+
+    moov_size = len(build_moov([0] * count, co64))
+    data_start = len(ftyp) + 8 + (0 if moov_at_end else moov_size)
+    moov = build_moov([data_start + index * CHUNK for index in range(count)], co64)
+
+    with open(path, 'wb') as f:
+        f.write(ftyp)
+        if not moov_at_end:
+            f.write(moov)
+        f.write(struct.pack('>I4s', mdat_payload_size + 8, b'mdat'))
+        for chunk in chunks:
+            f.write(chunk)
+        if moov_at_end:
+            f.write(moov)
+
+def chunk_offsets(moov: bytes) -> list[int]:
+    """All stco/co64 entries of a moov buffer"""
+    offsets = []
+    def walk(start: int, end: int):
+        for child in iter_boxes(moov, start, end):
+            if child.type in (b'moov', b'trak', b'mdia', b'minf', b'stbl'):
+                walk(child.offset + child.header, child.end)
+            elif child.type in (b'stco', b'co64'):
+                body = child.offset + child.header
+                count = struct.unpack_from('>I', moov, body + 4)[0]
+                width = 'I' if child.type == b'stco' else 'Q'
+                offsets.extend(struct.unpack_from(f'>{count}{width}', moov, body + 8))
+    walk(0, len(moov))
+    return offsets
+
+async def timed_reads(path: str) -> tuple[float, float]:
+    """Seconds to plan + read the spliced stream, and to read the file unchanged, in upload-sized reads"""
+    start = time.perf_counter()
+    reader = plan_faststart(path).open()
+    while await reader.read(512 * 1024):
+        pass
+    splice_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async with aiofiles.open(path, 'rb') as f:
+        while await f.read(512 * 1024):
+            pass
+    return splice_time, time.perf_counter() - start
+
+async def read_all(reader) -> bytes:
+    parts = []
+    while True:
+        part = await reader.read(512 * 1024)
+        if not part:
+            return b''.join(parts)
+        parts.append(part)
+
+def check(path: str, data: bytes, expect_remux: bool):
+    layout = plan_faststart(path)
+    assert layout is not None, 'layout kosong'
+    assert layout.remuxed == expect_remux, f'remuxed {layout.remuxed} != {expect_remux}'
+    assert (round(layout.info.duration), layout.info.width, layout.info.height) == (90, 1280, 720), layout.info
+
+    spliced = asyncio.run(read_all(layout.open()))
+    assert len(spliced) == layout.size, f'{len(spliced)} != {layout.size}'
+    order = [child.type for child in iter_boxes(spliced)]
+    assert order[:3] == [b'ftyp', b'moov', b'mdat'], order
+
+    moov = read_box_header(spliced, len(box(b'ftyp', b'isom\x00\x00\x02\x00isomiso2avc1mp41')), len(spliced))
+    new_offsets = chunk_offsets(spliced[moov.offset:moov.end])
+    old_moov = next(child for child in iter_boxes(data) if child.type == b'moov')
+    old_offsets = chunk_offsets(data[old_moov.offset:old_moov.end])
+    for old, new in zip(old_offsets, new_offsets, strict=True):
+        assert spliced[new:new + CHUNK] == data[old:old + CHUNK], f'chunk {old} -> {new} tidak cocok'
+
+    state, info = scan_head(spliced[:64 * 1024])
+    assert state == 'faststart' and info == layout.info, (state, info)
+    return layout
+
+def main(size_mb: int):
+    with tempfile.TemporaryDirectory() as folder:
+        for label, moov_at_end, co64 in [('moov di akhir', True, False), ('moov di akhir co64', True, True), ('sudah faststart', False, False)]:
+            path = os.path.join(folder, 'video.mp4')
+            build_file(path, size_mb * 1024 * 1024, moov_at_end, co64)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if moov_at_end:
+                assert scan_head(data[:64 * 1024])[0] == 'moov_at_end'
+
+            layout = check(path, data, expect_remux=moov_at_end)
+            splice_time, plain_time = asyncio.run(timed_reads(path))
+
+            start = time.perf_counter()
+            shutil.copyfile(path, os.path.join(folder, 'copy.mp4'))
+            copy_time = time.perf_counter() - start
+            print(f'{label:>20}: ok  faststart+baca {splice_time * 1000:6.1f}ms  baca apa adanya {plain_time * 1000:6.1f}ms  '
+                  f'salin file {copy_time * 1000:6.1f}ms  ({layout.size / 1024 / 1024:.0f}MB)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
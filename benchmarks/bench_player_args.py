@@ -0,0 +1,58 @@
+"""
+eval() vs the player(...) argument tokenizer over the saved vplayer corpus.
+Every sample must parse to the same tuple eval gives; hostile_* samples must be rejected.
+eval only ever runs here on the local, known corpus, never on fetched pages.
+
+    python benchmarks/bench_player_args.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.provider.extractors import PLAYER_RE, parse_player_args
+from core.provider.poop_download import parse_thumbnail_and_video_url
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'samples', 'vplayer')
+
+def timed(func, args: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for raw in args:
+            func(raw)
+    return (time.perf_counter() - start) / (iterations * len(args))
+
+def main(iterations: int):
+    args = []
+    for sample in sorted(os.listdir(CORPUS)):
+        with open(os.path.join(CORPUS, sample), encoding='utf-8') as f:
+            text = f.read()
+        raw = PLAYER_RE.search(text.replace('\\', '')).group(1)
+
+        if sample.startswith('hostile_'):
+            try:
+                parse_player_args(raw)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f'{sample}: ekspresi tidak ditolak')
+            assert parse_thumbnail_and_video_url(text)['video_url'] is None, f'{sample}: video_url tidak boleh terisi'
+            print(f'{sample:>26}: ditolak')
+            continue
+
+        expected = eval(f'({raw})')
+        if not isinstance(expected, tuple):
+            expected = (expected,)
+        assert parse_player_args(raw) == expected, f'{sample}: {parse_player_args(raw)!r} != {expected!r}'
+        assert parse_thumbnail_and_video_url(text)['video_url'], f'{sample}: video_url kosong'
+        print(f'{sample:>26}: ok')
+        args.append(raw)
+
+    eval_time = timed(lambda raw: eval(f'({raw})'), args, iterations)
+    tokenizer_time = timed(parse_player_args, args, iterations)
+    print(f'{"eval":>26}: {eval_time * 1e6:7.1f}us per call')
+    print(f'{"tokenizer":>26}: {tokenizer_time * 1e6:7.1f}us per call  {eval_time / tokenizer_time:5.1f}x')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
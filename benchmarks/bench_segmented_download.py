@@ -0,0 +1,55 @@
+"""
+Single-stream vs segmented download against a local, per-connection throttled CDN.
+
+    python benchmarks/bench_segmented_download.py [size_mb] [kb_per_sec_per_conn]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import aiohttp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bot.config import CHUNK_SIZE, DOWNLOAD_SEGMENTS
+from core.downloader import download_segmented
+from benchmarks.fake_cdn import make_cdn_app, start_server
+
+async def single_stream(session: aiohttp.ClientSession, url: str, filepath: str):
+    async with session.get(url) as resp:
+        with open(filepath, 'wb') as f:
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                f.write(chunk)
+
+async def main(size_mb: int, kb_per_sec: int):
+    data = os.urandom(size_mb * 1024 * 1024)
+    runner, base_url = await start_server(make_cdn_app({'bench.mp4': data}, bandwidth_per_conn=kb_per_sec * 1024))
+    url = f'{base_url}/v/bench.mp4'
+
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            async with aiohttp.ClientSession() as session:
+                results = {}
+                for label, connections in [('single', 1), (f'segmented x{DOWNLOAD_SEGMENTS}', DOWNLOAD_SEGMENTS)]:
+                    filepath = os.path.join(folder, f'{connections}.mp4')
+                    start = time.perf_counter()
+                    if connections == 1:
+                        await single_stream(session, url, filepath)
+                    else:
+                        await download_segmented(session, url, filepath, len(data), connections=connections)
+                    elapsed = time.perf_counter() - start
+                    with open(filepath, 'rb') as f:
+                        assert f.read() == data, f'{label}: isi file tidak cocok'
+                    results[label] = elapsed
+                    print(f'{label:>16}: {elapsed:6.2f}s  {size_mb / elapsed:6.2f} MB/s')
+
+                single, segmented = results.values()
+                print(f'{"speedup":>16}: {single / segmented:6.2f}x')
+    finally:
+        await runner.cleanup()
+
+if __name__ == '__main__':
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    kb_per_sec = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    asyncio.run(main(size_mb, kb_per_sec))
@@ -0,0 +1,73 @@
+"""
+Session per file vs the shared pooled session for a folder of small videos on one CDN host.
+
+    python benchmarks/bench_shared_session.py [files] [size_kb] [connect_delay_ms]
+
+connect_delay_ms is added to every new TCP connection to stand in for the DNS + TLS setup
+that a real HTTPS CDN costs; keep-alive reuse skips it.
+"""
+import os
+import sys
+import time
+import asyncio
+import aiohttp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bot.config import CHUNK_SIZE
+from core.http_session import get_session, close_session, TRANSFER_TIMEOUT
+from benchmarks.fake_cdn import make_cdn_app, start_server
+
+def connection_counter(connect_delay: float) -> tuple[aiohttp.TraceConfig, list]:
+    created = []
+    trace = aiohttp.TraceConfig()
+
+    async def on_create_start(session, context, params):
+        created.append(params)
+        await asyncio.sleep(connect_delay)
+
+    trace.on_connection_create_start.append(on_create_start)
+    return trace, created
+
+async def fetch(session: aiohttp.ClientSession, url: str) -> int:
+    size = 0
+    async with session.get(url, timeout=TRANSFER_TIMEOUT) as resp:
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+    return size
+
+async def main(file_count: int, size_kb: int, connect_delay: float):
+    files = {f'{index}.mp4': os.urandom(size_kb * 1024) for index in range(file_count)}
+    runner, base_url = await start_server(make_cdn_app(files))
+    urls = [f'{base_url}/v/{name}' for name in files]
+
+    try:
+        # Old behaviour: a new ClientSession (connector, DNS, handshake) per file
+        trace, per_file_connections = connection_counter(connect_delay)
+        start = time.perf_counter()
+        for url in urls:
+            async with aiohttp.ClientSession(trace_configs=[trace]) as session:
+                await fetch(session, url)
+        per_file = time.perf_counter() - start
+
+        trace, shared_connections = connection_counter(connect_delay)
+        session = await get_session()
+        session.trace_configs.append(trace)
+        trace.freeze()
+        start = time.perf_counter()
+        for url in urls:
+            await fetch(session, url)
+        shared = time.perf_counter() - start
+
+        print(f'{"session per file":>18}: {per_file:6.2f}s  {len(per_file_connections):4d} koneksi baru')
+        print(f'{"shared session":>18}: {shared:6.2f}s  {len(shared_connections):4d} koneksi baru')
+        print(f'{"overhead per file":>18}: {(per_file - shared) / file_count * 1000:6.1f}ms dihemat')
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+if __name__ == '__main__':
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    connect_delay_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 80
+    asyncio.run(main(file_count, size_kb, connect_delay_ms / 1000))
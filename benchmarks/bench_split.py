@@ -0,0 +1,177 @@
+"""
+Splitting an oversize file into parts on a synthetic MP4 (interleaved video + audio, keyframe
+every second, B-frame ctts, edit list, moov at the end) and on a non-MP4 file.
+Checks that every keyframe part is a playable faststart MP4 under the part size that starts on
+a keyframe, that every sample lands in exactly one part with its bytes intact and that the
+durations add up; byte parts must concatenate back to the source. Then times planning +
+reading all parts against reading the file once.
+
+    python benchmarks/bench_split.py [size_mb] [part_mb]
+"""
+import os
+import sys
+import time
+import struct
+import asyncio
+import tempfile
+import aiofiles
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.mp4 import iter_boxes, scan_head
+from core.splitter import Track, plan_split
+from benchmarks.bench_faststart import box, full_box, read_all
+
+FTYP = box(b'ftyp', b'isom\x00\x00\x02\x00isomiso2avc1mp41')
+VIDEO_TIMESCALE, VIDEO_DELTA, GOP, VIDEO_PER_CHUNK = 15360, 512, 30, 5
+AUDIO_TIMESCALE, AUDIO_DELTA, AUDIO_SIZE, AUDIO_PER_CHUNK = 44100, 1024, 400, 10
+
+def sample_bytes(track: int, index: int, size: int) -> bytes:
+    return (struct.pack('>BI', track, index) * (size // 5 + 1))[:size]
+
+def video_size(index: int) -> int:
+    return 60_000 if index % GOP == 0 else 15_000 + (index * 7919) % 4000
+
+def build_trak(track_id: int, handler: bytes, timescale: int, delta: int, sizes: list[int], per_chunk: int,
+               chunk_offsets: list[int], sync: list[int] | None, ctts: list[int] | None) -> bytes:
+    count = len(sizes)
+    tkhd = full_box(b'tkhd', struct.pack('>IIII', 0, 0, track_id, 0) + bytes(60) +
+                    (struct.pack('>II', 1280 << 16, 720 << 16) if handler == b'vide' else bytes(8)))
+    edts = box(b'edts', full_box(b'elst', struct.pack('>IIIi', 1, 0, 0, 1024)))
+    mdhd = full_box(b'mdhd', struct.pack('>IIII', 0, 0, timescale, count * delta) + bytes(4))
+    hdlr = full_box(b'hdlr', struct.pack('>I4s', 0, handler) + bytes(12) + b'handler\x00')
+
+    tables = [full_box(b'stsd', struct.pack('>I', 0))]
+    tables.append(full_box(b'stts', struct.pack('>III', 1, count, delta)))
+    if ctts:
+        tables.append(full_box(b'ctts', struct.pack(f'>I{count * 2}I', count, *[value for offset in ctts for value in (1, offset)])))
+    if sync is not None:
+        tables.append(full_box(b'stss', struct.pack(f'>I{len(sync)}I', len(sync), *[index + 1 for index in sync])))
+    tables.append(full_box(b'stsz', struct.pack(f'>II{count}I', 0, count, *sizes)))
+    last = count - (len(chunk_offsets) - 1) * per_chunk
+    stsc = [(1, per_chunk, 1)] + ([(len(chunk_offsets), last, 1)] if last != per_chunk else [])
+    tables.append(full_box(b'stsc', struct.pack(f'>I{len(stsc) * 3}I', len(stsc), *[value for entry in stsc for value in entry])))
+    tables.append(full_box(b'stco', struct.pack(f'>I{len(chunk_offsets)}I', len(chunk_offsets), *chunk_offsets)))
+
+    minf = box(b'minf', full_box(b'vmhd' if handler == b'vide' else b'smhd', bytes(8)) + box(b'stbl', b''.join(tables)))
+    return box(b'trak', tkhd + edts + box(b'mdia', mdhd + hdlr + minf))
+
+def build_file(path: str, size: int) -> list[list[bytes]]:
+    """Writes the MP4 and returns the bytes of every sample per track (video, audio)"""
+    video_count = 0
+    total = 0
+    while total < size:
+        total += video_size(video_count)
+        video_count += 1
+    seconds = video_count * VIDEO_DELTA / VIDEO_TIMESCALE
+    audio_count = int(seconds * AUDIO_TIMESCALE / AUDIO_DELTA)
+
+    samples = [[sample_bytes(0, index, video_size(index)) for index in range(video_count)],
+               [sample_bytes(1, index, AUDIO_SIZE) for index in range(audio_count)]]
+    per_chunk = [VIDEO_PER_CHUNK, AUDIO_PER_CHUNK]
+    deltas = [(VIDEO_DELTA, VIDEO_TIMESCALE), (AUDIO_DELTA, AUDIO_TIMESCALE)]
+
+    # Chunks interleaved by start time, as a muxer writes them
+    chunks = []
+    for track, track_samples in enumerate(samples):
+        delta, timescale = deltas[track]
+        for first in range(0, len(track_samples), per_chunk[track]):
+            chunks.append((first * delta / timescale, track, first))
+    chunks.sort()
+
+    offsets = [[], []]
+    position = len(FTYP) + 8
+    with open(path, 'wb') as f:
+        f.write(FTYP)
+        mdat_size = sum(len(sample) for track_samples in samples for sample in track_samples)
+        f.write(struct.pack('>I4s', mdat_size + 8, b'mdat'))
+        for _, track, first in chunks:
+            offsets[track].append(position)
+            for sample in samples[track][first:first + per_chunk[track]]:
+                f.write(sample)
+                position += len(sample)
+
+        mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, int(seconds * 1000)) + bytes(80))
+        video = build_trak(1, b'vide', VIDEO_TIMESCALE, VIDEO_DELTA, [len(sample) for sample in samples[0]], VIDEO_PER_CHUNK,
+                           offsets[0], list(range(0, video_count, GOP)), [VIDEO_DELTA * (index % 3) for index in range(video_count)])
+        audio = build_trak(2, b'soun', AUDIO_TIMESCALE, AUDIO_DELTA, [AUDIO_SIZE] * audio_count, AUDIO_PER_CHUNK,
+                           offsets[1], None, None)
+        f.write(box(b'moov', mvhd + video + audio))
+    return samples
+
+def check_keyframe_parts(path: str, samples: list[list[bytes]], part_size: int) -> list[int]:
+    plan = plan_split(path, part_size)
+    assert plan.mode == 'keyframe', plan.mode
+    seen = [0, 0]
+    durations = [0.0, 0.0]
+    sizes = []
+    for index in range(plan.count):
+        part = plan.part(index)
+        data = asyncio.run(read_all(part.layout.open()))
+        assert len(data) == part.layout.size <= part_size, (len(data), part.layout.size)
+        assert [child.type for child in iter_boxes(data)] == [b'ftyp', b'moov', b'mdat']
+        assert scan_head(data[:256 * 1024])[0] == 'faststart'
+
+        moov_box = next(child for child in iter_boxes(data) if child.type == b'moov')
+        moov = data[moov_box.offset:moov_box.end]
+        assert b'edts' not in [child.type for trak in iter_boxes(moov, 8) if trak.type == b'trak' for child in iter_boxes(moov, trak.offset + 8, trak.end)]
+        traks = [trak for trak in iter_boxes(moov, 8) if trak.type == b'trak']
+        tracks = [Track(moov, trak) for trak in traks]
+        assert tracks[0].sync[0] == 0, f'bagian {index + 1} tidak mulai di keyframe'
+
+        for track_index, track in enumerate(tracks):
+            for sample in range(track.count):
+                expected = samples[track_index][seen[track_index] + sample]
+                offset = track.offsets[sample]
+                assert data[offset:offset + track.sizes[sample]] == expected, f'bagian {index + 1} track {track_index} sample {sample}'
+            seen[track_index] += track.count
+            durations[track_index] += track.dts[-1] / track.timescale
+        assert abs(part.layout.info.duration - tracks[0].dts[-1] / tracks[0].timescale) < 1e-9
+        sizes.append(part.layout.size)
+
+    assert seen == [len(track_samples) for track_samples in samples], seen
+    assert abs(durations[0] - len(samples[0]) * VIDEO_DELTA / VIDEO_TIMESCALE) < 1e-9
+    return sizes
+
+def check_byte_parts(path: str, part_size: int) -> int:
+    plan = plan_split(path, part_size)
+    assert plan.mode == 'bytes', plan.mode
+    joined = b''.join(asyncio.run(read_all(plan.part(index).layout.open())) for index in range(plan.count))
+    with open(path, 'rb') as f:
+        assert joined == f.read(), 'gabungan bagian tidak sama dengan file asli'
+    return plan.count
+
+async def timed_reads(path: str, part_size: int) -> tuple[float, float]:
+    """Seconds to plan + read every part in upload-sized reads, and to read the source once"""
+    start = time.perf_counter()
+    plan = await asyncio.to_thread(plan_split, path, part_size)
+    for index in range(plan.count):
+        reader = (await asyncio.to_thread(plan.part, index)).layout.open()
+        while await reader.read(512 * 1024):
+            pass
+    split_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async with aiofiles.open(path, 'rb') as f:
+        while await f.read(512 * 1024):
+            pass
+    return split_time, time.perf_counter() - start
+
+def main(size_mb: int, part_mb: int):
+    part_size = part_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'video.mp4')
+        samples = build_file(path, size_mb * 1024 * 1024)
+        sizes = check_keyframe_parts(path, samples, part_size)
+        split_time, plain_time = asyncio.run(timed_reads(path, part_size))
+        print(f'{"keyframe":>10}: ok  {len(sizes)} bagian {min(sizes) / 1024 / 1024:.1f}-{max(sizes) / 1024 / 1024:.1f}MB  '
+              f'rencana+baca {split_time * 1000:6.1f}ms  baca apa adanya {plain_time * 1000:6.1f}ms')
+
+        other = os.path.join(folder, 'video.bin')
+        with open(other, 'wb') as f:
+            f.write(os.urandom(size_mb * 1024 * 1024 // 4))
+        count = check_byte_parts(other, part_size // 4)
+        print(f'{"bytes":>10}: ok  {count} bagian, digabung kembali sama dengan file asli')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
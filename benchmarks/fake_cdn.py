@@ -0,0 +1,68 @@
+import asyncio
+from aiohttp import web
+
+CHUNK = 64 * 1024
+
+def make_cdn_app(files: dict[str, bytes], bandwidth_per_conn: float = 0, latency: float = 0) -> web.Application:
+    """
+    Range-capable stand-in for the video CDN.
+    bandwidth_per_conn is bytes/s per connection (0 = unthrottled), latency is added before the first byte.
+    """
+
+    async def serve_video(request: web.Request) -> web.StreamResponse:
+        data = files.get(request.match_info['name'])
+        if data is None:
+            raise web.HTTPNotFound()
+
+        start, end, status = 0, len(data) - 1, 200
+        range_header = request.headers.get('Range')
+        if range_header and range_header.startswith('bytes='):
+            first, _, last = range_header[6:].partition('-')
+            if first:
+                start = int(first)
+                end = min(int(last), len(data) - 1) if last else len(data) - 1
+            else:
+                # Suffix range: the last N bytes
+                start = max(0, len(data) - int(last))
+            if start > end:
+                raise web.HTTPRequestRangeNotSatisfiable(headers={'Content-Range': f'bytes */{len(data)}'})
+            status = 206
+
+        headers = {'Accept-Ranges': 'bytes', 'Content-Length': str(end - start + 1), 'Content-Type': 'video/mp4'}
+        if status == 206:
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+
+        if latency:
+            await asyncio.sleep(latency)
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        if request.method == 'HEAD':
+            return response
+
+        position = start
+        try:
+            while position <= end:
+                chunk = data[position:min(position + CHUNK, end + 1)]
+                await response.write(chunk)
+                position += len(chunk)
+                if bandwidth_per_conn:
+                    await asyncio.sleep(len(chunk) / bandwidth_per_conn)
+            await response.write_eof()
+        except ConnectionResetError:
+            # Client dropped the body early, e.g. the first GET before a segmented download
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_route('GET', '/v/{name}', serve_video)
+    app.router.add_route('HEAD', '/v/{name}', serve_video)
+    return app
+
+async def start_server(app: web.Application, host: str = '127.0.0.1', port: int = 0) -> tuple[web.AppRunner, str]:
+    """Start app on a free port, returns (runner, base_url)"""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{port}'
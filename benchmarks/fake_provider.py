@@ -0,0 +1,91 @@
+import struct
+import asyncio
+from aiohttp import web
+
+from benchmarks.fake_cdn import make_cdn_app
+
+FOLDER_PAGE_SIZE = 20
+
+# SOI, JFIF APP0, a 320x180 baseline frame header, then filler standing in for the image data
+THUMBNAIL = (b'\xff\xd8' + b'\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+             + b'\xff\xc0\x00\x11\x08' + struct.pack('>HH', 180, 320) + b'\x03\x01\x22\x00\x02\x11\x01\x03\x11\x01'
+             + bytes(12 * 1024))
+
+FILE_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name}</title></head><body>
+<div class="container">
+  <div class="info">
+    <h4>{name}</h4>
+    <div class="row">
+      <div class="col"><div class="size">{size_mb:.1f} MB</div></div>
+      <div class="col"><div class="length">01:00</div></div>
+      <div class="col"><div class="uploadate">2024-05-17</div></div>
+    </div>
+  </div>
+</div>
+</body></html>'''
+
+FOLDER_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>folder</title></head><body>
+<div class="list">
+{links}
+</div>
+{next_page}
+</body></html>'''
+
+VPLAYER_PAGE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>vplayer</title></head><body>
+<script>
+document.addEventListener('DOMContentLoaded', function () {{
+    player("video", "{base_url}/t/{file_id}.jpg", 0, "{base_url}/v/{file_id}");
+}});
+</script>
+</body></html>'''
+
+def make_provider_app(files: dict[str, bytes], folders: dict[str, list[str]], bandwidth_per_conn: float = 0,
+                      latency: float = 0, page_latency: float = 0) -> web.Application:
+    """
+    Stand-in for the mirror: /d/<id> file pages, paginated /f/<id> folder pages, vplayer?id=<id>,
+    /t/<id>.jpg thumbnails and the range-capable CDN from fake_cdn under /v/<id>, all on one host.
+    page_latency is added to every HTML page, bandwidth_per_conn and latency apply to the CDN.
+    """
+    app = make_cdn_app(files, bandwidth_per_conn=bandwidth_per_conn, latency=latency)
+
+    def base_url(request: web.Request) -> str:
+        return f'{request.scheme}://{request.host}'
+
+    async def serve_file_page(request: web.Request) -> web.Response:
+        file_id = request.match_info['id']
+        if file_id not in files:
+            raise web.HTTPNotFound()
+        await asyncio.sleep(page_latency)
+        text = FILE_PAGE.format(name=f'{file_id}.mp4', size_mb=len(files[file_id]) / 1024 / 1024)
+        return web.Response(text=text, content_type='text/html')
+
+    async def serve_folder_page(request: web.Request) -> web.Response:
+        file_ids = folders.get(request.match_info['id'])
+        if file_ids is None:
+            raise web.HTTPNotFound()
+        await asyncio.sleep(page_latency)
+        page = int(request.query.get('page', 1))
+        chunk = file_ids[(page - 1) * FOLDER_PAGE_SIZE:page * FOLDER_PAGE_SIZE]
+        links = '\n'.join(f'  <a class="title_video" href="/d/{file_id}">{file_id}.mp4</a>' for file_id in chunk)
+        next_page = f'<a href="?page={page + 1}">Next</a>' if page * FOLDER_PAGE_SIZE < len(file_ids) else ''
+        return web.Response(text=FOLDER_PAGE.format(links=links, next_page=next_page), content_type='text/html')
+
+    async def serve_vplayer(request: web.Request) -> web.Response:
+        file_id = request.query.get('id', '')
+        if file_id not in files:
+            raise web.HTTPNotFound()
+        await asyncio.sleep(page_latency)
+        return web.Response(text=VPLAYER_PAGE.format(base_url=base_url(request), file_id=file_id), content_type='text/html')
+
+    async def serve_thumbnail(request: web.Request) -> web.Response:
+        await asyncio.sleep(page_latency)
+        return web.Response(body=THUMBNAIL, content_type='image/jpeg')
+
+    app.router.add_get('/d/{id}', serve_file_page)
+    app.router.add_get('/f/{id}', serve_folder_page)
+    app.router.add_get('/vplayer', serve_vplayer)
+    app.router.add_get('/t/{name}', serve_thumbnail)
+    return app
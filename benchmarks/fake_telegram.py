@@ -0,0 +1,70 @@
+import asyncio
+import inspect
+import itertools
+from types import SimpleNamespace
+
+import aiofiles
+
+class FakeMessage:
+    """Enough of a telethon Message for the dashboard edits and the media cache"""
+
+    def __init__(self, text: str = '', size: int = 0, document_id: int = 0):
+        self.text = text
+        self.edits = 0
+        self.file = SimpleNamespace(size=size)
+        self.document = SimpleNamespace(id=document_id, access_hash=document_id, file_reference=b'') if document_id else None
+
+    async def edit(self, text: str, buttons=None):
+        self.text = text
+        self.edits += 1
+        return self
+
+class FakeTelegramClient:
+    """
+    Stand-in for the send_file surface upload_with_retry and stream_upload_video use:
+    upload_file reads the whole source (path or read(n) stream) at upload_bandwidth bytes/s,
+    send_file attaches it after send_latency. parallel_upload_file cannot open extra
+    MTProto senders on this client and falls back to upload_file, i.e. a single connection.
+    """
+
+    def __init__(self, upload_bandwidth: float = 0, send_latency: float = 0):
+        self.upload_bandwidth = upload_bandwidth
+        self.send_latency = send_latency
+        self.bytes_uploaded = 0
+        self.sent: list[FakeMessage] = []
+        self.thumbs = 0
+        self._ids = itertools.count(1)
+
+    async def upload_file(self, file, file_size: int, file_name: str, part_size_kb: int = 512, progress_callback=None):
+        part_size = part_size_kb * 1024
+        source = await aiofiles.open(file, 'rb') if isinstance(file, str) else file
+        done = 0
+        try:
+            while done < file_size:
+                data = source.read(min(part_size, file_size - done))
+                if inspect.isawaitable(data):
+                    data = await data
+                if not data:
+                    raise ValueError(f'{file_name}: sumber habis di {done}/{file_size} bytes')
+                done += len(data)
+                if self.upload_bandwidth:
+                    await asyncio.sleep(len(data) / self.upload_bandwidth)
+                if progress_callback:
+                    result = progress_callback(done, file_size)
+                    if inspect.isawaitable(result):
+                        await result
+        finally:
+            if isinstance(file, str):
+                await source.close()
+        self.bytes_uploaded += done
+        return SimpleNamespace(name=file_name, size=done)
+
+    async def send_file(self, chat_id: int, file, caption: str = '', thumb=None, supports_streaming: bool = False, **kwargs):
+        await asyncio.sleep(self.send_latency)
+        self.thumbs += thumb is not None
+        message = FakeMessage(caption, size=getattr(file, 'size', 0), document_id=next(self._ids))
+        self.sent.append(message)
+        return message
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        return FakeMessage(text)
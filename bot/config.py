@@ -17,11 +17,117 @@ LOGGING_FORMAT = '[%(asctime)s] %(levelname)s - %(message)s'
 # Folder download
 DOWNLOAD_FOLDER = os.path.join(os.path.expanduser("~"), "bot_downloads")
 
+# Folder data persisten (cache sqlite, dll)
+DATA_FOLDER = os.path.join(os.path.expanduser("~"), "bot_data")
+
 # Download and Upload Configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 CHUNK_SIZE = 64 * 1024  # 64KB
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB max for Telegram
+DOWNLOAD_TIMEOUT = 1800  # seconds, total per percobaan download
+UPLOAD_PART_SIZE_KB = 512  # ukuran part upload Telegram (maks 512KB)
+UPLOAD_CONNECTIONS = 4  # sender MTProto paralel untuk upload file besar (>10MB), 1 = satu koneksi
+UPLOAD_PART_RETRIES = 5  # percobaan ulang per part sebelum seluruh upload dianggap gagal
+
+# Segmented Download Configuration (HTTP Range paralel)
+DOWNLOAD_SEGMENTS = 4  # jumlah koneksi paralel per file, 1 = selalu single stream
+SEGMENT_MIN_SIZE = 4 * 1024 * 1024  # 4MB, segment lebih kecil dari ini tidak dipecah lagi
+SEGMENT_RETRIES = 3  # reconnect per segment sebelum satu percobaan download dianggap gagal
+
+# Resume & Stall Detection Configuration
+JOURNAL_INTERVAL = 5  # seconds, jeda simpan journal byte range yang sudah selesai
+STALL_WINDOW = 30  # seconds, jendela pengukuran throughput
+STALL_MIN_SPEED = 16 * 1024  # bytes/s, di bawah ini koneksi dianggap macet dan disambung ulang
+
+# Streaming Configuration (download langsung disalurkan ke upload Telegram)
+STREAM_UPLOAD = True  # False = selalu unduh ke disk dulu
+STREAM_BUFFER_PARTS = 32  # maks part yang di-buffer di memori (32 x 512KB = 16MB)
+
+# MP4 Configuration (moov dipindah ke depan saat upload supaya video langsung bisa diputar)
+MP4_FASTSTART = True  # False = file diunggah apa adanya, tanpa atribut durasi/dimensi
+MP4_HEAD_PEEK = 64 * 1024  # byte awal stream yang dibaca untuk mencari posisi moov
+MP4_MAX_MOOV_SIZE = 32 * 1024 * 1024  # moov lebih besar dari ini tidak dibaca ke memori
+
+# Split Configuration (file di atas MAX_FILE_SIZE dikirim sebagai beberapa bagian bernomor)
+SPLIT_LARGE_FILES = True  # False = file di atas MAX_FILE_SIZE ditolak
+SPLIT_PART_SIZE = MAX_FILE_SIZE  # ukuran maksimal tiap bagian
+MAX_SPLIT_SOURCE_SIZE = 4 * 1024 * 1024 * 1024  # 4GB, file sumber lebih besar dari ini tidak diunduh
+
+# Thumbnail Configuration (diambil bersamaan dengan unduhan video, disimpan di memori)
+THUMB_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 32MB, LRU per file id
+THUMB_MAX_SIZE = 200 * 1024  # batas Telegram untuk thumbnail dokumen
+THUMB_MAX_DIMENSION = 320  # px, thumbnail lebih lebar/tinggi dari ini diabaikan Telegram (tidak di-resize, dilewati)
+THUMB_TIMEOUT = 15  # seconds
+
+# Dashboard Configuration (satu pesan progres per batch)
+DASHBOARD_EDIT_INTERVAL = 5  # seconds, jeda minimal antar edit pesan dashboard
+DASHBOARD_MAX_LINES = 15  # baris video yang ditampilkan, sisanya diringkas
+
+# Metrics Configuration (endpoint Prometheus /metrics dan /healthz)
+# Tanpa autentikasi: default hanya localhost. Set METRICS_HOST=0.0.0.0 (mis. di Docker) untuk membuka ke jaringan
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))  # 0 = endpoint mati
+LOOP_LAG_INTERVAL = 1  # seconds, jeda sampling lag event loop
+
+# Worker Configuration (scraping & unduhan di proses terpisah, bot Telegram + unggahan tetap di proses utama)
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', 0))  # 0 = semua jalan di satu proses, bisa diganti --workers
+WORKER_PROGRESS_INTERVAL = 0.5  # seconds, jeda minimal kirim progres unduhan dari worker ke proses utama
+WORKER_RESTART_DELAY = 5  # seconds, jeda minimal sebelum worker yang mati dijalankan ulang
+WORKER_CHECK_INTERVAL = 1  # seconds, jeda cek worker yang mati (task-nya langsung digagalkan)
+
+# Scraping Configuration
+SCRAPE_CONCURRENCY = 10  # max request paralel ke mirror/vplayer
+HTTP_TIMEOUT = 60  # seconds, default untuk request scraping
+SCRAPE_LOOKAHEAD = 8  # video folder yang di-resolve di depan video yang sedang diproses (token video_url cepat kadaluarsa)
+FOLDER_MAX_PAGES = 50  # batas halaman folder yang diikuti
+MIRROR_CACHE_TTL = 6 * 60 * 60  # seconds, umur mapping domain input -> mirror aktif
+MIRROR_PROBE_INTERVAL = 10 * 60  # seconds, jeda health probe mirror di background
+MIRROR_PROBE_TIMEOUT = 15  # seconds
+
+# Metadata Cache Configuration
+METADATA_CACHE_PATH = os.path.join(DATA_FOLDER, "metadata_cache.sqlite3")
+METADATA_CACHE_MAX_ENTRIES = 50000  # LRU, entry paling lama tidak dipakai dibuang duluan
+VIDEO_URL_TTL = 30 * 60  # seconds, token video_url dari vplayer cepat kadaluarsa
+
+# Media Cache Configuration (file id provider -> dokumen Telegram yang sudah diunggah)
+MEDIA_CACHE_PATH = os.path.join(DATA_FOLDER, "media_cache.sqlite3")
+
+# Dedup Configuration (konten sama dengan file id / mirror lain yang sudah terkirim dikirim ulang dari media Telegram)
+DEDUP_ENABLED = True  # False = setiap file id selalu diunduh & diunggah
+CONTENT_INDEX_PATH = os.path.join(DATA_FOLDER, "content_index.sqlite3")
+FINGERPRINT_BYTES = 64 * 1024  # byte awal dan akhir file untuk sidik jari (Range probe sebelum unduhan)
+FINGERPRINT_TIMEOUT = 15  # seconds
+HASH_INTERVAL = 1  # seconds, jeda hashing bagian awal file yang sudah lengkap selama unduhan segmented
+
+# Job Store Configuration (antrian persisten, dilanjutkan setelah restart)
+JOB_STORE_PATH = os.path.join(DATA_FOLDER, "jobs.sqlite3")
+
+# Pipeline Configuration: maks byte file hasil unduhan yang menunggu diunggah per folder
+PIPELINE_MAX_BYTES = 1024 * 1024 * 1024  # 1GB
+
+# Storage Configuration (kuota DOWNLOAD_FOLDER, dihitung dari total berjalan, bukan scan folder)
+STORAGE_QUOTA = 10 * 1024 * 1024 * 1024  # 10GB, file hasil unduhan + reservasi unduhan yang sedang jalan
+STORAGE_MIN_FREE = 2 * 1024 * 1024 * 1024  # 2GB, job baru ditahan kalau ruang kosong volume di bawah ini
+STORAGE_POLL_INTERVAL = 10  # seconds, cek ulang ruang kosong selagi job/unduhan ditahan
+STORAGE_SWEEP_INTERVAL = 10 * 60  # seconds, jeda sweep file .tmp yatim di background
+ORPHAN_MIN_AGE = 60 * 60  # seconds, .tmp tanpa pemilik yang lebih muda dari ini tidak disentuh
+
+# Scheduler Configuration: batas slot per tahap, global / per user / per host (None = tanpa batas)
+SCHEDULER_LIMITS = {
+    'job':      {'global': 10, 'user': 3,  'host': None},  # URL yang diproses bersamaan
+    'scrape':   {'global': 6,  'user': 2,  'host': 4},
+    'download': {'global': 4,  'user': 2,  'host': 4},
+    'upload':   {'global': 3,  'user': 1,  'host': None},
+}
+
+# HTTP Connection Pool Configuration (satu session aiohttp untuk seluruh bot)
+# Cukup untuk semua download bersamaan x segmen + request scraping, supaya koneksi tidak antre di pool
+# Batas None di SCHEDULER_LIMITS jadi 0 (tanpa batas di aiohttp)
+HTTP_POOL_LIMIT = (SCHEDULER_LIMITS['download']['global'] * DOWNLOAD_SEGMENTS + SCRAPE_CONCURRENCY) if SCHEDULER_LIMITS['download']['global'] else 0
+HTTP_POOL_LIMIT_PER_HOST = (SCHEDULER_LIMITS['download']['host'] or 0) * DOWNLOAD_SEGMENTS
+HTTP_KEEPALIVE_TIMEOUT = 75  # seconds, koneksi idle ke CDN dipakai lagi oleh video berikutnya
+DNS_CACHE_TTL = 300  # seconds
 
 # User states for conversation flow (shared state)
 USER_STATES = {}
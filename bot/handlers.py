@@ -1,96 +1,441 @@
 import os
+import time
 import logging
 import asyncio
 import re  # Import the regex module
 from telethon import TelegramClient, events, Button
 
-from bot.config import USER_STATES, DOWNLOAD_FOLDER, MAX_RETRIES, RETRY_DELAY, CHUNK_SIZE, MAX_FILE_SIZE
+from bot.config import (
+    USER_STATES, DOWNLOAD_FOLDER, MAX_RETRIES, RETRY_DELAY, CHUNK_SIZE, MAX_FILE_SIZE, STREAM_UPLOAD,
+    SPLIT_LARGE_FILES, SPLIT_PART_SIZE, DEDUP_ENABLED
+)
 from bot.keyboards import (
     create_main_keyboard, create_back_keyboard, create_download_keyboard,
-    create_settings_keyboard
+    create_settings_keyboard, create_jobs_keyboard
 )
 from core.uploader import (
-    get_video_info, download_video_with_retry, upload_with_retry,
-    DownloadError, UploadError
+    iter_video_info, download_video_with_retry, upload_with_retry, upload_split_with_retry, send_cached_media,
+    stream_upload_video, DownloadError, UploadError
+)
+from core.media_cache import media_cache
+from core.scheduler import scheduler, Job, DONE, FAILED, RUNNING
+from core.pipeline import run_pipeline
+from core.progress import ProgressBus, ItemProgress, format_duration
+from core.metrics import metrics
+from core.storage import storage, parse_size, StorageError
+from core.thumbnails import thumbnail_cache
+from core.dedup import content_index, probe_fingerprint
+from core.singleflight import SingleFlight
+from core.workers import worker_pool
+from core.job_store import (
+    job_store, RESOLVING, DOWNLOADING, UPLOADING,
+    DONE as ITEM_DONE, FAILED as ITEM_FAILED, CANCELLED as JOB_CANCELLED
 )
-from utils.helpers import safe_cleanup
+from utils.helpers import safe_cleanup, sanitize_filename
 
 log = logging.getLogger(__name__)
 
-async def process_video_download(client: TelegramClient, chat_id: int, url: str, status_msg) -> bool:
+# Video yang sedang diunduh/diunggah per file id provider, dipakai bersama oleh semua job
+item_flights = SingleFlight('item')
+
+# Label tahap job untuk tampilan antrian
+JOB_STAGE_LABELS = {
+    'job': "⏳ Menunggu slot",
+    'scrape': "🔍 Mengambil info",
+    'download': "📥 Mengunduh",
+    'upload': "📤 Mengunggah",
+}
+
+def build_caption(video_title: str, file_size: int, video_info: dict) -> str:
+    """Susun caption video yang dikirim ke chat"""
+    return (
+        f"🎬 **{video_title}**\n\n"
+        f"💾 **Ukuran File:** {file_size / (1024 * 1024):.1f} MB\n"
+        f"⏱️ **Durasi:** {video_info.get('duration', 'Unknown')}\n"
+        f"📊 **Ukuran Asli:** {video_info.get('size', 'Unknown')}\n\n"
+        f"📁 **Nama file asli:** `{video_info.get('original_filename', 'N/A')}`\n\n"
+        f"🤖 **Diunduh dengan VideoBot**"
+    )
+
+def build_status_text() -> str:
+    """Ringkasan status bot dari metrics di memori"""
+    uptime = time.time() - metrics.started_at
+    downloaded = metrics.bytes_total.get('download')
+    uploaded = metrics.bytes_total.get('upload')
+    active_jobs = scheduler.status(active_only=True)
+
+    lines = [
+        f"📊 **Status Bot**\n",
+        f"🟢 **Status:** Online · uptime {format_duration(uptime)}",
+        f"📋 **Job aktif:** {len([job for job in active_jobs if job.status == RUNNING])} berjalan, "
+        f"{len([job for job in active_jobs if job.status != RUNNING])} antri",
+        f"🎬 **Video:** {metrics.items_total.get('done'):.0f} terkirim, {metrics.items_total.get('cached'):.0f} dari cache, "
+        f"{metrics.items_total.get('failed'):.0f} gagal",
+        f"📁 **File sementara:** {len(storage.files)} file ({storage.used/1024/1024:.1f} MB), "
+        f"{storage.reserved/1024/1024:.1f} MB direservasi",
+        f"💾 **Kuota:** {(storage.used + storage.reserved)/storage.quota*100:.0f}% dari {storage.quota/1024/1024/1024:.1f} GB · "
+        f"kosong {storage.disk_free()/1024/1024/1024:.1f} GB",
+        f"📥 **Total unduh:** {downloaded/1024/1024:.1f} MB · 📤 **Total unggah:** {uploaded/1024/1024:.1f} MB",
+        "",
+        "⏱️ **Rata-rata per tahap:**",
+    ]
+    for stage, label in (('redirect', "Redirect"), ('scrape', "Scraping"), ('download', "Unduh"), ('upload', "Unggah"), ('stream', "Streaming")):
+        count = metrics.stage_seconds.count(stage, 'ok')
+        if count:
+            lines.append(f"• {label}: {metrics.stage_seconds.average(stage, 'ok'):.1f}s ({count}x, {metrics.stage_seconds.count(stage, 'error')} gagal)")
+    lines += [
+        "",
+        f"🔁 **Retry:** {metrics.retries_total.total():.0f} · 🌊 **FloodWait:** {metrics.flood_wait_seconds.total():.0f}s",
+        f"🐢 **Lag event loop:** {metrics.loop_lag_last.get() * 1000:.0f} ms",
+        f"⚙️ **Worker:** {len(worker_pool.processes)} proses" if worker_pool.running else "⚙️ **Worker:** satu proses",
+        f"📏 **Maks ukuran file:** {MAX_FILE_SIZE/1024/1024:.0f} MB",
+    ]
+    return "\n".join(lines)
+
+async def discard_file(filepath: str):
+    """Hapus file hasil unduhan dan kurangi total penyimpanan"""
+    await safe_cleanup(filepath)
+    storage.file_removed(filepath)
+
+def protected_files() -> set[str]:
+    """File yang masih dibutuhkan job yang belum selesai: file jadi (path) dan .tmp yang bisa di-resume (nama)"""
+    resumable_keys = {f"{file_id}.tmp" for job in job_store.unfinished_jobs() for file_id in job_store.get_items(job['job_id'])}
+    return job_store.active_filepaths() | resumable_keys
+
+async def process_video_download(client: TelegramClient, chat_id: int, url: str, dashboard: ProgressBus, user_id: int | None = None, job: Job | None = None) -> bool:
     """
     Memproses unduhan dan unggahan video tunggal dari URL yang diberikan.
     Mengembalikan True jika berhasil secara keseluruhan untuk URL ini, False jika gagal.
-    Pesan status (status_msg) hanya akan diedit untuk kegagalan awal parsing URL.
-    Progres unduhan/unggahan per video tidak akan mengedit status_msg.
+    Tahap, persentase, kecepatan dan ETA tiap video dilaporkan ke dashboard batch
+    (satu pesan yang diedit berkala), termasuk kegagalan parsing URL.
+    Setiap tahap (scrape, download, upload) menunggu slot dari scheduler global.
+    Video dalam satu folder diproses sebagai pipeline: video berikutnya diunduh
+    selagi video sebelumnya diunggah.
+    Video yang sedang diproses job lain tidak diunduh lagi: job ini menunggu lalu mengirim ulang medianya.
     """
     filepaths = []
-    try:
-        video_infos = await get_video_info(url)
-        # Pastikan video_infos selalu berupa daftar, bahkan jika PoopDownload mengembalikan satu kamus
-        if not isinstance(video_infos, list):
-            video_infos = [video_infos]
-
-        total_videos_in_url = len(video_infos)
-        successful_uploads_for_url = 0
-
-        for idx, video_info in enumerate(video_infos, 1):
-            # Hapus pengeditan status_msg per video individu di sini
-            # current_video_status_text = (
-            #     f"📥 **[{idx}/{total_videos_in_url}] Mengunduh:** `{video_info['filename']}`\n"
-            #     f"📊 **Ukuran:** {video_info.get('size', 'Unknown')}\n"
-            #     f"⏱️ **Durasi:** {video_info.get('duration', 'Unknown')}\n\n"
-            #     f"Progres video ini: **{idx}/{total_videos_in_url}**"
-            # )
-            # await status_msg.edit(current_video_status_text, buttons=create_back_keyboard())
+    successful_uploads_for_url = 0
 
-            try:
-                filepath = await download_video_with_retry(video_info['video_url'], video_info['filename'])
-                filepaths.append(filepath)
-            except DownloadError as e:
-                log.error(f"Download gagal untuk {video_info['filename']}: {str(e)}")
-                # Hapus pengeditan status_msg pada kegagalan unduhan per video
-                # await status_msg.edit(f"❌ **Gagal Unduh:** `{video_info['filename']}`\n\n{str(e)}", buttons=create_back_keyboard())
-                continue # Lanjutkan ke video berikutnya jika ada
-
-            file_size_mb = os.path.getsize(filepath) / (1024 * 1024)
-            video_title = os.path.splitext(os.path.basename(filepath))[0]
-            caption = (
-                f"🎬 **{video_title}**\n\n"
-                f"💾 **Ukuran File:** {file_size_mb:.1f} MB\n"
-                f"⏱️ **Durasi:** {video_info.get('duration', 'Unknown')}\n"
-                f"📊 **Ukuran Asli:** {video_info.get('size', 'Unknown')}\n\n"
-                f"📁 **Nama file asli:** `{video_info.get('original_filename', 'N/A')}`\n\n"
-                f"🤖 **Diunduh dengan VideoBot**"
-            )
+    # Video yang dipimpin job ini di item_flights, dilepas setelah terkirim atau gagal
+    flight_owner = object()
+    led_items: set[str] = set()
 
-            try:
-                await upload_with_retry(client, chat_id, filepath, caption)
+    # Status item dari job store: setelah restart, item yang sudah terkirim dilewati
+    stored_items = job_store.get_items(job.id) if job else {}
+
+    # Fetch thumbnail per item, dimulai di tahap 1 dan dipakai di tahap 2
+    thumb_tasks: dict[str, asyncio.Task | None] = {}
+
+    def take_thumbnail(video_info: dict) -> asyncio.Task | None:
+        return thumb_tasks.pop(video_info['id'], None) or thumbnail_cache.prefetch(video_info['id'], video_info.get('thumbnail_url'))
+
+    def record_item(video_info: dict, status: str, **fields):
+        if job:
+            job_store.set_item(job.id, video_info['id'], status, **fields)
+
+    async def download_item(video_info: dict, progress: ItemProgress) -> str | None:
+        record_item(video_info, DOWNLOADING)
+        try:
+            # Ukuran dari halaman info direservasi dulu, dikoreksi ke Content-Length saat unduhan mulai
+            async with storage.reserve(
+                video_info['id'], parse_size(video_info.get('size')),
+                on_wait=lambda: progress.set_stage('queued', "menunggu ruang disk")
+            ) as reservation, scheduler.slot('download', user_id, video_info['video_url'], job):
+                progress.set_stage('download')
+                # Mode worker: unduhan berjalan di proses worker, hasilnya tetap file di DOWNLOAD_FOLDER
+                download = worker_pool.download if worker_pool.running else download_video_with_retry
+                filepath = await download(
+                    video_info['video_url'], video_info['filename'], file_key=video_info['id'],
+                    progress=progress, reservation=reservation
+                )
+            filepaths.append(filepath)
+            file_size = os.path.getsize(filepath)
+            record_item(video_info, UPLOADING, filepath=filepath, bytes_done=file_size, total_bytes=file_size)
+            progress.set_stage('queued', "menunggu unggah")
+            return filepath
+        except (DownloadError, StorageError) as e:
+            log.error(f"Download gagal untuk {video_info['filename']}: {str(e)}")
+            record_item(video_info, ITEM_FAILED)
+            progress.fail("unduhan gagal")
+            metrics.items_total.inc(1, 'failed')
+            return None
+
+    async def produce(video_info: dict):
+        """Tahap 1: siapkan konten video, hasil (jenis, data) dan jumlah byte di disk"""
+        progress = dashboard.track(video_info['id'], video_info['filename'])
+        stored = stored_items.get(video_info['id'], {})
+        if stored.get('status') == ITEM_DONE:
+            return ('done', None), 0
+        # File sudah selesai diunduh sebelum restart, tinggal diunggah
+        if stored.get('status') == UPLOADING and stored.get('filepath') and os.path.exists(stored['filepath']):
+            filepaths.append(stored['filepath'])
+            progress.set_stage('queued', "menunggu unggah")
+            return ('file', stored['filepath']), os.path.getsize(stored['filepath'])
+
+        # Job lain sedang mengunduh/mengunggah video yang sama: tunggu, hasilnya masuk media cache
+        while (flight := item_flights.join(video_info['id'], flight_owner)):
+            progress.set_stage('queued', "menunggu job lain")
+            await asyncio.shield(flight)
+
+        # File yang sama pernah diunggah: kirim ulang media Telegram tanpa unduh/unggah
+        cached_media = media_cache.get(video_info['id'])
+        metrics.cache_total.inc(1, 'media', 'hit' if cached_media else 'miss')
+        if cached_media:
+            return ('cached', cached_media), 0
+
+        # Tanpa await sejak cek di atas, jadi hanya satu job yang memimpin video ini
+        item_flights.lead(video_info['id'], flight_owner)
+        led_items.add(video_info['id'])
+
+        # Konten yang sama dari file id / mirror lain sudah pernah terkirim: cocokkan sidik jari sebelum unduh
+        if DEDUP_ENABLED:
+            probed = await probe_fingerprint(video_info['video_url'])
+            duplicate = None
+            if probed:
+                size, fingerprint = probed
+                content_index.record(video_info['id'], size, fingerprint=fingerprint)
+                duplicate = content_index.find_delivered(video_info['id'], fingerprint=fingerprint)
+            metrics.cache_total.inc(1, 'content', 'hit' if duplicate else 'miss')
+            if duplicate:
+                return ('cached', duplicate), 0
+
+        # Thumbnail diambil di background selagi video diunduh, dipakai saat send_file
+        thumb_tasks[video_info['id']] = thumbnail_cache.prefetch(video_info['id'], video_info.get('thumbnail_url'))
+
+        # Ukuran diketahui dari Content-Length: unduh & unggah berjalan bersamaan di tahap upload
+        # (mode worker selalu lewat disk, supaya unduhan tidak memakai CPU proses utama)
+        if STREAM_UPLOAD and not worker_pool.running:
+            return ('stream', None), 0
+
+        filepath = await download_item(video_info, progress)
+        return ('file', filepath), (os.path.getsize(filepath) if filepath else 0)
+
+    def land_item(file_id: str):
+        if file_id in led_items:
+            led_items.discard(file_id)
+            item_flights.land(file_id, flight_owner)
+
+    async def consume(video_info: dict, prepared):
+        """Tahap 2: kirim ke chat, lalu bangunkan job lain yang menunggu video ini"""
+        try:
+            await deliver(video_info, prepared)
+        finally:
+            land_item(video_info['id'])
+
+    async def deliver(video_info: dict, prepared):
+        """Kirim satu video, dengan fallback stream -> disk kalau cara cepat gagal"""
+        nonlocal successful_uploads_for_url
+        kind, payload = prepared
+        progress = dashboard.items[video_info['id']]
+
+        if kind == 'done':
+            progress.finish("sudah terkirim")
+            successful_uploads_for_url += 1
+            return
+
+        if kind == 'cached':
+            while payload:
+                caption = build_caption(payload['title'], payload['file_size'], video_info)
+                async with scheduler.slot('upload', user_id, job=job):
+                    sent = await send_cached_media(client, chat_id, video_info['id'], payload, caption)
+                if sent:
+                    record_item(video_info, ITEM_DONE)
+                    progress.finish("dari cache")
+                    metrics.items_total.inc(1, 'cached')
+                    successful_uploads_for_url += 1
+                    return
+                # Entry basi: hanya satu job yang mengunduh ulang, job lain menunggu lalu memakai hasilnya
+                payload = None
+                while (flight := item_flights.join(video_info['id'], flight_owner)):
+                    progress.set_stage('queued', "menunggu job lain")
+                    await asyncio.shield(flight)
+                    payload = media_cache.get(video_info['id'])
+            item_flights.lead(video_info['id'], flight_owner)
+            led_items.add(video_info['id'])
+            kind = 'stream' if STREAM_UPLOAD and not worker_pool.running else 'file'
+
+        if kind == 'stream':
+            video_title = os.path.splitext(sanitize_filename(video_info['filename']))[0]
+            record_item(video_info, DOWNLOADING)
+            # Streaming memakai slot download dan upload sekaligus (urutan tetap: download -> upload)
+            async with scheduler.slot('download', user_id, video_info['video_url'], job), scheduler.slot('upload', user_id, job=job):
+                message = await stream_upload_video(
+                    client, chat_id, video_info['video_url'], video_info['filename'],
+                    lambda size: build_caption(video_title, size, video_info), progress=progress,
+                    thumb=take_thumbnail(video_info), file_key=video_info['id']
+                )
+            if message:
+                media_cache.put(video_info['id'], message, video_title, message.file.size)
+                record_item(video_info, ITEM_DONE, bytes_done=message.file.size, total_bytes=message.file.size)
+                progress.finish()
+                metrics.items_total.inc(1, 'done')
+                successful_uploads_for_url += 1
+                return
+            kind, payload = 'file', None
+
+        filepath = payload or await download_item(video_info, progress)
+        if not filepath:
+            return # Lanjutkan ke video berikutnya jika ada
+
+        file_size = os.path.getsize(filepath)
+        video_title = os.path.splitext(os.path.basename(filepath))[0]
+        caption = build_caption(video_title, file_size, video_info)
+
+        # Isi file sama persis dengan video lain yang sudah terkirim (hash dihitung selama unduhan): tidak perlu diunggah
+        stored_content = content_index.get(video_info['id']) if DEDUP_ENABLED else None
+        duplicate = content_index.find_delivered(video_info['id'], digest=stored_content['digest']) if stored_content else None
+        if duplicate:
+            async with scheduler.slot('upload', user_id, job=job):
+                sent = await send_cached_media(client, chat_id, video_info['id'], duplicate, caption)
+            if sent:
+                record_item(video_info, ITEM_DONE)
+                progress.finish("konten sama sudah terkirim")
+                metrics.items_total.inc(1, 'cached')
                 successful_uploads_for_url += 1
-            except UploadError as e:
-                log.error(f"Unggahan gagal untuk {video_info['filename']}: {str(e)}")
-                # Hapus pengeditan status_msg pada kegagalan unggahan per video
-                # await status_msg.edit(f"❌ **Gagal Unggah:** `{video_info['filename']}`\n\n{str(e)}", buttons=create_back_keyboard())
-                continue
+                await discard_file(filepath)
+                filepaths.remove(filepath)
+                return
+
+        try:
+            async with scheduler.slot('upload', user_id, job=job):
+                if SPLIT_LARGE_FILES and file_size > MAX_FILE_SIZE:
+                    # Terlalu besar untuk satu pesan: dikirim sebagai beberapa bagian bernomor (tidak masuk media cache)
+                    await upload_split_with_retry(
+                        client, chat_id, filepath,
+                        lambda number, count, size: build_caption(f"{video_title} · Bagian {number}/{count}", size, video_info),
+                        progress=progress, thumb=take_thumbnail(video_info)
+                    )
+                else:
+                    message = await upload_with_retry(
+                        client, chat_id, filepath, caption, progress=progress,
+                        thumb=take_thumbnail(video_info)
+                    )
+                    media_cache.put(video_info['id'], message, video_title, file_size)
+            record_item(video_info, ITEM_DONE)
+            progress.finish()
+            metrics.items_total.inc(1, 'done')
+            successful_uploads_for_url += 1
+        except UploadError as e:
+            log.error(f"Unggahan gagal untuk {video_info['filename']}: {str(e)}")
+            record_item(video_info, ITEM_FAILED)
+            progress.fail("unggahan gagal")
+            metrics.items_total.inc(1, 'failed')
+        finally:
+            # Bebaskan disk segera supaya budget byte pipeline terisi lagi
+            await discard_file(filepath)
+            filepaths.remove(filepath)
+
+    async def resolve_items():
+        """Video diteruskan ke pipeline begitu selesai di-resolve; slot scrape hanya dipegang selama mencari item berikutnya"""
+        video_infos = worker_pool.iter_video_info(url) if worker_pool.running else iter_video_info(url)
+        resolved = 0
+        try:
+            while True:
+                async with scheduler.slot('scrape', user_id, url, job):
+                    try:
+                        video_info = await anext(video_infos)
+                    except StopAsyncIteration:
+                        return
+                if not resolved:
+                    # Baris URL diganti baris per video begitu video pertama ditemukan
+                    dashboard.remove(url_key)
+                    if job:
+                        job_store.set_job_status(job.id, DOWNLOADING)
+                resolved += 1
+                yield video_info
+        finally:
+            await video_infos.aclose()
+
+    url_key = f"url:{job.id if job else url}"
+    url_progress = dashboard.track(url_key, url, stage='scrape')
+
+    try:
+        if job:
+            job_store.set_job_status(job.id, RESOLVING)
+        await run_pipeline(resolve_items(), produce, consume)
         
         # Mengembalikan hasil boolean untuk digunakan oleh message_handler.
-        # Tidak ada edit status per URL akhir di sini.
         return successful_uploads_for_url > 0
 
     except DownloadError as e:
         log.error(f"❌ Pengambilan info video awal gagal untuk {url}: {str(e)}")
-        # Ini menunjukkan kegagalan langsung untuk mengurai URL itu sendiri. TETAPKAN INI.
-        await status_msg.edit(f"❌ **Info video awal gagal:** {str(e)}", buttons=create_back_keyboard())
+        # Kegagalan mengurai URL itu sendiri ditampilkan di baris URL pada dashboard
+        dashboard.items.setdefault(url_key, url_progress)
+        url_progress.fail("info video gagal")
         return False
     except Exception as e:
         log.error(f"❌ Terjadi error tak terduga dalam process_video_download untuk {url}: {str(e)}")
-        # Untuk error tak terduga yang spesifik untuk URL ini. TETAPKAN INI.
-        await status_msg.edit(f"❌ **Error tak terduga:** {str(e)}", buttons=create_back_keyboard())
+        dashboard.items.setdefault(url_key, url_progress)
+        url_progress.fail(f"error: {str(e)[:60]}")
         return False
     finally:
         for filepath in filepaths:
-            await safe_cleanup(filepath)
+            await discard_file(filepath)
+        # Video yang tidak sampai ke tahap 2 (error / dibatalkan) tidak boleh menahan job lain
+        for file_id in list(led_items):
+            land_item(file_id)
+
+
+def submit_url_job(client: TelegramClient, user_id: int | None, chat_id: int, url: str, dashboard: ProgressBus, job_id: int | None = None) -> Job:
+    """
+    Simpan URL ke job store lalu masukkan ke scheduler.
+    Progres dilaporkan ke dashboard batch, bukan ke pesan baru per URL.
+    job_id diisi saat melanjutkan job lama setelah restart.
+    """
+    if job_id is None:
+        job_id = job_store.create_job(user_id, chat_id, url)
+    dashboard.track(f"url:{job_id}", url)
+
+    async def run_url_job(job: Job) -> bool:
+        # Job baru ditahan selama ruang disk di bawah batas atau kuota penuh
+        await storage.admit(on_wait=lambda: dashboard.track(f"url:{job_id}", url).set_stage('queued', "menunggu ruang disk"))
+        return await process_video_download(client, chat_id, job.url, dashboard, user_id=user_id, job=job)
+
+    def record_result(_task):
+        # Pembatalan oleh user dicatat di handler tombol; task yang berhenti karena shutdown tetap dilanjutkan nanti
+        if job.status in (DONE, FAILED):
+            job_store.set_job_status(job.id, job.status)
+
+    job = scheduler.enqueue(user_id, chat_id, url, run_url_job, job_id=job_id)
+    job.task.add_done_callback(record_result)
+    return job
+
+async def resume_unfinished_jobs(client: TelegramClient):
+    """Lanjutkan job yang belum selesai saat proses berhenti, lalu bersihkan file sementara yatim"""
+    unfinished = job_store.unfinished_jobs()
+
+    # File jadi yang masih menunggu diunggah ikut dihitung di total penyimpanan
+    for file_path in job_store.active_filepaths():
+        if os.path.isfile(file_path):
+            storage.file_added(file_path)
+
+    # .tmp/journal milik item yang masih berjalan disimpan supaya bisa di-resume dari byte terakhir, sisanya dihapus
+    storage.sweep(protected_files(), min_age=0, temp_only=False)
 
+    # Satu dashboard per chat untuk semua job yang dilanjutkan
+    jobs_by_chat: dict[int, list[dict]] = {}
+    for stored_job in unfinished:
+        jobs_by_chat.setdefault(stored_job['chat_id'], []).append(stored_job)
+
+    for chat_id, stored_jobs in jobs_by_chat.items():
+        title = f"♻️ Bot dimulai ulang, melanjutkan {len(stored_jobs)} job"
+        try:
+            message = await client.send_message(chat_id, f"**{title}**")
+        except Exception as e:
+            log.warning(f"Gagal mengirim pesan resume ke chat {chat_id}: {str(e)}")
+            continue
+        dashboard = ProgressBus(message, title).start()
+
+        jobs = []
+        for stored_job in stored_jobs:
+            log.warning(f"Melanjutkan job #{stored_job['job_id']}: {stored_job['url']}")
+            jobs.append(submit_url_job(client, stored_job['user_id'], chat_id, stored_job['url'], dashboard, job_id=stored_job['job_id']))
+        asyncio.create_task(close_dashboard_after(dashboard, jobs))
+
+async def close_dashboard_after(dashboard: ProgressBus, jobs: list[Job]):
+    """Tulis keadaan akhir dashboard setelah semua job batch selesai"""
+    await asyncio.gather(*(job.wait() for job in jobs))
+    await dashboard.close(buttons=create_back_keyboard())
 
 def register_handlers(client: TelegramClient):
     @client.on(events.NewMessage(pattern='/start'))
@@ -162,47 +507,44 @@ def register_handlers(client: TelegramClient):
         
         elif data == "bot_status":
             try:
-                # Pastikan DOWNLOAD_FOLDER ada sebelum mencantumkan isinya
-                if not os.path.exists(DOWNLOAD_FOLDER):
-                    os.makedirs(DOWNLOAD_FOLDER)
-
-                file_count = len([f for f in os.listdir(DOWNLOAD_FOLDER) if os.path.isfile(os.path.join(DOWNLOAD_FOLDER, f))])
-                
-                total_size = 0
-                for filename in os.listdir(DOWNLOAD_FOLDER):
-                    file_path = os.path.join(DOWNLOAD_FOLDER, filename)
-                    if os.path.isfile(file_path):
-                        total_size += os.path.getsize(file_path)
-                
-                status_text = (
-                    f"📊 **Status Bot**\n\n"
-                    f"🟢 **Status:** Online & Siap\n"
-                    f"📁 **File sementara:** {file_count} file\n"
-                    f"💾 **Penyimpanan terpakai:** {total_size/1024/1024:.1f} MB\n"
-                    f"⚙️ **Maks percobaan ulang:** {MAX_RETRIES}\n"
-                    f"⏱️ **Penundaan percobaan ulang:** {RETRY_DELAY}s\n"
-                    f"📏 **Maks ukuran file:** {MAX_FILE_SIZE/1024/1024:.0f} MB\n\n"
-                    f"🔧 **Performa:** Optimal"
-                )
-                
-                await event.edit(status_text, buttons=create_back_keyboard())
+                # Dibaca dari counter di memori, tanpa menelusuri DOWNLOAD_FOLDER
+                await event.edit(build_status_text(), buttons=create_back_keyboard())
             except Exception as e:
                 await event.edit(f"❌ **Gagal Cek Status**\n\n{str(e)}", buttons=create_back_keyboard())
         
+        elif data == "job_status":
+            jobs = scheduler.status(user_id=user_id, active_only=True)
+            if not jobs:
+                status_text = "📋 **Antrian Saya**\n\nTidak ada job yang sedang berjalan atau menunggu."
+            else:
+                status_text = "📋 **Antrian Saya**\n\n"
+                for job in jobs:
+                    state = JOB_STAGE_LABELS.get(job.stage, "⏳ Menunggu") if job.status == RUNNING else "⏳ Menunggu"
+                    status_text += f"• **Job #{job.id}** — {state}\n  `{job.url[:50]}{'...' if len(job.url) > 50 else ''}`\n"
+            await event.edit(status_text, buttons=create_jobs_keyboard(jobs))
+
+        elif data.startswith("cancel_job:"):
+            job_id = int(data.split(':', 1)[1])
+            if scheduler.cancel(job_id, user_id=user_id):
+                job_store.set_job_status(job_id, JOB_CANCELLED)
+                await event.answer(f"✅ Job #{job_id} dibatalkan")
+            else:
+                await event.answer(f"⚠️ Job #{job_id} sudah selesai atau tidak ditemukan", alert=True)
+            jobs = scheduler.status(user_id=user_id, active_only=True)
+            await event.edit(
+                f"📋 **Antrian Saya**\n\n{len(jobs)} job aktif.",
+                buttons=create_jobs_keyboard(jobs)
+            )
+
         elif data == "cleanup":
             try:
-                files_removed = 0
-                if os.path.exists(DOWNLOAD_FOLDER):
-                    for filename in os.listdir(DOWNLOAD_FOLDER):
-                        file_path = os.path.join(DOWNLOAD_FOLDER, filename)
-                        if os.path.isfile(file_path):
-                            os.remove(file_path)
-                            files_removed += 1
+                # Hanya file tanpa pemilik; file yang sedang ditulis/menunggu diunggah job lain tidak disentuh
+                files_removed, bytes_freed = storage.sweep(protected_files(), min_age=0, temp_only=False)
                 
                 await event.edit(
                     f"🗑️ **Pembersihan Selesai**\n\n"
                     f"✅ **{files_removed} file** berhasil dihapus!\n"
-                    f"💾 **Penyimpanan dikosongkan**\n\n"
+                    f"💾 **{bytes_freed/1024/1024:.1f} MB dikosongkan**\n\n"
                     f"Bot Anda sekarang berjalan bersih! 🚀",
                     buttons=create_back_keyboard()
                 )
@@ -257,7 +599,10 @@ def register_handlers(client: TelegramClient):
                 f"📁 **Pengaturan File**\n\n"
                 f"**Konfigurasi Saat Ini:**\n"
                 f"• Maks Ukuran File: **{MAX_FILE_SIZE/1024/1024:.0f}MB**\n"
+                f"• File Lebih Besar: **{f'dipotong per {SPLIT_PART_SIZE/1024/1024:.0f}MB' if SPLIT_LARGE_FILES else 'ditolak'}**\n"
                 f"• Folder Unduhan: **{DOWNLOAD_FOLDER}**\n"
+                f"• Kuota Penyimpanan: **{storage.quota/1024/1024/1024:.1f}GB**\n"
+                f"• Minimal Ruang Kosong: **{storage.min_free/1024/1024/1024:.1f}GB**\n"
                 f"• Pembersihan Otomatis: **Diaktifkan**\n"
                 f"• Perbaikan Nama File: **Diaktifkan**\n\n"
                 f"File secara otomatis dibersihkan setelah diunggah untuk menghemat ruang.",
@@ -308,34 +653,25 @@ def register_handlers(client: TelegramClient):
                 )
                 return
             
-            # Kirim pesan awal yang menunjukkan bahwa proses multi-URL dimulai
-            initial_reply = await event.reply(f"🚀 **Memulai proses unduhan untuk {len(valid_urls)} URL...**")
+            # Pesan awal sekaligus dashboard batch yang diedit berkala
+            dashboard_title = f"🚀 Memproses {len(valid_urls)} URL"
+            initial_reply = await event.reply(f"**{dashboard_title}**")
+            dashboard = ProgressBus(initial_reply, dashboard_title).start()
             
             total_processed_urls = len(valid_urls)
             successful_urls_count = 0
             failed_urls_list = [] # List untuk menyimpan URL yang gagal
 
-            # Proses setiap URL satu per satu
-            for i, url_to_process in enumerate(valid_urls):
-                # PERBAIKAN: Menghapus tautan GitHub yang hardcode dari status_msg_text
-                status_msg_text = (
-                   
-                    f"🔍 Mengambil informasi video..."
-                )
-                
-                # Kirim pesan status baru untuk setiap URL dalam daftar
-                current_status_message = await client.send_message(
-                    chat_id,
-                    status_msg_text,
-                    buttons=create_back_keyboard()
-                )
-                
-                # Panggil process_video_download untuk setiap URL
-                success = await process_video_download(client, event.chat_id, url_to_process, current_status_message)
-                if success:
+            # Semua URL masuk scheduler; jumlah yang berjalan bersamaan diatur oleh batas per tahap
+            jobs = [submit_url_job(client, user_id, chat_id, url_to_process, dashboard) for url_to_process in valid_urls]
+            await close_dashboard_after(dashboard, jobs)
+
+            for job in jobs:
+                if job.status == DONE:
                     successful_urls_count += 1
                 else:
-                    failed_urls_list.append(url_to_process) # Tambahkan URL yang gagal ke daftar
+                    failed_urls_list.append(job.url) # Tambahkan URL yang gagal ke daftar
+            scheduler.prune()
             
             # Kirim pesan ringkasan akhir setelah semua URL diproses
             final_summary = (
@@ -372,5 +708,7 @@ def register_handlers(client: TelegramClient):
             buttons=create_back_keyboard()
         )
         
-        # Teruskan klien ke process_video_download
-        await process_video_download(client, event.chat_id, url, status_msg)
\ No newline at end of file
+        # Teruskan klien ke process_video_download lewat scheduler, pesan status menjadi dashboard
+        dashboard = ProgressBus(status_msg, "Perintah Lama").start()
+        job = submit_url_job(client, event.sender_id, event.chat_id, url, dashboard)
+        await close_dashboard_after(dashboard, [job])
\ No newline at end of file
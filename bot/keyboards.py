@@ -6,6 +6,7 @@ def create_main_keyboard():
         [Button.inline("⭐ Start", "start")],
         [Button.inline("📥 Download Video", "download_video")],
         [Button.inline("📊 Bot Status", "bot_status"), Button.inline("🗑️ Cleanup", "cleanup")],
+        [Button.inline("📋 Antrian Saya", "job_status")],
         [Button.inline("ℹ️ Help & Guide", "help"), Button.inline("⚙️ Settings", "settings")]
     ]
 
@@ -34,4 +35,10 @@ def create_success_keyboard():
     return [
         [Button.inline("📥 Download Another Video", "download_video")],
         [Button.inline("🏠 Main Menu", "main_menu")]
-    ]
\ No newline at end of file
+    ]
+
+def create_jobs_keyboard(jobs):
+    """Create job queue keyboard with one cancel button per active job"""
+    rows = [[Button.inline(f"❌ Batalkan Job #{job.id}", f"cancel_job:{job.id}")] for job in jobs]
+    rows.append([Button.inline("🔄 Refresh", "job_status"), Button.inline("🔙 Back", "main_menu")])
+    return rows
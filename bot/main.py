@@ -2,12 +2,17 @@ import os
 import logging
 from telethon import TelegramClient
 
-from bot.config import API_ID, API_HASH, BOT_TOKEN, DOWNLOAD_FOLDER, LOGGING_LEVEL, LOGGING_FORMAT, MAX_RETRIES, RETRY_DELAY, MAX_FILE_SIZE
-from bot.handlers import register_handlers
+from bot.config import API_ID, API_HASH, BOT_TOKEN, DOWNLOAD_FOLDER, DATA_FOLDER, LOGGING_LEVEL, LOGGING_FORMAT, MAX_RETRIES, RETRY_DELAY, MAX_FILE_SIZE, WORKER_PROCESSES
+from bot.handlers import register_handlers, resume_unfinished_jobs, protected_files
+from core.http_session import get_session, close_session
+from core.provider.mirror_cache import mirror_cache
+from core.metrics import metrics
+from core.storage import storage
+from core.workers import worker_pool
 
 log = logging.getLogger(__name__)
 
-def initialize_bot():
+def initialize_bot(workers: int = WORKER_PROCESSES):
     # Setup logging
     logging.basicConfig(
         level=LOGGING_LEVEL,
@@ -16,13 +21,34 @@ def initialize_bot():
 
     # Ensure download folder exists
     os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+    os.makedirs(DATA_FOLDER, exist_ok=True)
 
     # Initialize client
     client = TelegramClient('userbot_session', API_ID, API_HASH).start(bot_token=BOT_TOKEN)
     
+    # Satu connection pool untuk scraping dan download CDN, dibuat sekali di event loop client
+    client.loop.run_until_complete(get_session())
+
+    # Endpoint /metrics untuk Prometheus (METRICS_PORT=0 untuk mematikan) dan pemantau lag event loop
+    client.loop.run_until_complete(metrics.start_server())
+    client.loop.create_task(metrics.monitor_loop_lag())
+
+    # Mode worker: scraping & unduhan di proses terpisah, proses ini tinggal UI chat dan unggahan
+    if workers > 0:
+        worker_pool.start(workers, loop=client.loop)
+
     # Register handlers
     register_handlers(client)
 
+    # Background health probe untuk cache mirror domain
+    client.loop.create_task(mirror_cache.run_health_probe())
+
+    # Lanjutkan job yang terputus oleh restart sebelumnya
+    client.loop.create_task(resume_unfinished_jobs(client))
+
+    # Sweep berkala file .tmp yatim yang tidak dimiliki unduhan atau job mana pun
+    client.loop.create_task(storage.run_sweeper(protected_files))
+
     return client
 
 def run_bot(client: TelegramClient):
@@ -33,12 +59,18 @@ def run_bot(client: TelegramClient):
     print(f"🔄 Max retries: {MAX_RETRIES}")
     print(f"⏱️ Retry delay: {RETRY_DELAY}s")
     print(f"📏 Max file size: {MAX_FILE_SIZE/1024/1024:.0f}MB")
+    print(f"⚙️ Workers: {len(worker_pool.processes) or 'off (single process)'}")
     print("🚀 ========================================")
     print("✅ Bot is running with enhanced UI...")
     print("🎯 Users can now use buttons instead of commands!")
     print("🚀 ========================================")
     
-    client.run_until_disconnected()
+    try:
+        client.run_until_disconnected()
+    finally:
+        worker_pool.stop()
+        client.loop.run_until_complete(close_session())
+        client.loop.run_until_complete(metrics.stop_server())
 
 if __name__ == '__main__':
     # This block is typically not run directly in a modular setup
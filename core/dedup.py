@@ -0,0 +1,188 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import threading
+
+import aiohttp
+
+from bot.config import CONTENT_INDEX_PATH, FINGERPRINT_BYTES, FINGERPRINT_TIMEOUT
+from core.http_session import get_session
+from core.media_cache import media_cache
+
+log = logging.getLogger(__name__)
+
+CONTENT_RANGE = re.compile(r'bytes (\d+)-\d+/(\d+)')
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def fingerprint_of(size: int, head: bytes, tail: bytes) -> str:
+    """Cheap content identity: size plus the first and last FINGERPRINT_BYTES (they overlap for small files)"""
+    digest = hashlib.sha256(size.to_bytes(8, 'big'))
+    digest.update(head)
+    digest.update(tail)
+    return digest.hexdigest()
+
+def fingerprint_file(path: str) -> str:
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(FINGERPRINT_BYTES)
+        f.seek(max(0, size - FINGERPRINT_BYTES))
+        tail = f.read(FINGERPRINT_BYTES)
+    return fingerprint_of(size, head, tail)
+
+async def probe_fingerprint(url: str) -> tuple[int, str] | None:
+    """(size, fingerprint) of a remote file from two small Range requests, None when the host does not serve ranges"""
+    session = await get_session()
+    timeout = aiohttp.ClientTimeout(total=FINGERPRINT_TIMEOUT)
+
+    async def fetch(range_header: str) -> tuple[int, int, bytes]:
+        async with session.get(url, headers={'Range': range_header}, timeout=timeout) as resp:
+            match = CONTENT_RANGE.match(resp.headers.get('Content-Range', ''))
+            if resp.status != 206 or not match:
+                raise ValueError(f"Range tidak didukung (HTTP {resp.status})")
+            return int(match.group(1)), int(match.group(2)), await resp.read()
+
+    try:
+        (_, size, head), (tail_start, tail_size, tail) = await asyncio.gather(
+            fetch(f'bytes=0-{FINGERPRINT_BYTES - 1}'), fetch(f'bytes=-{FINGERPRINT_BYTES}')
+        )
+    except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+        log.info(f"Sidik jari tidak bisa diambil: {str(e)}")
+        return None
+    # A server that ignores suffix ranges would give a fingerprint that never matches a downloaded file
+    if size != tail_size or tail_start != max(0, size - FINGERPRINT_BYTES):
+        return None
+    return size, fingerprint_of(size, head, tail)
+
+class ContentHasher:
+    """
+    sha256 of a download in file order. In-order bytes are fed with update(); a file written
+    out of order (segmented download) is hashed by catch_up(), which reads back the completed
+    prefix while it is still in the page cache, so the digest is ready when the download ends.
+    filepath is only read by catch_up().
+    """
+
+    def __init__(self, filepath: str | None = None):
+        self.filepath = filepath
+        self.position = 0
+        self.failed = False
+        self._hash = hashlib.sha256()
+        self._pending: asyncio.Future | None = None
+
+    def update(self, chunk: bytes):
+        self._hash.update(chunk)
+        self.position += len(chunk)
+
+    def _read(self, upto: int):
+        try:
+            with open(self.filepath, 'rb') as f:
+                f.seek(self.position)
+                while self.position < upto:
+                    block = f.read(min(HASH_BLOCK_SIZE, upto - self.position))
+                    if not block:
+                        raise OSError(f"file berakhir di byte {self.position}")
+                    self._hash.update(block)
+                    self.position += len(block)
+        except OSError as e:
+            log.warning(f"Hash {os.path.basename(self.filepath)} gagal: {str(e)}")
+            self.failed = True
+
+    async def catch_up(self, upto: int):
+        """Hash the file up to byte upto; a read-back cut short by cancellation finishes before the next one starts"""
+        if self._pending:
+            await asyncio.shield(self._pending)
+        if upto > self.position and not self.failed:
+            self._pending = asyncio.ensure_future(asyncio.to_thread(self._read, upto))
+            await asyncio.shield(self._pending)
+
+    def hexdigest(self, size: int) -> str | None:
+        """Digest of the whole file, None when hashing did not cover exactly size bytes"""
+        if self.failed or self.position != size:
+            return None
+        return self._hash.hexdigest()
+
+class ContentIndex:
+    """Persistent map from provider file id to the fingerprint and digest of its content"""
+
+    def __init__(self, path: str = CONTENT_INDEX_PATH):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS content_index (
+                    file_id     TEXT PRIMARY KEY,
+                    size        INTEGER,
+                    fingerprint TEXT,
+                    digest      TEXT,
+                    updated_at  REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS content_fingerprint ON content_index (fingerprint)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS content_digest ON content_index (digest)')
+        return self._conn
+
+    def record(self, file_id: str, size: int, fingerprint: str | None = None, digest: str | None = None) -> None:
+        """Store what is known about file_id; values not given keep what was stored before"""
+        try:
+            with self._lock:
+                self._connect().execute(
+                    'INSERT INTO content_index VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(file_id) DO UPDATE SET size = excluded.size, '
+                    'fingerprint = COALESCE(excluded.fingerprint, fingerprint), '
+                    'digest = COALESCE(excluded.digest, digest), updated_at = excluded.updated_at',
+                    (file_id, size, fingerprint, digest, time.time())
+                )
+        except sqlite3.Error as e:
+            log.warning(f"Content index write gagal untuk {file_id}: {str(e)}")
+
+    def get(self, file_id: str) -> dict | None:
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT size, fingerprint, digest FROM content_index WHERE file_id = ?', (file_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"Content index read gagal untuk {file_id}: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {'size': row[0], 'fingerprint': row[1], 'digest': row[2]}
+
+    def find(self, column: str, value: str, exclude: str) -> list[str]:
+        """Other file ids with the same fingerprint or digest, most recently seen first"""
+        if column not in ('fingerprint', 'digest'):
+            raise ValueError(column)
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    f'SELECT file_id FROM content_index WHERE {column} = ? AND file_id != ? ORDER BY updated_at DESC',
+                    (value, exclude)
+                ).fetchall()
+        except sqlite3.Error as e:
+            log.warning(f"Content index lookup gagal: {str(e)}")
+            return []
+        return [row[0] for row in rows]
+
+    def find_delivered(self, file_id: str, fingerprint: str | None = None, digest: str | None = None) -> dict | None:
+        """Media cache entry of another file id with the same content, if one was already sent"""
+        for column, value in (('digest', digest), ('fingerprint', fingerprint)):
+            if not value:
+                continue
+            for other_id in self.find(column, value, file_id):
+                cached = media_cache.get(other_id)
+                if cached:
+                    log.info(f"♻️ {file_id} sama dengan {other_id} (cocok {column})")
+                    return cached
+        return None
+
+# Shared instance for the whole process
+content_index = ContentIndex()
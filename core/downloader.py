@@ -0,0 +1,261 @@
+import os
+import json
+import errno
+import time
+import asyncio
+import logging
+import aiohttp
+import aiofiles
+from collections import deque
+
+from bot.config import (
+    CHUNK_SIZE, DOWNLOAD_SEGMENTS, SEGMENT_MIN_SIZE, SEGMENT_RETRIES,
+    STALL_WINDOW, STALL_MIN_SPEED, JOURNAL_INTERVAL, HASH_INTERVAL
+)
+from core.http_session import TRANSFER_TIMEOUT
+from core.metrics import metrics
+from core.dedup import ContentHasher
+from core.storage import StorageError
+
+log = logging.getLogger(__name__)
+
+class SegmentError(Exception):
+    pass
+
+class StallError(SegmentError):
+    pass
+
+class Segment:
+    """Inclusive byte range [start, end] of the target file; pos is the next byte to write"""
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.pos = start
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.end - self.pos + 1)
+
+def supports_ranges(resp: aiohttp.ClientResponse, total_size: int) -> bool:
+    """Byte ranges let us split the file across connections and resume after a failure"""
+    return total_size > 0 and resp.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+def response_validator(resp: aiohttp.ClientResponse) -> str:
+    """Identify the remote file version so a journal is never resumed against different content"""
+    return resp.headers.get('ETag') or resp.headers.get('Last-Modified') or ''
+
+class DownloadJournal:
+    """Sidecar file next to the .tmp download listing which byte ranges are already on disk"""
+
+    def __init__(self, temp_filepath: str):
+        self.temp_filepath = temp_filepath
+        self.path = f"{temp_filepath}.journal"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self, total_size: int, validator: str) -> list[Segment] | None:
+        """Return the saved segments, or None if there is nothing valid to resume"""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            if state['total_size'] != total_size or state['validator'] != validator:
+                log.info(f"Journal {self.path} tidak cocok dengan file remote, mulai dari awal")
+                return None
+            if os.path.getsize(self.temp_filepath) != total_size:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+
+        segments = []
+        for start, end, pos in state['segments']:
+            segment = Segment(start, end)
+            segment.pos = pos
+            segments.append(segment)
+        return segments
+
+    def save(self, total_size: int, validator: str, segments: list[Segment]):
+        state = {
+            'total_size': total_size,
+            'validator': validator,
+            'segments': [[segment.start, segment.end, segment.pos] for segment in segments],
+        }
+        # Write-then-rename so a crash never leaves a half-written journal
+        with open(f"{self.path}.new", 'w') as f:
+            json.dump(state, f)
+        os.replace(f"{self.path}.new", self.path)
+
+    def remove(self):
+        for path in (self.path, f"{self.path}.new"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+async def iter_chunks_guarded(resp: aiohttp.ClientResponse):
+    """
+    Yield body chunks, raising StallError when throughput stays under STALL_MIN_SPEED
+    for a whole STALL_WINDOW, so a dying connection is replaced instead of idling until a flat timeout.
+    """
+    window_start = time.monotonic()
+    window_bytes = 0
+    while True:
+        try:
+            chunk = await asyncio.wait_for(resp.content.read(CHUNK_SIZE), timeout=STALL_WINDOW)
+        except asyncio.TimeoutError:
+            raise StallError(f"Tidak ada data selama {STALL_WINDOW}s")
+        if not chunk:
+            return
+        yield chunk
+
+        window_bytes += len(chunk)
+        elapsed = time.monotonic() - window_start
+        if elapsed >= STALL_WINDOW:
+            if window_bytes / elapsed < STALL_MIN_SPEED:
+                raise StallError(f"Throughput {window_bytes / elapsed / 1024:.1f} KB/s di bawah batas")
+            window_start, window_bytes = time.monotonic(), 0
+
+def preallocate(filepath: str, size: int):
+    """Reserve the full file size up front so segments can write at their own offsets; StorageError on a full volume"""
+    with open(filepath, 'ab') as f:
+        f.truncate(size)
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError as e:
+                # A full volume fails here, before any segment is written, instead of halfway through
+                if e.errno == errno.ENOSPC:
+                    raise StorageError(f"Ruang disk tidak cukup untuk {size/1024/1024:.1f}MB") from e
+                # Not every filesystem supports fallocate; truncate already gave us a sparse file
+
+def split_segments(total_size: int, count: int) -> list[Segment]:
+    """Cut [0, total_size) into count roughly equal segments"""
+    count = max(1, min(count, total_size // SEGMENT_MIN_SIZE))
+    step = total_size // count
+    segments = []
+    for index in range(count):
+        start = index * step
+        end = total_size - 1 if index == count - 1 else start + step - 1
+        segments.append(Segment(start, end))
+    return segments
+
+def completed_prefix(segments: list[Segment]) -> int:
+    """End of the leading part of the file that every segment before it has fully written"""
+    prefix = 0
+    for segment in sorted(segments, key=lambda segment: segment.start):
+        if segment.start > prefix:
+            break
+        prefix = max(prefix, segment.pos)
+        if segment.remaining > 0:
+            break
+    return prefix
+
+def steal_segment(segments: list[Segment]) -> Segment | None:
+    """Split the largest unfinished segment in half so an idle connection can help with it"""
+    victim = max(segments, key=lambda segment: segment.remaining, default=None)
+    if victim is None or victim.remaining < 2 * SEGMENT_MIN_SIZE:
+        return None
+
+    middle = victim.pos + victim.remaining // 2
+    stolen = Segment(middle, victim.end)
+    victim.end = middle - 1
+    segments.append(stolen)
+    return stolen
+
+async def fetch_range(session: aiohttp.ClientSession, url: str, filepath: str, segment: Segment, on_progress=None):
+    """Download one byte range into its offset; stops early if the range was shrunk by steal_segment"""
+    headers = {'Range': f'bytes={segment.pos}-{segment.end}'}
+    async with session.get(url, headers=headers, timeout=TRANSFER_TIMEOUT) as resp:
+        if resp.status != 206:
+            raise SegmentError(f"Range request ditolak (HTTP {resp.status})")
+
+        # Unbuffered: bytes before segment.pos are in the file, where the content hasher reads them back
+        async with aiofiles.open(filepath, 'r+b', buffering=0) as f:
+            await f.seek(segment.pos)
+            async for chunk in iter_chunks_guarded(resp):
+                # Another worker may have taken the tail of this range meanwhile
+                remaining = segment.remaining
+                if remaining <= 0:
+                    break
+                view = memoryview(chunk)[:remaining]
+                while view:
+                    written = await f.write(view)
+                    segment.pos += written
+                    view = view[written:]
+                if on_progress:
+                    on_progress(min(len(chunk), remaining))
+
+    if segment.remaining > 0:
+        raise SegmentError(f"Segment {segment.start}-{segment.end} terputus di byte {segment.pos}")
+
+async def fetch_segment(session: aiohttp.ClientSession, url: str, filepath: str, segment: Segment, on_progress=None):
+    """fetch_range with reconnects that continue from the last written byte"""
+    for attempt in range(SEGMENT_RETRIES + 1):
+        try:
+            await fetch_range(session, url, filepath, segment, on_progress)
+            return
+        except (StallError, aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError, asyncio.TimeoutError) as e:
+            if attempt == SEGMENT_RETRIES:
+                raise
+            log.warning(f"Segment {segment.start}-{segment.end} reconnect dari byte {segment.pos}: {str(e)}")
+            metrics.retries_total.inc(1, 'segment')
+
+async def download_segmented(session: aiohttp.ClientSession, url: str, filepath: str, total_size: int,
+                             segments: list[Segment] | None = None, connections: int = DOWNLOAD_SEGMENTS,
+                             on_progress=None, journal: DownloadJournal | None = None, validator: str = '',
+                             hasher: ContentHasher | None = None):
+    """
+    Fetch url into filepath over several concurrent Range requests.
+    Each connection writes at its own offset; a connection that finishes early splits the
+    largest remaining segment so one throttled connection does not hold up the whole file.
+    Passing the segments loaded from a journal resumes a previous attempt.
+    With a hasher, the completed start of the file is hashed while the rest is still downloading.
+    Returns the bytes the segments hold, total_size when every segment is complete.
+    """
+    if segments is None:
+        preallocate(filepath, total_size)
+        segments = split_segments(total_size, connections)
+
+    queue = deque(segment for segment in segments if segment.remaining > 0)
+    log.info(f"Segmented download {os.path.basename(filepath)}: {len(queue)} segment, {connections} koneksi")
+
+    async def worker():
+        while True:
+            segment = queue.popleft() if queue else steal_segment(segments)
+            if segment is None:
+                return
+            await fetch_segment(session, url, filepath, segment, on_progress)
+
+    async def checkpoint():
+        while True:
+            await asyncio.sleep(JOURNAL_INTERVAL)
+            journal.save(total_size, validator, segments)
+
+    async def hash_prefix():
+        while True:
+            await asyncio.sleep(HASH_INTERVAL)
+            await hasher.catch_up(completed_prefix(segments))
+
+    checkpoint_task = asyncio.create_task(checkpoint()) if journal else None
+    hash_task = asyncio.create_task(hash_prefix()) if hasher else None
+    tasks = [asyncio.create_task(worker()) for _ in range(connections)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        if checkpoint_task:
+            checkpoint_task.cancel()
+        if hash_task:
+            hash_task.cancel()
+        # Always leave an up-to-date journal behind; the caller removes it after verification
+        if journal:
+            journal.save(total_size, validator, segments)
+
+    if hasher:
+        await hasher.catch_up(total_size)
+    return sum(segment.pos - segment.start for segment in segments)
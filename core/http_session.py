@@ -0,0 +1,47 @@
+import ssl
+import asyncio
+import logging
+import aiohttp
+
+from bot.config import HTTP_TIMEOUT, HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, DNS_CACHE_TTL
+
+log = logging.getLogger(__name__)
+
+# Long transfers: no flat total timeout, stalled connections are caught by iter_chunks_guarded instead
+TRANSFER_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=HTTP_TIMEOUT)
+
+_session: aiohttp.ClientSession | None = None
+_session_lock = asyncio.Lock()
+
+def _create_connector() -> aiohttp.TCPConnector:
+    """
+    Pooled connector shared by scraping and CDN downloads: cached DNS, keep-alive connections
+    that the next video on the same host picks up, and one SSL context for every TLS handshake.
+    """
+    return aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+        ssl=ssl.create_default_context(),
+    )
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide aiohttp session, creating it on first use"""
+    global _session
+    async with _session_lock:
+        if _session is None or _session.closed:
+            timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+            _session = aiohttp.ClientSession(connector=_create_connector(), timeout=timeout)
+            log.info(f"🌐 Shared HTTP session dibuat (pool {HTTP_POOL_LIMIT}, per host {HTTP_POOL_LIMIT_PER_HOST})")
+    return _session
+
+async def close_session():
+    """Close the shared session so pending connections are released on shutdown"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        log.info("🌐 Shared HTTP session ditutup")
+    _session = None
@@ -0,0 +1,124 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from bot.config import JOB_STORE_PATH
+
+log = logging.getLogger(__name__)
+
+# Item / job states, in processing order
+PENDING = 'pending'
+RESOLVING = 'resolving'
+DOWNLOADING = 'downloading'
+UPLOADING = 'uploading'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class JobStore:
+    """
+    Crash-safe record of every submitted URL and each video inside it.
+    Survives container restarts so unfinished work can be picked up again without repeating
+    items that were already delivered.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id    INTEGER,
+                    chat_id    INTEGER NOT NULL,
+                    url        TEXT NOT NULL,
+                    status     TEXT NOT NULL,
+                    created_at REAL,
+                    updated_at REAL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id      INTEGER NOT NULL,
+                    file_id     TEXT NOT NULL,
+                    status      TEXT NOT NULL,
+                    filepath    TEXT,
+                    bytes_done  INTEGER DEFAULT 0,
+                    total_bytes INTEGER DEFAULT 0,
+                    updated_at  REAL,
+                    PRIMARY KEY (job_id, file_id)
+                )
+            ''')
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        try:
+            with self._lock:
+                return self._connect().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            log.warning(f"Job store query gagal: {str(e)}")
+            return []
+
+    def create_job(self, user_id: int | None, chat_id: int, url: str) -> int:
+        """Persist a new URL job and return its id"""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                'INSERT INTO jobs (user_id, chat_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (user_id, chat_id, url, PENDING, now, now)
+            )
+            return cursor.lastrowid
+
+    def set_job_status(self, job_id: int, status: str):
+        self._execute('UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?', (status, time.time(), job_id))
+
+    def unfinished_jobs(self) -> list[dict]:
+        """Jobs that were queued or running when the process stopped"""
+        rows = self._execute(
+            'SELECT job_id, user_id, chat_id, url FROM jobs WHERE status NOT IN (?, ?, ?) ORDER BY job_id',
+            FINISHED_STATES
+        )
+        return [dict(zip(('job_id', 'user_id', 'chat_id', 'url'), row)) for row in rows]
+
+    def set_item(self, job_id: int, file_id: str, status: str, filepath: str | None = None,
+                 bytes_done: int | None = None, total_bytes: int | None = None):
+        """Record a video item's state; None leaves the stored filepath/byte counters unchanged"""
+        self._execute(
+            'INSERT INTO job_items (job_id, file_id, status, filepath, bytes_done, total_bytes, updated_at) '
+            'VALUES (?, ?, ?, ?, COALESCE(?, 0), COALESCE(?, 0), ?) '
+            'ON CONFLICT(job_id, file_id) DO UPDATE SET status = excluded.status, '
+            'filepath = COALESCE(?, filepath), bytes_done = COALESCE(?, bytes_done), '
+            'total_bytes = COALESCE(?, total_bytes), updated_at = excluded.updated_at',
+            (job_id, file_id, status, filepath, bytes_done, total_bytes, time.time(), filepath, bytes_done, total_bytes)
+        )
+
+    def get_items(self, job_id: int) -> dict[str, dict]:
+        """Items of a job keyed by provider file id"""
+        rows = self._execute(
+            'SELECT file_id, status, filepath, bytes_done, total_bytes FROM job_items WHERE job_id = ?', (job_id,)
+        )
+        return {row[0]: dict(zip(('status', 'filepath', 'bytes_done', 'total_bytes'), row[1:])) for row in rows}
+
+    def active_filepaths(self) -> set[str]:
+        """Files on disk that an unfinished item may still need"""
+        rows = self._execute(
+            'SELECT job_items.filepath FROM job_items JOIN jobs USING (job_id) '
+            'WHERE job_items.filepath IS NOT NULL AND job_items.status NOT IN (?, ?, ?) '
+            'AND jobs.status NOT IN (?, ?, ?)',
+            FINISHED_STATES + FINISHED_STATES
+        )
+        return {row[0] for row in rows}
+
+# Shared instance for the whole process
+job_store = JobStore()
@@ -0,0 +1,91 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from telethon import types
+
+from bot.config import MEDIA_CACHE_PATH
+
+log = logging.getLogger(__name__)
+
+class MediaCache:
+    """Persistent map from provider file id to the Telegram document we already uploaded for it"""
+
+    def __init__(self, path: str = MEDIA_CACHE_PATH):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS telegram_media (
+                    file_id        TEXT PRIMARY KEY,
+                    document_id    INTEGER NOT NULL,
+                    access_hash    INTEGER NOT NULL,
+                    file_reference BLOB NOT NULL,
+                    title          TEXT,
+                    file_size      INTEGER,
+                    created_at     REAL,
+                    last_used      REAL
+                )
+            ''')
+        return self._conn
+
+    def get(self, file_id: str) -> dict | None:
+        """Return the stored document reference for a provider file id (kept under 'file_id'), or None"""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT document_id, access_hash, file_reference, title, file_size '
+                    'FROM telegram_media WHERE file_id = ?', (file_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"Media cache read gagal untuk {file_id}: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+        document_id, access_hash, file_reference, title, file_size = row
+        return {
+            'file_id': file_id,
+            'media': types.InputDocument(id=document_id, access_hash=access_hash, file_reference=file_reference),
+            'title': title,
+            'file_size': file_size,
+        }
+
+    def put(self, file_id: str, message, title: str, file_size: int) -> None:
+        """Record the document carried by a sent message so the next request can re-send it"""
+        document = getattr(message, 'document', None)
+        if document is None:
+            log.warning(f"Pesan untuk {file_id} tidak membawa dokumen, tidak disimpan ke media cache")
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                self._connect().execute(
+                    'INSERT INTO telegram_media VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(file_id) DO UPDATE SET document_id = excluded.document_id, '
+                    'access_hash = excluded.access_hash, file_reference = excluded.file_reference, '
+                    'title = excluded.title, file_size = excluded.file_size, last_used = excluded.last_used',
+                    (file_id, document.id, document.access_hash, document.file_reference, title, file_size, now, now)
+                )
+        except sqlite3.Error as e:
+            log.warning(f"Media cache write gagal untuk {file_id}: {str(e)}")
+
+    def forget(self, file_id: str) -> None:
+        """Drop a reference Telegram no longer accepts"""
+        try:
+            with self._lock:
+                self._connect().execute('DELETE FROM telegram_media WHERE file_id = ?', (file_id,))
+        except sqlite3.Error as e:
+            log.warning(f"Media cache delete gagal untuk {file_id}: {str(e)}")
+
+# Shared instance for the whole process
+media_cache = MediaCache()
@@ -0,0 +1,231 @@
+import time
+import asyncio
+import logging
+import functools
+from contextlib import contextmanager
+
+from aiohttp import web
+
+from bot.config import METRICS_HOST, METRICS_PORT, LOOP_LAG_INTERVAL
+
+log = logging.getLogger(__name__)
+
+# Seconds; covers everything from a cached redirect to a 500MB upload
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """Monotonic value per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *label_values):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values) -> float:
+        return self.values.get(label_values, 0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {value}'
+
+class Gauge(Counter):
+    """Value that goes up and down; fn, when given, is read at scrape time and returns {label_values: value}"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+    def dec(self, amount: float = 1, *label_values):
+        self.inc(-amount, *label_values)
+
+    def samples(self):
+        if self.fn:
+            self.values = dict(self.fn())
+        yield from super().samples()
+
+class Histogram:
+    """Bucketed observations per label combination, Prometheus cumulative style"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            # Per-bucket counts, then sum and count
+            entry = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][index] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def average(self, *label_values) -> float:
+        entry = self.values.get(label_values)
+        return entry[1] / entry[2] if entry and entry[2] else 0.0
+
+    def count(self, *label_values) -> int:
+        entry = self.values.get(label_values)
+        return entry[2] if entry else 0
+
+    def samples(self):
+        for label_values, (bucket_counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                yield f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}'
+            le = 'le="+Inf"'
+            yield f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} {count}'
+            yield f'{self.name}_sum{_format_labels(self.labels, label_values)} {total}'
+            yield f'{self.name}_count{_format_labels(self.labels, label_values)} {count}'
+
+class Metrics:
+    """
+    In-process registry for every stage of the bot (redirect, scrape, download, upload, stream).
+    Recording is a dict update, cheap enough for hot paths; rendering happens only when
+    /metrics is scraped or the status view is opened.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.instruments: list = []
+        self.runner: web.AppRunner | None = None
+
+        self.stage_seconds = self.add(Histogram('bot_stage_seconds', 'Duration of one stage run', ('stage', 'result')))
+        self.stage_active = self.add(Gauge('bot_stage_active', 'Stage runs currently in progress', ('stage',)))
+        self.bytes_total = self.add(Counter('bot_bytes_total', 'Payload bytes transferred', ('direction',)))
+        self.retries_total = self.add(Counter('bot_retries_total', 'Retried attempts', ('stage',)))
+        self.flood_wait_seconds = self.add(Counter('bot_flood_wait_seconds_total', 'Seconds slept on Telegram FloodWait', ('where',)))
+        self.cache_total = self.add(Counter('bot_cache_requests_total', 'Cache lookups', ('cache', 'result')))
+        self.items_total = self.add(Counter('bot_items_total', 'Videos finished', ('result',)))
+        self.coalesced_total = self.add(Counter('bot_coalesced_total', 'Requests attached to work already in flight', ('stage',)))
+        self.disk_files = self.add(Gauge('bot_disk_files', 'Downloaded files waiting in DOWNLOAD_FOLDER'))
+        self.disk_bytes = self.add(Gauge('bot_disk_bytes', 'Bytes of downloaded files waiting in DOWNLOAD_FOLDER'))
+        self.disk_reserved = self.add(Gauge('bot_disk_reserved_bytes', 'Bytes reserved by downloads in progress'))
+        self.slot_wait_seconds = self.add(Histogram('bot_slot_wait_seconds', 'Time spent waiting for a scheduler slot', ('stage',)))
+        self.slot_waiting = self.add(Gauge('bot_slot_waiting', 'Tasks queued for a scheduler slot', ('stage',)))
+        self.loop_lag = self.add(Histogram(
+            'bot_event_loop_lag_seconds', 'Event loop scheduling delay',
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+        ))
+        self.loop_lag_last = self.add(Gauge('bot_event_loop_lag_last_seconds', 'Most recent event loop lag sample'))
+
+    def add(self, instrument):
+        self.instruments.append(instrument)
+        return instrument
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Observe the duration of the wrapped block under stage, split by ok/error"""
+        self.stage_active.inc(1, stage)
+        start = time.monotonic()
+        result = 'ok'
+        try:
+            yield
+        except BaseException:
+            result = 'error'
+            raise
+        finally:
+            self.stage_active.dec(1, stage)
+            self.stage_seconds.observe(time.monotonic() - start, stage, result)
+
+    def timed(self, stage: str):
+        """Decorator form of time_stage for coroutine functions; a None result counts as an error"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                self.stage_active.inc(1, stage)
+                start = time.monotonic()
+                result = None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    self.stage_active.dec(1, stage)
+                    self.stage_seconds.observe(time.monotonic() - start, stage, 'ok' if result is not None else 'error')
+            return wrapper
+        return decorator
+
+    def file_added(self, size: int):
+        self.disk_files.inc(1)
+        self.disk_bytes.inc(size)
+
+    def file_removed(self, size: int):
+        self.disk_files.dec(1)
+        self.disk_bytes.dec(size)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for instrument in self.instruments:
+            lines.append(f'# HELP {instrument.name} {instrument.help}')
+            lines.append(f'# TYPE {instrument.name} {instrument.kind}')
+            lines.extend(instrument.samples())
+        lines.append(f'bot_uptime_seconds {time.time() - self.started_at:.0f}')
+        return '\n'.join(lines) + '\n'
+
+    async def monitor_loop_lag(self, interval: float = LOOP_LAG_INTERVAL):
+        """Background task: how late the loop wakes up from a sleep is time other callbacks held it"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - start - interval)
+            self.loop_lag.observe(lag)
+            self.loop_lag_last.set(lag)
+
+    async def start_server(self, host: str = METRICS_HOST, port: int = METRICS_PORT) -> web.AppRunner | None:
+        """Serve /metrics and /healthz; METRICS_PORT = 0 disables the endpoint"""
+        if not port:
+            return None
+
+        async def serve_metrics(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type='text/plain', charset='utf-8')
+
+        async def serve_health(request: web.Request) -> web.Response:
+            return web.json_response({'status': 'ok', 'uptime': round(time.time() - self.started_at)})
+
+        app = web.Application()
+        app.router.add_get('/metrics', serve_metrics)
+        app.router.add_get('/healthz', serve_health)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        log.info(f"📈 Metrics endpoint aktif di http://{host}:{port}/metrics")
+        self.runner = runner
+        return runner
+
+    async def stop_server(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+# Shared instance for the whole process
+metrics = Metrics()
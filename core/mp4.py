@@ -0,0 +1,279 @@
+import os
+import struct
+import logging
+from typing import NamedTuple
+
+import aiofiles
+
+from bot.config import MP4_MAX_MOOV_SIZE
+
+log = logging.getLogger(__name__)
+
+# Boxes on the path from moov to the chunk offset tables; everything else is copied verbatim
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+UINT32_MAX = 0xFFFFFFFF
+
+class Mp4Error(Exception):
+    pass
+
+class Box(NamedTuple):
+    type: bytes
+    offset: int  # of the header, relative to the buffer or file it was read from
+    header: int  # 8, or 16 with a 64-bit largesize
+    size: int  # header included
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+class MovieInfo(NamedTuple):
+    duration: float  # seconds
+    width: int
+    height: int
+
+def read_box_header(data: bytes, offset: int, limit: int) -> Box | None:
+    """Box header at offset, None when the header does not fit before limit"""
+    if offset + 8 > limit:
+        return None
+    size, box_type = struct.unpack_from('>I4s', data, offset)
+    header = 8
+    if size == 1:
+        if offset + 16 > limit:
+            return None
+        size = struct.unpack_from('>Q', data, offset + 8)[0]
+        header = 16
+    elif size == 0:
+        # Box runs to the end of the enclosing space
+        size = limit - offset
+    if size < header:
+        raise Mp4Error(f"Box {box_type!r} di offset {offset} rusak (size {size})")
+    return Box(box_type, offset, header, size)
+
+def iter_boxes(data: bytes, start: int = 0, end: int | None = None):
+    """Child boxes of data[start:end]; the last box may extend past end when data is only a head"""
+    end = len(data) if end is None else end
+    offset = start
+    while True:
+        box = read_box_header(data, offset, end)
+        if box is None:
+            return
+        yield box
+        offset = box.end
+
+def read_top_level(path: str) -> list[Box]:
+    """Top-level boxes of a file, reading only their headers"""
+    boxes = []
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        offset = 0
+        while offset < file_size:
+            f.seek(offset)
+            head = f.read(16)
+            box = read_box_header(head, 0, len(head))
+            if box is None:
+                break
+            if box.size == len(head) and struct.unpack_from('>I', head)[0] == 0:
+                box = box._replace(size=file_size - offset)
+            boxes.append(box._replace(offset=offset))
+            offset += box.size
+    return boxes
+
+def find_child(data: bytes, box: Box, box_type: bytes) -> Box | None:
+    for child in iter_boxes(data, box.offset + box.header, box.end):
+        if child.type == box_type:
+            return child
+    return None
+
+def parse_moov(moov: bytes) -> MovieInfo:
+    """Duration from mvhd, dimensions from the tkhd of the first video track"""
+    root = read_box_header(moov, 0, len(moov))
+    mvhd = find_child(moov, root, b'mvhd')
+    if mvhd is None:
+        raise Mp4Error("mvhd tidak ditemukan")
+    body = mvhd.offset + mvhd.header
+    if moov[body] == 1:
+        timescale, duration = struct.unpack_from('>IQ', moov, body + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', moov, body + 12)
+    seconds = duration / timescale if timescale else 0.0
+
+    width = height = 0
+    for trak in iter_boxes(moov, root.offset + root.header, root.end):
+        if trak.type != b'trak':
+            continue
+        mdia = find_child(moov, trak, b'mdia')
+        hdlr = find_child(moov, mdia, b'hdlr') if mdia else None
+        # hdlr: version/flags (4), pre_defined (4), handler_type (4)
+        if hdlr is None or moov[hdlr.offset + hdlr.header + 8:hdlr.offset + hdlr.header + 12] != b'vide':
+            continue
+        tkhd = find_child(moov, trak, b'tkhd')
+        if tkhd is None:
+            continue
+        # width/height are the last two 16.16 fixed-point fields of tkhd
+        width, height = (value >> 16 for value in struct.unpack_from('>II', moov, tkhd.end - 8))
+        break
+
+    return MovieInfo(seconds, width, height)
+
+def write_header(box_type: bytes, payload_size: int) -> bytes:
+    if payload_size + 8 <= UINT32_MAX:
+        return struct.pack('>I4s', payload_size + 8, box_type)
+    return struct.pack('>I4sQ', 1, box_type, payload_size + 16)
+
+def _rewrite(data: bytes, box: Box, shift, use_co64: bool) -> bytes:
+    """Copy box with every stco/co64 entry passed through shift; stco becomes co64 when use_co64"""
+    body = data[box.offset + box.header:box.end]
+
+    if box.type in CONTAINER_BOXES:
+        children = b''.join(_rewrite(data, child, shift, use_co64) for child in iter_boxes(data, box.offset + box.header, box.end))
+        return write_header(box.type, len(children)) + children
+
+    if box.type in (b'stco', b'co64'):
+        version_flags, count = struct.unpack_from('>4sI', body)
+        width = 'I' if box.type == b'stco' else 'Q'
+        offsets = [shift(offset) for offset in struct.unpack_from(f'>{count}{width}', body, 8)]
+        if box.type == b'stco' and not use_co64:
+            if max(offsets, default=0) > UINT32_MAX:
+                raise OverflowError
+            table = struct.pack(f'>4sI{count}I', version_flags, count, *offsets)
+            return write_header(b'stco', len(table)) + table
+        table = struct.pack(f'>4sI{count}Q', version_flags, count, *offsets)
+        return write_header(b'co64', len(table)) + table
+
+    return write_header(box.type, len(body)) + body
+
+class Mp4Layout:
+    """
+    Byte layout to upload for one MP4 file: a list of (bytes) or (file offset, length) pieces.
+    For a file with moov after mdat the pieces put a rewritten moov in front of mdat, so the
+    result is faststart without writing a second copy of the file to disk.
+    """
+
+    def __init__(self, path: str, pieces: list, info: MovieInfo, remuxed: bool):
+        self.path = path
+        self.pieces = pieces
+        self.info = info
+        self.remuxed = remuxed
+        self.size = sum(len(piece) if isinstance(piece, bytes) else piece[1] for piece in pieces)
+
+    def open(self) -> 'SpliceReader':
+        """A fresh reader per upload attempt"""
+        return SpliceReader(self.path, self.pieces, self.size)
+
+class SpliceReader:
+    """Sequential async read(n) over the pieces of an Mp4Layout, as consumed by parallel_upload_file"""
+
+    def __init__(self, path: str, pieces: list, size: int):
+        self.name = os.path.basename(path)
+        self.size = size
+        self._path = path
+        self._pieces = list(pieces)
+        self._file = None
+        self._file_pos = 0
+
+    def seekable(self) -> bool:
+        return False
+
+    async def read(self, n: int = -1) -> bytes:
+        chunks = []
+        wanted = self.size if n < 0 else n
+        while wanted > 0 and self._pieces:
+            piece = self._pieces[0]
+            if isinstance(piece, bytes):
+                chunk = piece[:wanted]
+                rest = piece[len(chunk):]
+                if rest:
+                    self._pieces[0] = rest
+                else:
+                    self._pieces.pop(0)
+            else:
+                offset, length = piece
+                if self._file is None:
+                    self._file = await aiofiles.open(self._path, 'rb')
+                # Pieces are mostly contiguous (the whole mdat); seek only on a jump
+                if offset != self._file_pos:
+                    await self._file.seek(offset)
+                chunk = await self._file.read(min(wanted, length))
+                self._file_pos = offset + len(chunk)
+                if not chunk:
+                    raise Mp4Error(f"{self.name} terpotong di offset {offset}")
+                if len(chunk) < length:
+                    self._pieces[0] = (offset + len(chunk), length - len(chunk))
+                else:
+                    self._pieces.pop(0)
+            chunks.append(chunk)
+            wanted -= len(chunk)
+
+        if not self._pieces and self._file is not None:
+            await self._file.close()
+            self._file = None
+        return b''.join(chunks)
+
+def plan_faststart(path: str) -> Mp4Layout | None:
+    """Layout and movie info for path, None when it is not an MP4 we can read"""
+    try:
+        boxes = read_top_level(path)
+    except (OSError, Mp4Error, struct.error) as e:
+        log.info(f"{os.path.basename(path)} tidak bisa dibaca sebagai MP4: {str(e)}")
+        return None
+
+    types = [box.type for box in boxes]
+    if not boxes or boxes[0].type != b'ftyp' or b'moov' not in types or b'mdat' not in types:
+        return None
+    moov_box = boxes[types.index(b'moov')]
+    if moov_box.size > MP4_MAX_MOOV_SIZE:
+        log.warning(f"moov {os.path.basename(path)} {moov_box.size/1024/1024:.1f}MB, dilewati")
+        return None
+
+    with open(path, 'rb') as f:
+        f.seek(moov_box.offset)
+        moov = f.read(moov_box.size)
+    moov_in_buffer = moov_box._replace(offset=0)
+
+    try:
+        info = parse_moov(moov)
+        if types.index(b'moov') < types.index(b'mdat'):
+            return Mp4Layout(path, [(0, os.path.getsize(path))], info, remuxed=False)
+
+        first_mdat = boxes[types.index(b'mdat')]
+        # Pieces before the first mdat stay; moov goes right before it and leaves its old place
+        pieces = [(0, first_mdat.offset)] if first_mdat.offset else []
+        tail = [(box.offset, box.size) for box in boxes[types.index(b'mdat'):] if box is not moov_box]
+
+        use_co64 = False
+        while True:
+            # Shift depends on the new moov size, which only changes when stco has to become co64
+            new_size = len(_rewrite(moov, moov_in_buffer, lambda offset: offset, use_co64))
+            def shift(offset: int) -> int:
+                return offset + new_size if offset < moov_box.offset else offset + new_size - moov_box.size
+            try:
+                new_moov = _rewrite(moov, moov_in_buffer, shift, use_co64)
+                break
+            except OverflowError:
+                use_co64 = True
+    except (Mp4Error, struct.error, IndexError) as e:
+        log.info(f"moov {os.path.basename(path)} tidak bisa diproses: {str(e)}")
+        return None
+
+    return Mp4Layout(path, pieces + [new_moov] + tail, info, remuxed=True)
+
+def scan_head(head: bytes) -> tuple[str, MovieInfo | None]:
+    """
+    Classify the first bytes of a stream: 'faststart' (moov before mdat, info when all of moov
+    is in head), 'moov_at_end' (mdat first), 'need_more' (moov in front but not complete yet)
+    or 'unknown' (not an MP4 or no moov/mdat header in head).
+    """
+    try:
+        boxes = list(iter_boxes(head))
+        if not boxes or boxes[0].type != b'ftyp':
+            return 'unknown', None
+        for box in boxes:
+            if box.type == b'mdat':
+                return 'moov_at_end', None
+            if box.type == b'moov':
+                if box.end > len(head):
+                    return ('need_more' if box.size <= MP4_MAX_MOOV_SIZE else 'faststart'), None
+                return 'faststart', parse_moov(head[box.offset:box.end])
+    except (Mp4Error, struct.error, IndexError):
+        pass
+    return 'unknown', None
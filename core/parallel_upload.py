@@ -0,0 +1,137 @@
+import os
+import asyncio
+import inspect
+import logging
+import aiofiles
+
+from telethon import TelegramClient, helpers
+from telethon.errors import FloodWaitError
+from telethon.network import MTProtoSender
+from telethon.tl import functions, types
+
+from bot.config import UPLOAD_CONNECTIONS, UPLOAD_PART_SIZE_KB, UPLOAD_PART_RETRIES
+from core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Telegram only accepts SaveBigFilePart (no md5, parts in any order) above this size
+BIG_FILE_THRESHOLD = 10 * 1024 * 1024
+
+class PartUploadError(Exception):
+    pass
+
+async def _create_sender(client: TelegramClient) -> MTProtoSender:
+    """Open an extra MTProto connection to our own DC, reusing the session's auth key"""
+    dc = await client._get_dc(client.session.dc_id)
+    sender = MTProtoSender(client.session.auth_key, loggers=client._log)
+    await sender.connect(client._connection(
+        dc.ip_address,
+        dc.port,
+        dc.id,
+        loggers=client._log,
+        proxy=client._proxy,
+        local_addr=client._local_addr
+    ))
+    return sender
+
+async def _read(source, size: int) -> bytes:
+    data = source.read(size)
+    if inspect.isawaitable(data):
+        data = await data
+    return data
+
+async def parallel_upload_file(client: TelegramClient, file, file_size: int, file_name: str,
+                               progress_callback=None, connections: int = UPLOAD_CONNECTIONS):
+    """
+    Upload file (a path or anything with read(n), e.g. ResponseStream) as SaveBigFilePart requests
+    spread over several MTProto senders, and return the InputFile for client.send_file.
+
+    Parts are read sequentially by one producer and uploaded by one worker per sender; a failed
+    part is retried on its own instead of restarting the whole file.
+    """
+    if file_size <= BIG_FILE_THRESHOLD or connections <= 1:
+        return await client.upload_file(
+            file, file_size=file_size, file_name=file_name,
+            part_size_kb=UPLOAD_PART_SIZE_KB, progress_callback=progress_callback
+        )
+
+    part_size = UPLOAD_PART_SIZE_KB * 1024
+    part_count = (file_size + part_size - 1) // part_size
+    file_id = helpers.generate_random_long()
+
+    senders = []
+    try:
+        senders = await asyncio.gather(*(_create_sender(client) for _ in range(min(connections, part_count))))
+    except Exception as e:
+        log.warning(f"Gagal membuka sender tambahan, upload memakai satu koneksi: {str(e)}")
+        for sender in senders:
+            await sender.disconnect()
+        return await client.upload_file(
+            file, file_size=file_size, file_name=file_name,
+            part_size_kb=UPLOAD_PART_SIZE_KB, progress_callback=progress_callback
+        )
+
+    log.info(f"Parallel upload {file_name}: {part_count} part lewat {len(senders)} sender")
+    queue: asyncio.Queue = asyncio.Queue(maxsize=len(senders) * 2)
+    uploaded = 0
+
+    async def produce():
+        source = await aiofiles.open(file, 'rb') if isinstance(file, str) else file
+        try:
+            for part_index in range(part_count):
+                part = await _read(source, part_size)
+                if len(part) != part_size and part_index < part_count - 1:
+                    raise PartUploadError(f"Part {part_index} terpotong ({len(part)} bytes)")
+                await queue.put((part_index, part))
+        finally:
+            if isinstance(file, str):
+                await source.close()
+            for _ in senders:
+                await queue.put(None)
+
+    async def upload_parts(sender: MTProtoSender):
+        nonlocal uploaded
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            part_index, part = item
+            request = functions.upload.SaveBigFilePartRequest(file_id, part_index, part_count, part)
+
+            for attempt in range(UPLOAD_PART_RETRIES):
+                try:
+                    if await sender.send(request):
+                        break
+                    raise PartUploadError(f"Telegram menolak part {part_index}")
+                except FloodWaitError as e:
+                    log.warning(f"FloodWait part {part_index}: need to wait {e.seconds} seconds")
+                    metrics.flood_wait_seconds.inc(e.seconds + 1, 'upload_part')
+                    await asyncio.sleep(e.seconds + 1)
+                except Exception as e:
+                    if attempt == UPLOAD_PART_RETRIES - 1:
+                        raise PartUploadError(f"Part {part_index} gagal setelah {UPLOAD_PART_RETRIES} percobaan: {str(e)}")
+                    log.warning(f"Part {part_index} attempt {attempt + 1} gagal: {str(e)}")
+                    metrics.retries_total.inc(1, 'upload_part')
+            else:
+                raise PartUploadError(f"Part {part_index} gagal setelah {UPLOAD_PART_RETRIES} percobaan")
+
+            uploaded += len(part)
+            if progress_callback:
+                result = progress_callback(uploaded, file_size)
+                if inspect.isawaitable(result):
+                    await result
+
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(upload_parts(sender)) for sender in senders]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        await asyncio.gather(*(sender.disconnect() for sender in senders), return_exceptions=True)
+
+    if not os.path.splitext(file_name)[1]:
+        file_name += '.mp4'
+    return types.InputFileBig(file_id, part_count, file_name)
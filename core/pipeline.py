@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+from bot.config import PIPELINE_MAX_BYTES, SCRAPE_LOOKAHEAD
+
+log = logging.getLogger(__name__)
+
+_CLOSED = object()
+
+class ByteBoundedQueue:
+    """
+    FIFO hand-off between pipeline stages limited by the total size in bytes of the queued items
+    (for downloaded files: disk space waiting to be uploaded) and by an item count, so items that
+    take no disk (streamed or cached) cannot run arbitrarily far ahead of the consumer.
+    """
+
+    def __init__(self, max_bytes: int, max_items: int):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.queued_bytes = 0
+        self.queued_items = 0
+        self._items: asyncio.Queue = asyncio.Queue()
+        self._room = asyncio.Condition()
+
+    async def wait_for_room(self):
+        """Block the producer before it starts fetching the next item while the budget is used up"""
+        async with self._room:
+            await self._room.wait_for(lambda: self.queued_bytes < self.max_bytes and self.queued_items < self.max_items)
+
+    async def put(self, item, size: int):
+        async with self._room:
+            self.queued_bytes += size
+            self.queued_items += 1
+        await self._items.put((item, size))
+
+    async def close(self):
+        await self._items.put(_CLOSED)
+
+    async def get(self):
+        """Return (item, size), or None once the producer closed the queue"""
+        entry = await self._items.get()
+        return None if entry is _CLOSED else entry
+
+    async def release(self, size: int):
+        """Called by the consumer when an item's bytes are gone (uploaded and cleaned up)"""
+        async with self._room:
+            self.queued_bytes -= size
+            self.queued_items -= 1
+            self._room.notify_all()
+
+async def iterate(items):
+    """Iterate a plain iterable or an async iterable (e.g. a provider yielding items as they are found)"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+async def run_pipeline(items, produce, consume, max_bytes: int = PIPELINE_MAX_BYTES, max_items: int = SCRAPE_LOOKAHEAD):
+    """
+    Two-stage pipeline: produce(item) -> (result, size_bytes) runs ahead of consume(item, result),
+    so item N+1 is being fetched while item N is being delivered. Items are consumed in order.
+    At most max_bytes and max_items (plus the item currently being produced) wait between the stages;
+    the item bound keeps short-lived video_url tokens from being resolved long before their turn.
+    items may be an async iterable, so the first item can be delivered before the last one is known.
+    """
+    queue = ByteBoundedQueue(max_bytes, max_items)
+
+    async def producer():
+        try:
+            async for item in iterate(items):
+                await queue.wait_for_room()
+                result, size = await produce(item)
+                await queue.put((item, result), size)
+        finally:
+            await queue.close()
+
+    async def consumer():
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                return
+            (item, result), size = entry
+            try:
+                await consume(item, result)
+            finally:
+                await queue.release(size)
+
+    tasks = [asyncio.create_task(producer()), asyncio.create_task(consumer())]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,187 @@
+import time
+import asyncio
+import logging
+
+from telethon.errors import FloodWaitError, MessageNotModifiedError
+
+from bot.config import DASHBOARD_EDIT_INTERVAL, DASHBOARD_MAX_LINES
+from core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Item stages, in display order
+STAGE_LABELS = {
+    'scrape': "🔍 Mengambil info",
+    'queued': "⏳ Antri",
+    'download': "📥 Unduh",
+    'upload': "📤 Unggah",
+    'done': "✅ Selesai",
+    'failed': "❌ Gagal",
+}
+
+# Weight of the newest sample in the smoothed speed
+SPEED_SMOOTHING = 0.3
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+class ItemProgress:
+    """
+    One line on the dashboard. Updates only store numbers and set the bus' dirty flag,
+    so they are cheap enough to call for every chunk.
+    """
+
+    def __init__(self, bus: 'ProgressBus', key: str, label: str):
+        self.bus = bus
+        self.key = key
+        self.label = label
+        self.stage = 'queued'
+        self.note = ''
+        self.done = 0
+        self.total = 0
+        self.speed = 0.0
+        self._sample = (time.monotonic(), 0)
+
+    def set_stage(self, stage: str, note: str = ''):
+        self.stage = stage
+        self.note = note
+        self.done = self.total = 0
+        self.speed = 0.0
+        self._sample = (time.monotonic(), 0)
+        self.bus.changed()
+
+    def update(self, done: int, total: int):
+        self.done = done
+        self.total = total
+        self.bus.changed()
+
+    def finish(self, note: str = ''):
+        self.set_stage('done', note)
+
+    def fail(self, note: str = ''):
+        self.set_stage('failed', note)
+
+    def sample_speed(self, now: float):
+        """Smooth bytes/s between two renders"""
+        sample_time, sample_done = self._sample
+        elapsed = now - sample_time
+        if elapsed <= 0:
+            return
+        current = max(0, self.done - sample_done) / elapsed
+        self.speed = current if not self.speed else SPEED_SMOOTHING * current + (1 - SPEED_SMOOTHING) * self.speed
+        self._sample = (now, self.done)
+
+    def render(self) -> str:
+        label = self.label.replace('`', "'")
+        label = label if len(label) <= 32 else label[:31] + "…"
+        line = f"{STAGE_LABELS.get(self.stage, self.stage)} `{label}`"
+        if self.stage in ('download', 'upload') and self.total:
+            line += f" {self.done / self.total * 100:.0f}%"
+            if self.speed:
+                eta = (self.total - self.done) / self.speed
+                line += f" · {self.speed / 1024 / 1024:.1f} MB/s · ETA {format_duration(eta)}"
+        if self.note:
+            line += f" · {self.note}"
+        return line
+
+class ProgressBus:
+    """
+    Collects progress from every item of a batch and edits a single Telegram message with it.
+    Updates are coalesced: the message is edited at most once per interval, only when something
+    changed, and edits pause for as long as Telegram's FloodWait asks.
+    """
+
+    def __init__(self, message, title: str, interval: float = DASHBOARD_EDIT_INTERVAL):
+        self.message = message
+        self.title = title
+        self.interval = interval
+        self.items: dict[str, ItemProgress] = {}
+        self._dirty = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_text = None
+        self._next_edit = 0.0
+
+    def track(self, key: str, label: str, stage: str = 'queued') -> ItemProgress:
+        """Return the line for key, creating it on first use"""
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = ItemProgress(self, key, label)
+        item.label = label
+        item.set_stage(stage)
+        return item
+
+    def remove(self, key: str):
+        if self.items.pop(key, None):
+            self.changed()
+
+    def changed(self):
+        self._dirty.set()
+
+    def render(self) -> str:
+        now = time.monotonic()
+        items = list(self.items.values())
+        for item in items:
+            item.sample_speed(now)
+
+        counts = {stage: 0 for stage in STAGE_LABELS}
+        for item in items:
+            counts[item.stage] = counts.get(item.stage, 0) + 1
+
+        lines = [f"**{self.title}**", ""]
+        # Running items first, then failures, then the rest; long batches are cut to DASHBOARD_MAX_LINES
+        order = {'download': 0, 'upload': 0, 'scrape': 1, 'failed': 2, 'queued': 3, 'done': 4}
+        visible = sorted(items, key=lambda item: order.get(item.stage, 5))
+        lines += [item.render() for item in visible[:DASHBOARD_MAX_LINES]]
+        if len(visible) > DASHBOARD_MAX_LINES:
+            lines.append(f"… dan {len(visible) - DASHBOARD_MAX_LINES} video lainnya")
+
+        lines += ["", " · ".join(f"{STAGE_LABELS[stage]}: {count}" for stage, count in counts.items() if count)]
+        return "\n".join(lines)
+
+    async def flush(self, buttons=None):
+        """Edit the message now if the text changed; waits out FloodWait instead of failing"""
+        text = self.render()
+        if text == self._last_text and buttons is None:
+            return
+        delay = self._next_edit - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await self.message.edit(text, buttons=buttons)
+            self._last_text = text
+        except MessageNotModifiedError:
+            self._last_text = text
+        except FloodWaitError as e:
+            log.warning(f"FloodWait dashboard: need to wait {e.seconds} seconds")
+            metrics.flood_wait_seconds.inc(e.seconds + 1, 'dashboard')
+            self._next_edit = time.monotonic() + e.seconds + 1
+            self._dirty.set()
+        except Exception as e:
+            log.warning(f"Gagal memperbarui dashboard: {str(e)}")
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            await self.flush()
+            await asyncio.sleep(max(self.interval, self._next_edit - time.monotonic()))
+
+    def start(self) -> 'ProgressBus':
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def close(self, buttons=None):
+        """Stop the periodic edits and write the final state"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # A FloodWait during the last edit marks the bus dirty again; retry once after waiting it out
+        for _ in range(2):
+            self._dirty.clear()
+            await self.flush(buttons=buttons)
+            if not self._dirty.is_set():
+                break
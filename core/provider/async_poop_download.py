@@ -0,0 +1,222 @@
+import asyncio
+import aiohttp
+from collections import deque
+
+from bot.config import SCRAPE_CONCURRENCY, SCRAPE_LOOKAHEAD, FOLDER_MAX_PAGES
+from core.http_session import get_session
+from core.metrics import metrics
+from core.provider.mirror_cache import mirror_cache
+from core.provider.metadata_cache import metadata_cache
+from core.singleflight import SingleFlight
+from core.provider.poop_download import (
+    VPLAYER_URL, host_of, parse_folder_file_ids, parse_folder_has_next_page, parse_file_information, parse_thumbnail_and_video_url
+)
+
+#--> dibagi semua instance, jadi total request scraping ke mirror tetap terbatas
+_scrape_semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+#--> user berbeda yang menempel folder yang sama menumpang scraping file yang sedang berjalan
+_scrape_flights = SingleFlight('scrape')
+
+class AsyncPoopDownload():
+
+    #--> konstruktor
+    def __init__(self, session:aiohttp.ClientSession) -> None:
+
+        self.session = session
+
+        self.data_file : list = []
+        self.result    : dict = {
+            'status' : 'failed',
+            'data'   : self.data_file,
+        }
+
+    #--> entry point, pengganti PoopDownload().execute(url) tanpa blocking event loop
+    @classmethod
+    async def resolve(cls, raw_url:str|list) -> dict:
+
+        poop = cls(await get_session())
+        await poop.execute(raw_url)
+        return poop.result
+
+    #--> entry point streaming : yield tiap video begitu selesai di-resolve, tanpa menunggu seluruh folder
+    @classmethod
+    async def stream(cls, raw_url:str|list):
+
+        poop = cls(await get_session())
+        for url in ([raw_url] if type(raw_url) == str else raw_url):
+            async for packed_data in poop.iter_file(url):
+                yield packed_data
+
+    #--> GET lewat semaphore bersama, balikin (url akhir, body)
+    async def fetch(self, url:str, referer:str|None=None, allow_redirects:bool=False) -> tuple[str,bytes]:
+
+        headers = {'referer':referer} if referer else None
+        async with _scrape_semaphore:
+            async with self.session.get(url, headers=headers, allow_redirects=allow_redirects) as response:
+                return str(response.url), await response.read()
+
+    #--> redirect karena domain berubah-ubah, host tidak disimpan di self karena get_file jalan paralel
+    #--> balikin (url akhir, host, dari_cache)
+    async def redirect(self, url:str) -> tuple[str|None,str|None,bool]:
+
+        #--> domain yang sudah pernah di-resolve langsung ditulis ulang, tanpa round trip
+        cached_url = mirror_cache.rewrite(url)
+        if cached_url:
+            metrics.cache_total.inc(1, 'mirror', 'hit')
+            return cached_url, host_of(cached_url), True
+        metrics.cache_total.inc(1, 'mirror', 'miss')
+
+        try:
+            with metrics.time_stage('redirect'):
+                final_url, _ = await self.fetch(url, allow_redirects=True)
+            mirror_cache.record(url, final_url)
+            return final_url, host_of(final_url), False
+        except Exception:
+            return None, None, False
+
+    #--> landing, buat sortir tipe data yang dikirim dari client (str/list)
+    async def execute(self, raw_url:str|list) -> None:
+
+        if type(raw_url) == list:
+            await asyncio.gather(*(self.get_file(i) for i in raw_url))
+        elif type(raw_url) == str:
+            await self.get_file(raw_url)
+
+        if len(self.data_file):
+            self.result['status'] = 'success'
+
+    #--> main method, versi batch : kumpulkan semua hasil iter_file ke data_file
+    async def get_file(self, url:str) -> None:
+
+        async for packed_data in self.iter_file(url):
+            self.data_file.append(packed_data)
+
+    #--> versi streaming dari get_file, yield tiap video begitu siap
+    async def iter_file(self, url:str):
+
+        #--> cek apakah url valid
+        url, host, from_cache = await self.redirect(url)
+        if not host: return
+
+        #--> cek tipe url
+        try:
+            url_type : str = url.split('/')[3].lower()
+            id_item : str = url.split('/')[4]
+        except IndexError: return
+
+        found : int = 0
+        if url_type == 'f': #--> folder
+            async for packed_data in self.iter_multi_file(host, id_item):
+                found += 1
+                yield packed_data
+
+        elif url_type == 'd' or url_type == 'e': #--> file
+            packed_data = await self.get_data_single_file(host, id_item)
+            if packed_data:
+                found = 1
+                yield packed_data
+
+        #--> mirror dari cache tidak menghasilkan apa-apa, paksa redirect ulang di percobaan berikutnya
+        if from_cache and not found:
+            mirror_cache.forget(url.split('/')[2])
+
+    #--> id_file dari semua halaman folder, berhenti kalau tidak ada halaman berikutnya / tidak ada id baru
+    async def iter_folder_file_ids(self, host:str, id_folder:str):
+
+        seen : set = set()
+        for page in range(1, FOLDER_MAX_PAGES + 1):
+
+            url : str = f'{host}f/{id_folder}' if page == 1 else f'{host}f/{id_folder}?page={page}'
+            try:
+                _, content = await self.fetch(url, referer=host)
+                list_id_file = parse_folder_file_ids(content)
+            except Exception:
+                return
+
+            #--> server yang mengabaikan ?page balikin halaman 1 lagi
+            new_id_file = [id_file for id_file in dict.fromkeys(list_id_file) if id_file not in seen]
+            if not new_id_file: return
+            seen.update(new_id_file)
+
+            for id_file in new_id_file:
+                yield id_file
+
+            if not parse_folder_has_next_page(content, page): return
+
+    #--> video dalam folder sesuai urutan halaman, maks SCRAPE_LOOKAHEAD di-resolve di depan yang sedang dipakai
+    async def iter_multi_file(self, host:str, id_folder:str):
+
+        pending : deque = deque()
+        list_id_file = self.iter_folder_file_ids(host, id_folder)
+
+        try:
+            async for id_file in list_id_file:
+                pending.append(asyncio.create_task(self.get_data_single_file(host, id_file)))
+                if len(pending) >= SCRAPE_LOOKAHEAD:
+                    packed_data = await pending.popleft()
+                    if packed_data: yield packed_data
+
+            while pending:
+                packed_data = await pending.popleft()
+                if packed_data: yield packed_data
+
+        finally:
+            #--> konsumen berhenti lebih awal : jangan scraping video yang tidak akan dipakai
+            for task in pending: task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await list_id_file.aclose()
+
+    #--> dapetin data tiap file, satu scraping per id_file walau diminta beberapa job sekaligus
+    async def get_data_single_file(self, host:str, id_file:str) -> dict|None:
+
+        return await _scrape_flights.run(id_file, lambda: self.scrape_single_file(host, id_file))
+
+    #--> halaman info & vplayer diambil bersamaan
+    async def scrape_single_file(self, host:str, id_file:str) -> dict|None:
+
+        #--> cache hit lengkap : tanpa request sama sekali
+        cached = metadata_cache.get(id_file)
+        if cached and cached['video_url']:
+            metrics.cache_total.inc(1, 'metadata', 'hit')
+            return {'id' : id_file, **cached}
+
+        with metrics.time_stage('scrape'):
+            if cached: #--> info file masih valid, cukup ambil ulang vplayer
+                metrics.cache_total.inc(1, 'metadata', 'partial')
+                file_information = cached
+                thumbnail_and_video_url = await self.get_thumbnail_and_video_url(host, id_file)
+            else:
+                metrics.cache_total.inc(1, 'metadata', 'miss')
+                file_information, thumbnail_and_video_url = await asyncio.gather(
+                    self.get_file_information(host, id_file),
+                    self.get_thumbnail_and_video_url(host, id_file),
+                )
+
+        packed_data = {
+            'id' : id_file,
+            **file_information,
+            **thumbnail_and_video_url,
+        }
+
+        if not all(list(packed_data.values())): return None
+        metadata_cache.put(packed_data)
+        return packed_data
+
+    #--> dapetin informasi dari file (ukuran, waktu, dll)
+    async def get_file_information(self, host:str, id_file:str) -> dict[str,str|int]:
+
+        try:
+            _, content = await self.fetch(f'{host}d/{id_file}', referer=host)
+            return parse_file_information(content)
+        except Exception:
+            return parse_file_information('')
+
+    #--> dapetin url gambar & video
+    async def get_thumbnail_and_video_url(self, host:str, id_file:str) -> dict[str,str]:
+
+        try:
+            _, content = await self.fetch(VPLAYER_URL.format(id_file), referer=host)
+            return parse_thumbnail_and_video_url(content.decode('utf-8', errors='replace'))
+        except Exception:
+            return parse_thumbnail_and_video_url('')
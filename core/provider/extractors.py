@@ -0,0 +1,170 @@
+import re, html, logging
+from bs4 import BeautifulSoup as bs
+
+log = logging.getLogger(__name__)
+
+#--> satu jenis data dari halaman : fast path regex dulu, tree parser cuma kalau hasilnya tidak lolos validasi
+class Extractor():
+
+    def __init__(self, name:str, fallback, validate) -> None:
+
+        self.name     = name
+        self.fallback = fallback
+        self.validate = validate
+
+        self.fast_paths : list = []
+        self.stats      : dict = {'fast' : 0, 'fallback' : 0}
+
+    #--> dipakai sebagai decorator, fast path yang didaftarkan belakangan dicoba belakangan
+    def register(self, fast_path):
+
+        self.fast_paths.append(fast_path)
+        return fast_path
+
+    def __call__(self, content:bytes|str):
+
+        text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+
+        for fast_path in self.fast_paths:
+            try:
+                result = fast_path(text)
+                if self.validate(text, result):
+                    self.stats['fast'] += 1
+                    return result
+            except Exception as e:
+                log.debug(f"Fast path {self.name}/{fast_path.__name__} gagal: {str(e)}")
+
+        self.stats['fallback'] += 1
+        return self.fallback(content)
+
+#--> helper fast path
+TAG_RE       = re.compile(r'<[^>]+>')
+DIV_TOKEN_RE = re.compile(r'<(/?)div\b', re.I)
+
+def text_of(fragment:str) -> str:
+
+    #--> padanan .text.strip() dari bs4 : buang tag, decode entity
+    return html.unescape(TAG_RE.sub('', fragment)).strip()
+
+def div_span(text:str, start:int) -> str|None:
+
+    #--> isi <div> yang dibuka di start sampai </div> pasangannya (div bersarang ikut dihitung)
+    depth = 0
+    for token in DIV_TOKEN_RE.finditer(text, start):
+        depth += -1 if token.group(1) else 1
+        if depth == 0:
+            return text[start:token.start()]
+    return None
+
+#--> id file dalam folder (link a.title_video)
+def tree_folder_file_ids(content:bytes|str) -> list[str]:
+
+    response_bs4 = bs(content, 'html.parser')
+
+    #--> fatal : regex url
+    find_a = response_bs4.find_all('a', {'href':True, 'class':'title_video'})
+    return [re.search(r'href="(.*?)"',str(item)).group(1).split('/')[-1] for item in find_a]
+
+#--> atribut diawali spasi, supaya data-href= / data-class= tidak ikut cocok (\b cocok setelah tanda -)
+TITLE_VIDEO_RE = re.compile(r'''\sclass=["'][^"']*\btitle_video\b''')
+TITLE_LINK_RE  = re.compile(r'''<a\s[^>]*?(?<=\s)class=["'][^"']*\btitle_video\b[^>]*>''')
+HREF_RE        = re.compile(r'''(?:^|\s)href=["']([^"']+)["']''')
+
+def validate_folder_file_ids(text:str, result:list[str]) -> bool:
+
+    #--> tiap link title_video di halaman harus menghasilkan satu id
+    return bool(result) and all(result) and len(result) == len(TITLE_VIDEO_RE.findall(text))
+
+FOLDER_FILE_IDS = Extractor('folder_file_ids', tree_folder_file_ids, validate_folder_file_ids)
+
+@FOLDER_FILE_IDS.register
+def regex_folder_file_ids(text:str) -> list[str]:
+
+    return [HREF_RE.search(tag).group(1).split('/')[-1] for tag in TITLE_LINK_RE.findall(text)]
+
+#--> informasi file (div.info : nama, ukuran, durasi, tanggal upload)
+def tree_file_information(content:bytes|str) -> dict[str,str|None]:
+
+    try:
+
+        response_bs4 = bs(content, 'html.parser')
+
+        #--> fatal : regex url
+        find_div = response_bs4.find('div', {'class':'info'})
+        file_name = find_div.find('h4').text.strip()
+        file_size = find_div.find('div', {'class':'size'}).text.strip()
+        file_duration = find_div.find('div', {'class':'length'}).text.strip()
+        file_upload_date = find_div.find('div', {'class':'uploadate'}).text.strip()
+
+    except Exception:
+        file_name, file_size, file_duration, file_upload_date = None, None, None, None
+
+    return({
+        'filename'    : file_name,
+        'size'        : file_size,
+        'duration'    : file_duration,
+        'upload_date' : file_upload_date,
+    })
+
+INFO_DIV_RE = re.compile(r'''<div\s[^>]*\bclass=["']info["'][^>]*>''')
+INFO_FIELD_RE = {
+    'filename'    : re.compile(r'<h4\b[^>]*>(.*?)</h4>', re.S),
+    'size'        : re.compile(r'''<div\s[^>]*\bclass=["']size["'][^>]*>(.*?)</div>''', re.S),
+    'duration'    : re.compile(r'''<div\s[^>]*\bclass=["']length["'][^>]*>(.*?)</div>''', re.S),
+    'upload_date' : re.compile(r'''<div\s[^>]*\bclass=["']uploadate["'][^>]*>(.*?)</div>''', re.S),
+}
+
+def validate_file_information(text:str, result:dict) -> bool:
+
+    return all(result.values())
+
+FILE_INFORMATION = Extractor('file_information', tree_file_information, validate_file_information)
+
+@FILE_INFORMATION.register
+def regex_file_information(text:str) -> dict[str,str|None]:
+
+    info_div = INFO_DIV_RE.search(text)
+    block = div_span(text, info_div.start()) if info_div else None
+    if block is None:
+        return dict.fromkeys(INFO_FIELD_RE)
+
+    result = {}
+    for key, pattern in INFO_FIELD_RE.items():
+        match = pattern.search(block)
+        result[key] = text_of(match.group(1)) if match else None
+    return result
+
+#--> argumen player(...) dari halaman vplayer, pengganti eval : cuma literal string & angka
+PLAYER_RE = re.compile(r'player\((.*?)\);')
+ARG_RE    = re.compile(r"""\s*(?:'([^'\\]*(?:\\.[^'\\]*)*)'|"([^"\\]*(?:\\.[^"\\]*)*)"|([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))\s*(,|\Z)""", re.S)
+ESCAPE_RE = re.compile(r'\\(.)', re.S)
+ESCAPES   = {'n' : '\n', 't' : '\t', 'r' : '\r', '0' : '\0'}
+
+def unescape_literal(value:str) -> str:
+
+    return ESCAPE_RE.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), value) if '\\' in value else value
+
+def parse_player_args(raw:str) -> tuple:
+
+    #--> satu kali jalan dari kiri ke kanan (satu regex per argumen), tanpa compile kode; selain literal -> ValueError
+    args  = []
+    index = 0
+    end   = len(raw)
+
+    while index < end:
+
+        match = ARG_RE.match(raw, index)
+        if not match:
+            #--> argumen kosong atau koma di akhir, sama seperti tuple literal python
+            if raw[index:].isspace():
+                break
+            raise ValueError(f'Token tidak dikenal di posisi {index}: {raw[index:index + 20]!r}')
+
+        single, double, number, _ = match.groups()
+        if number is not None:
+            args.append(float(number) if any(c in number for c in '.eE') else int(number))
+        else:
+            args.append(unescape_literal(single if single is not None else double))
+        index = match.end()
+
+    return tuple(args)
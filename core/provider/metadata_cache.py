@@ -0,0 +1,100 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from bot.config import METADATA_CACHE_PATH, METADATA_CACHE_MAX_ENTRIES, VIDEO_URL_TTL
+
+log = logging.getLogger(__name__)
+
+#--> field yang jarang berubah, disimpan lama dan hanya dibuang lewat LRU
+IMMUTABLE_FIELDS = ('filename', 'size', 'duration', 'upload_date', 'thumbnail_url')
+
+class MetadataCache():
+
+    #--> konstruktor, koneksi sqlite dibuka saat pertama dipakai
+    def __init__(self, path:str=METADATA_CACHE_PATH, max_entries:int=METADATA_CACHE_MAX_ENTRIES, video_url_ttl:float=VIDEO_URL_TTL) -> None:
+
+        self.path = path
+        self.max_entries = max_entries
+        self.video_url_ttl = video_url_ttl
+
+        self._conn : sqlite3.Connection|None = None
+
+        #--> PoopDownload versi sync memanggil cache dari ThreadPoolExecutor
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS file_metadata (
+                    file_id       TEXT PRIMARY KEY,
+                    filename      TEXT,
+                    size          TEXT,
+                    duration      TEXT,
+                    upload_date   TEXT,
+                    thumbnail_url TEXT,
+                    video_url     TEXT,
+                    video_url_at  REAL,
+                    last_access   REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_file_metadata_last_access ON file_metadata (last_access)')
+        return self._conn
+
+    #--> ambil metadata, video_url None kalau sudah lewat ttl (token CDN cepat kadaluarsa)
+    def get(self, id_file:str) -> dict|None:
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    'SELECT filename, size, duration, upload_date, thumbnail_url, video_url, video_url_at '
+                    'FROM file_metadata WHERE file_id = ?', (id_file,)
+                ).fetchone()
+                if row is None: return None
+                conn.execute('UPDATE file_metadata SET last_access = ? WHERE file_id = ?', (time.time(), id_file))
+        except sqlite3.Error as e:
+            log.warning(f"Metadata cache read gagal untuk {id_file}: {str(e)}")
+            return None
+
+        *immutable, video_url, video_url_at = row
+        data = dict(zip(IMMUTABLE_FIELDS, immutable))
+        fresh = video_url_at is not None and time.time() - video_url_at < self.video_url_ttl
+        data['video_url'] = video_url if fresh else None
+        return data
+
+    #--> simpan hasil scraping lengkap, lalu buang entry paling lama tidak dipakai
+    def put(self, packed_data:dict) -> None:
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO file_metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (packed_data['id'], *(packed_data.get(field) for field in IMMUTABLE_FIELDS),
+                     packed_data.get('video_url'), now, now)
+                )
+                conn.execute(
+                    'DELETE FROM file_metadata WHERE file_id IN ('
+                    'SELECT file_id FROM file_metadata ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            log.warning(f"Metadata cache write gagal untuk {packed_data.get('id')}: {str(e)}")
+
+    def close(self) -> None:
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+#--> cache global untuk seluruh proses
+metadata_cache = MetadataCache()
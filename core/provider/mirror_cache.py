@@ -0,0 +1,104 @@
+import time
+import asyncio
+import logging
+import threading
+import aiohttp
+from urllib.parse import urlsplit, urlunsplit
+
+from bot.config import MIRROR_CACHE_TTL, MIRROR_PROBE_INTERVAL, MIRROR_PROBE_TIMEOUT
+from core.http_session import get_session
+
+log = logging.getLogger(__name__)
+
+class MirrorCache():
+
+    #--> konstruktor, map host input -> (scheme mirror aktif, host mirror aktif, waktu kadaluarsa)
+    def __init__(self, ttl:float=MIRROR_CACHE_TTL) -> None:
+
+        self.ttl = ttl
+        self._hosts : dict[str,tuple[str,str,float]] = {}
+
+        #--> PoopDownload versi sync memanggil redirect dari ThreadPoolExecutor
+        self._lock = threading.Lock()
+
+    #--> tulis ulang url ke host mirror aktif tanpa round trip, None kalau belum ada di cache
+    def rewrite(self, url:str) -> str|None:
+
+        parts = urlsplit(url)
+        with self._lock:
+            entry = self._hosts.get(parts.netloc.lower())
+            if not entry: return None
+            resolved_scheme, resolved_host, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._hosts[parts.netloc.lower()]
+                return None
+
+        #--> scheme ikut hasil redirect, mirror tidak selalu https
+        return urlunsplit((resolved_scheme, resolved_host, parts.path, parts.query, parts.fragment))
+
+    #--> simpan hasil redirect, hanya kalau path tidak berubah (cuma domain yang pindah)
+    def record(self, url:str, final_url:str) -> None:
+
+        source, target = urlsplit(url), urlsplit(final_url)
+        if not source.netloc or not target.netloc: return
+        if source.path.rstrip('/') != target.path.rstrip('/'): return
+
+        with self._lock:
+            self._hosts[source.netloc.lower()] = (target.scheme or 'https', target.netloc.lower(), time.monotonic() + self.ttl)
+
+    #--> buang semua entry yang mengarah ke host mirror ini
+    def forget(self, resolved_host:str) -> None:
+
+        resolved_host = resolved_host.lower()
+        with self._lock:
+            for source_host in [h for h, (_, target, _) in self._hosts.items() if target == resolved_host]:
+                del self._hosts[source_host]
+
+    #--> daftar (scheme, host) mirror yang sedang dipakai
+    def known_mirrors(self) -> set[tuple[str,str]]:
+
+        with self._lock:
+            return {(scheme, target) for scheme, target, _ in self._hosts.values()}
+
+    #--> cek satu mirror: masih hidup -> perpanjang ttl, pindah domain -> ikut pindah, mati -> buang
+    async def probe(self, session:aiohttp.ClientSession, mirror_host:str, scheme:str='https') -> None:
+
+        timeout = aiohttp.ClientTimeout(total=MIRROR_PROBE_TIMEOUT)
+        try:
+            async with session.get(f'{scheme}://{mirror_host}/', allow_redirects=False, timeout=timeout) as response:
+                status, location = response.status, response.headers.get('Location', '')
+        except Exception as e:
+            log.warning(f"Mirror {mirror_host} tidak merespon: {str(e)}")
+            self.forget(mirror_host)
+            return
+
+        if status >= 500:
+            log.warning(f"Mirror {mirror_host} error HTTP {status}")
+            self.forget(mirror_host)
+            return
+
+        redirect = urlsplit(location) if 300 <= status < 400 else None
+        new_host = redirect.netloc.lower() if redirect else ''
+        new_scheme = (redirect.scheme if new_host else '') or scheme
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for source_host, (_, target, _) in list(self._hosts.items()):
+                if target == mirror_host:
+                    self._hosts[source_host] = (new_scheme, new_host or mirror_host, expires_at)
+
+        if new_host and new_host != mirror_host:
+            log.info(f"🔀 Mirror {mirror_host} pindah ke {new_host}")
+
+    #--> task background, dijalankan sekali dari initialize_bot
+    async def run_health_probe(self, interval:float=MIRROR_PROBE_INTERVAL) -> None:
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                session = await get_session()
+                await asyncio.gather(*(self.probe(session, host, scheme) for scheme, host in self.known_mirrors()))
+            except Exception as e:
+                log.warning(f"Health probe mirror gagal: {str(e)}")
+
+#--> cache global untuk seluruh proses
+mirror_cache = MirrorCache()
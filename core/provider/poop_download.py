@@ -1,7 +1,59 @@
 import re, json, requests, bs4
-from bs4 import BeautifulSoup as bs
 from concurrent.futures import ThreadPoolExecutor
 
+from core.provider.mirror_cache import mirror_cache
+from core.provider.metadata_cache import metadata_cache
+from core.provider.extractors import FOLDER_FILE_IDS, FILE_INFORMATION, PLAYER_RE, parse_player_args
+
+VPLAYER_URL = 'https://poophd.video-src.com/vplayer?id={}'
+HOST_RE     = re.compile(r'https://(.*?)/')
+
+#--> host mirror dari url akhir redirect, skema ikut url (bukan selalu https)
+def host_of(url:str) -> str:
+
+    scheme, _, netloc = url.split('/')[:3]
+    return f'{scheme}//{netloc}/'
+
+#--> parser dipisah dari request supaya bisa dipakai versi sync & async
+def parse_folder_file_ids(content:bytes|str) -> list[str]:
+
+    #--> fast path regex, bs4 cuma kalau hasilnya tidak lolos validasi
+    return FOLDER_FILE_IDS(content)
+
+def parse_folder_has_next_page(content:bytes|str, page:int) -> bool:
+
+    #--> pagination folder : ada link ke ?page=<page + 1>
+    text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+    return re.search(r'''href=["'][^"']*[?&]page={}["'&]'''.format(page + 1), text) is not None
+
+def parse_file_information(content:bytes|str) -> dict[str,str|int]:
+
+    return FILE_INFORMATION(content)
+
+def parse_thumbnail_and_video_url(text:str) -> dict[str,str]:
+
+    try:
+
+        response_text : str = text.replace('\\','')
+
+        #--> fatal : regex url, argumen di-tokenize (bukan eval) karena isinya dari halaman pihak ketiga
+        raw_match : str = PLAYER_RE.search(response_text).group(1)
+        match : tuple = parse_player_args(raw_match)
+        thumbnail_url, video_url = match[1].replace(' ','%20'), match[-1].replace(' ','%20')
+        try:
+            match_old = HOST_RE.search(thumbnail_url).group(1)
+            match_new = HOST_RE.search(video_url).group(1)
+            thumbnail_url = thumbnail_url.replace(match_old, match_new)
+        except Exception: pass
+
+    except Exception:
+        thumbnail_url, video_url = None, None
+
+    return({
+        'thumbnail_url' : thumbnail_url,
+        'video_url'     : video_url,
+    })
+
 class PoopDownload():
 
     #--> konstruktor
@@ -20,10 +72,18 @@ class PoopDownload():
     #--> redirect karena domain berubah-ubah
     def redirect(self, url:str) -> None:
 
+        #--> domain yang sudah pernah di-resolve langsung ditulis ulang, tanpa round trip
+        cached_url = mirror_cache.rewrite(url)
+        if cached_url:
+            self.url = cached_url
+            self.host = host_of(self.url)
+            return
+
         try:
             response = self.r.get(url, allow_redirects=True)
             self.url = response.url
-            self.host = 'https://{}/'.format(self.url.split('/')[2])
+            self.host = host_of(self.url)
+            mirror_cache.record(url, self.url)
         except Exception:
             pass
 
@@ -65,11 +125,7 @@ class PoopDownload():
 
             url : str = f'{self.host}f/{id_folder}'
             response : object = self.r.get(url, headers={'referer':self.host}, allow_redirects=False)
-            response_bs4 : str = bs(response.content, 'html.parser')
-
-            #--> fatal : regex url
-            find_a = response_bs4.find_all('a', {'href':True, 'class':'title_video'})
-            list_id_file = [re.search(r'href="(.*?)"',str(item)).group(1).split('/')[-1] for item in find_a]
+            list_id_file = parse_folder_file_ids(response.content)
 
             if len(list_id_file):
                 with ThreadPoolExecutor(max_workers=10) as TPE:
@@ -81,67 +137,42 @@ class PoopDownload():
     #--> dapetin data tiap file
     def get_data_single_file(self, id_file:str) -> None:
 
+        #--> cache hit lengkap : tanpa request sama sekali
+        cached = metadata_cache.get(id_file)
+        if cached and cached['video_url']:
+            self.data_file.append({'id' : id_file, **cached})
+            return
+
         packed_data = {
             'id' : id_file,
-            **self.get_file_information(id_file), #--> ambil informasi suatu file (ukuran, waktu, dll)
+            #--> info file (ukuran, waktu, dll) dari cache kalau ada, cuma video_url yang perlu diambil ulang
+            **(cached or self.get_file_information(id_file)),
             **self.get_thumbnail_and_video_url(id_file), #--> ambil url gambar & video
         }
 
         if all(list(packed_data.values())):
+            metadata_cache.put(packed_data)
             self.data_file.append(packed_data)
 
     #--> dapetin informasi dari file (ukuran, waktu, dll)
     def get_file_information(self, id_file:str) -> dict[str,str|int]:
 
         try:
-
             url : str = f'{self.host}d/{id_file}'
             response : object = self.r.get(url, headers={'referer':self.host}, allow_redirects=False)
-            response_bs4 : str = bs(response.content, 'html.parser')
-
-            #--> fatal : regex url
-            find_div = response_bs4.find('div', {'class':'info'})
-            file_name = find_div.find('h4').text.strip()
-            file_size = find_div.find('div', {'class':'size'}).text.strip()
-            file_duration = find_div.find('div', {'class':'length'}).text.strip()
-            file_upload_date = find_div.find('div', {'class':'uploadate'}).text.strip()
-
+            return parse_file_information(response.content)
         except Exception:
-            file_name, file_size, file_duration, file_upload_date = None, None, None, None
-
-        return({
-            'filename'    : file_name,
-            'size'        : file_size,
-            'duration'    : file_duration,
-            'upload_date' : file_upload_date,
-        })
+            return parse_file_information('')
 
     #--> dapetin url gambar & video
     def get_thumbnail_and_video_url(self, id_file:str) -> dict[str,str]:
 
         try:
-
-            url : str = f'https://poophd.video-src.com/vplayer?id={id_file}'
+            url : str = VPLAYER_URL.format(id_file)
             response : object = self.r.get(url, headers={'referer':self.host}, allow_redirects=False)
-            response_text : str = response.text.replace('\\','')
-
-            #--> fatal : regex url
-            raw_match : str = re.search(r'player\((.*?)\);',response_text).group(1)
-            match : tuple =  eval(f'({raw_match})')
-            thumbnail_url, video_url = match[1].replace(' ','%20'), match[-1].replace(' ','%20')
-            try:
-                match_old = re.search(r'https://(.*?)/',thumbnail_url).group(1)
-                match_new = re.search(r'https://(.*?)/',video_url).group(1)
-                thumbnail_url = thumbnail_url.replace(match_old, match_new)
-            except Exception: pass
-
+            return parse_thumbnail_and_video_url(response.text)
         except Exception:
-            thumbnail_url, video_url = None, None
-
-        return({
-            'thumbnail_url' : thumbnail_url,
-            'video_url'     : video_url,
-        })
+            return parse_thumbnail_and_video_url('')
 
 # if __name__ == '__main__':
 
@@ -0,0 +1,156 @@
+import time
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager, AsyncExitStack
+from urllib.parse import urlparse
+
+from bot.config import SCHEDULER_LIMITS
+from core.metrics import metrics, Gauge
+
+log = logging.getLogger(__name__)
+
+# Job lifecycle
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+class Job:
+    """One submitted URL and the task processing it"""
+
+    def __init__(self, job_id: int, user_id: int, chat_id: int, url: str):
+        self.id = job_id
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.url = url
+        self.status = QUEUED
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.task: asyncio.Task | None = None
+
+    async def wait(self):
+        """Wait until the job finishes, whatever the outcome"""
+        if self.task:
+            await asyncio.gather(self.task, return_exceptions=True)
+        return self.result
+
+class JobScheduler:
+    """
+    Central admission control for all bot work.
+
+    Every stage (job, scrape, download, upload) has its own limits, applied globally, per user
+    and per host, so one user pasting many links cannot starve everyone else and total work
+    tracks the configured capacity instead of the number of incoming messages.
+    """
+
+    def __init__(self, limits: dict = SCHEDULER_LIMITS):
+        self.limits = limits
+        self.jobs: dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._semaphores: dict[tuple, asyncio.Semaphore] = {}
+        # Holders + waiters per semaphore; per-user/per-host ones at 0 are dropped by prune()
+        self._users: dict[tuple, int] = {}
+
+    def _semaphore(self, stage: str, scope: str, key) -> asyncio.Semaphore | None:
+        limit = self.limits.get(stage, {}).get(scope)
+        if not limit:
+            return None
+        semaphore = self._semaphores.get((stage, scope, key))
+        if semaphore is None:
+            semaphore = self._semaphores[(stage, scope, key)] = asyncio.Semaphore(limit)
+        return semaphore
+
+    @asynccontextmanager
+    async def _hold(self, key: tuple, semaphore: asyncio.Semaphore):
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[key] -= 1
+
+    @asynccontextmanager
+    async def slot(self, stage: str, user_id: int | None = None, url: str | None = None, job: Job | None = None):
+        """Hold one unit of capacity for stage; acquired global -> user -> host to keep a fixed lock order"""
+        host = urlparse(url).netloc.lower() if url else None
+        async with AsyncExitStack() as stack:
+            metrics.slot_waiting.inc(1, stage)
+            start = time.monotonic()
+            try:
+                for scope, key in (('global', None), ('user', user_id), ('host', host)):
+                    if scope != 'global' and key is None:
+                        continue
+                    semaphore = self._semaphore(stage, scope, key)
+                    if semaphore is not None:
+                        await stack.enter_async_context(self._hold((stage, scope, key), semaphore))
+            finally:
+                metrics.slot_waiting.dec(1, stage)
+                metrics.slot_wait_seconds.observe(time.monotonic() - start, stage)
+            if job:
+                job.stage = stage
+            yield
+
+    def enqueue(self, user_id: int, chat_id: int, url: str, run, job_id: int | None = None) -> Job:
+        """Submit a job; run(job) is the coroutine function doing the actual work, job_id reuses a persisted id"""
+        job = Job(job_id if job_id is not None else next(self._ids), user_id, chat_id, url)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, run))
+        log.info(f"Job #{job.id} masuk antrian untuk user {user_id}: {url}")
+        return job
+
+    async def _run(self, job: Job, run):
+        try:
+            async with self.slot('job', job.user_id, job=job):
+                job.status = RUNNING
+                job.result = await run(job)
+            job.status = DONE if job.result else FAILED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            log.info(f"Job #{job.id} dibatalkan")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            log.error(f"Job #{job.id} gagal: {str(e)}")
+        finally:
+            job.stage = None
+
+    def cancel(self, job_id: int, user_id: int | None = None) -> bool:
+        """Cancel a queued or running job; user_id restricts it to the job's owner"""
+        job = self.jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return False
+        if job.status not in (QUEUED, RUNNING):
+            return False
+        job.task.cancel()
+        return True
+
+    def status(self, user_id: int | None = None, active_only: bool = False) -> list[Job]:
+        """List jobs, optionally only one user's and only unfinished ones"""
+        jobs = [job for job in self.jobs.values() if user_id is None or job.user_id == user_id]
+        if active_only:
+            jobs = [job for job in jobs if job.status in (QUEUED, RUNNING)]
+        return jobs
+
+    def prune(self, max_age: float = 3600):
+        """Forget finished jobs older than max_age seconds, and per-user/per-host limits nobody holds or waits for"""
+        cutoff = time.time() - max_age
+        for job_id in [job.id for job in self.jobs.values() if job.status not in (QUEUED, RUNNING) and job.created_at < cutoff]:
+            del self.jobs[job_id]
+        for key in [key for key in self._semaphores if key[1] != 'global' and not self._users.get(key)]:
+            del self._semaphores[key]
+            self._users.pop(key, None)
+
+# Shared instance for the whole process
+scheduler = JobScheduler()
+
+def _job_counts() -> dict[tuple, int]:
+    counts: dict[tuple, int] = {}
+    for job in scheduler.jobs.values():
+        counts[(job.status,)] = counts.get((job.status,), 0) + 1
+    return counts
+
+metrics.add(Gauge('bot_jobs', 'Jobs known to the scheduler by status', ('status',), fn=_job_counts))
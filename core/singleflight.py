@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+from core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent work on the same key (a provider file id).
+    run() shares one task between every caller that asks while it is running. Work that spans
+    several stages with a result that lives elsewhere (download + upload, media in the media
+    cache) uses lead()/join()/land(): followers only wait until the leader is done.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._flights: dict[str, asyncio.Future] = {}
+        self._owners: dict[str, object] = {}
+
+    def _forget(self, key: str, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            self._owners.pop(key, None)
+
+    async def run(self, key: str, factory):
+        """Result of factory() for key; a caller that is cancelled leaves the shared task running for the others"""
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _task: self._forget(key, task))
+        else:
+            metrics.coalesced_total.inc(1, self.stage)
+        return await asyncio.shield(task)
+
+    def join(self, key: str, owner: object = None) -> asyncio.Future | None:
+        """Flight for key led by another owner, None when there is none to wait for"""
+        flight = self._flights.get(key)
+        if flight is None or self._owners.get(key) is owner:
+            return None
+        metrics.coalesced_total.inc(1, self.stage)
+        return flight
+
+    def lead(self, key: str, owner: object = None):
+        """Mark key as in flight; the owner must land() it on every path"""
+        if key not in self._flights:
+            self._flights[key] = asyncio.get_running_loop().create_future()
+            self._owners[key] = owner
+
+    def land(self, key: str, owner: object = None):
+        """End owner's flight for key and wake its followers"""
+        flight = self._flights.get(key)
+        if flight is None or self._owners.get(key) is not owner:
+            return
+        self._forget(key, flight)
+        flight.set_result(None)
+
+    def __len__(self) -> int:
+        return len(self._flights)
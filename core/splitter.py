@@ -0,0 +1,320 @@
+import os
+import struct
+import logging
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import NamedTuple
+
+from bot.config import MP4_MAX_MOOV_SIZE
+from core.mp4 import (
+    Mp4Error, Mp4Layout, MovieInfo, Box, UINT32_MAX,
+    iter_boxes, read_box_header, read_top_level, find_child, write_header, parse_moov
+)
+
+log = logging.getLogger(__name__)
+
+# Boxes rebuilt per part on the way down to stbl; everything else in moov is copied verbatim
+PART_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf'}
+# Room a part moov may need on top of the source moov (a few extra stsc/stts runs per track)
+MOOV_GROWTH_PER_TRACK = 1024
+
+class Part(NamedTuple):
+    name: str
+    layout: Mp4Layout
+
+def _runs(values: list[int]) -> list[int]:
+    """Flat [count, value, count, value, ...] as stored in stts and ctts"""
+    flat = []
+    for value in values:
+        if flat and flat[-1] == value:
+            flat[-2] += 1
+        else:
+            flat += [1, value]
+    return flat
+
+def _table(box_type: bytes, values: list[int], entry_count: int, version_flags: bytes = bytes(4), width: str = 'I') -> bytes:
+    """Full box of version/flags, entry count and a flat list of values"""
+    payload = struct.pack(f'>4sI{len(values)}{width}', version_flags, entry_count, *values)
+    return write_header(box_type, len(payload)) + payload
+
+def _with_duration(data: bytes, box: Box, v0_at: int, v1_at: int, duration: int) -> bytes:
+    """Copy of an mvhd/tkhd/mdhd box with its duration field replaced"""
+    copy = bytearray(data[box.offset:box.end])
+    if copy[box.header] == 1:
+        struct.pack_into('>Q', copy, box.header + v1_at, duration)
+    else:
+        struct.pack_into('>I', copy, box.header + v0_at, min(duration, UINT32_MAX))
+    return bytes(copy)
+
+def _rebuild(data: bytes, box: Box, replacements: dict[int, bytes]) -> bytes:
+    """Copy box, swapping in replacements by source offset (b'' drops the box)"""
+    if box.offset in replacements:
+        return replacements[box.offset]
+    if box.type not in PART_CONTAINERS:
+        return data[box.offset:box.end]
+    payload = b''.join(_rebuild(data, child, replacements) for child in iter_boxes(data, box.offset + box.header, box.end))
+    return write_header(box.type, len(payload)) + payload
+
+def _body(box: Box | None) -> int:
+    if box is None:
+        raise Mp4Error("Sample table tidak lengkap")
+    return box.offset + box.header
+
+class Track:
+    """Per-sample view of one trak: decode times, sizes, file offsets, chunks and sync samples"""
+
+    def __init__(self, moov: bytes, trak: Box):
+        self.tkhd = find_child(moov, trak, b'tkhd')
+        self.edts = find_child(moov, trak, b'edts')
+        mdia = find_child(moov, trak, b'mdia')
+        self.mdhd = find_child(moov, mdia, b'mdhd') if mdia else None
+        hdlr = find_child(moov, mdia, b'hdlr') if mdia else None
+        minf = find_child(moov, mdia, b'minf') if mdia else None
+        self.stbl = find_child(moov, minf, b'stbl') if minf else None
+        if None in (self.tkhd, self.mdhd, hdlr, self.stbl):
+            raise Mp4Error("trak tidak lengkap")
+
+        self.handler = moov[_body(hdlr) + 8:_body(hdlr) + 12]
+        body = _body(self.mdhd)
+        self.timescale = struct.unpack_from('>I', moov, body + (20 if moov[body] == 1 else 12))[0]
+        if not self.timescale:
+            raise Mp4Error("timescale 0")
+
+        tables = {child.type: child for child in iter_boxes(moov, self.stbl.offset + self.stbl.header, self.stbl.end)}
+        if b'stz2' in tables:
+            raise Mp4Error("stz2 tidak didukung")
+        self.stsd = moov[tables[b'stsd'].offset:tables[b'stsd'].end] if b'stsd' in tables else None
+        if self.stsd is None:
+            raise Mp4Error("stsd tidak ditemukan")
+
+        # stsz: version/flags, uniform size, count, then per-sample sizes when the size is not uniform
+        body = _body(tables.get(b'stsz'))
+        self.uniform_size, self.count = struct.unpack_from('>II', moov, body + 4)
+        self.sizes = list(struct.unpack_from(f'>{self.count}I', moov, body + 12)) if not self.uniform_size else [self.uniform_size] * self.count
+        self.prefix_size = list(accumulate(self.sizes, initial=0))
+
+        body = _body(tables.get(b'stts'))
+        entries = struct.unpack_from(f'>{struct.unpack_from(">I", moov, body + 4)[0] * 2}I', moov, body + 8)
+        self.durations = [delta for count, delta in zip(entries[::2], entries[1::2]) for _ in range(count)]
+        self.dts = list(accumulate(self.durations, initial=0))
+
+        self.ctts = None
+        if b'ctts' in tables:
+            body = _body(tables[b'ctts'])
+            self.ctts_version = moov[body:body + 4]
+            entries = struct.unpack_from(f'>{struct.unpack_from(">I", moov, body + 4)[0] * 2}I', moov, body + 8)
+            self.ctts = [offset for count, offset in zip(entries[::2], entries[1::2]) for _ in range(count)]
+
+        # No stss means every sample is a sync sample
+        self.sync = None
+        if b'stss' in tables:
+            body = _body(tables[b'stss'])
+            count = struct.unpack_from('>I', moov, body + 4)[0]
+            self.sync = [number - 1 for number in struct.unpack_from(f'>{count}I', moov, body + 8)]
+
+        chunk_box = tables.get(b'stco') or tables.get(b'co64')
+        body = _body(chunk_box)
+        count = struct.unpack_from('>I', moov, body + 4)[0]
+        chunk_offsets = struct.unpack_from(f'>{count}{"I" if chunk_box.type == b"stco" else "Q"}', moov, body + 8)
+
+        body = _body(tables.get(b'stsc'))
+        count = struct.unpack_from('>I', moov, body + 4)[0]
+        stsc = [struct.unpack_from('>III', moov, body + 8 + index * 12) for index in range(count)]
+
+        # Absolute file offset and source chunk of every sample
+        self.offsets = []
+        self.chunk_of = []
+        self.descriptions = [1] * len(chunk_offsets)
+        for index, (first_chunk, per_chunk, description) in enumerate(stsc):
+            last_chunk = stsc[index + 1][0] - 1 if index + 1 < len(stsc) else len(chunk_offsets)
+            for chunk in range(first_chunk - 1, last_chunk):
+                self.descriptions[chunk] = description
+                position = chunk_offsets[chunk]
+                for _ in range(per_chunk):
+                    self.offsets.append(position)
+                    self.chunk_of.append(chunk)
+                    position += self.sizes[len(self.offsets) - 1]
+
+        if not (len(self.offsets) == len(self.durations) == self.count) or (self.ctts is not None and len(self.ctts) != self.count):
+            raise Mp4Error(f"Jumlah sample tidak konsisten ({len(self.offsets)}/{len(self.durations)}/{self.count})")
+
+    def sync_samples(self) -> list[int]:
+        """Sample indices a part may start at"""
+        samples = self.sync if self.sync is not None else list(range(self.count))
+        return samples if samples and samples[0] == 0 else [0] + samples
+
+    def sample_at(self, ticks: int, timescale: int) -> int:
+        """First sample decoded at or after ticks (in another track's timescale)"""
+        threshold = -(-ticks * self.timescale // timescale)
+        return bisect_left(self.dts, threshold, 0, self.count)
+
+    def chunk_runs(self, start: int, end: int) -> list[list[int]]:
+        """[file offset, length, samples, sample description] for each source chunk (or piece of one) in start:end"""
+        runs = []
+        for index in range(start, end):
+            if index > start and self.chunk_of[index] == self.chunk_of[index - 1]:
+                runs[-1][1] += self.sizes[index]
+                runs[-1][2] += 1
+            else:
+                runs.append([self.offsets[index], self.sizes[index], 1, self.descriptions[self.chunk_of[index]]])
+        return runs
+
+    def build_stbl(self, start: int, end: int, runs: list[list[int]], chunk_offsets: list[int]) -> bytes:
+        """stbl for samples start:end laid out as runs at chunk_offsets"""
+        tables = [self.stsd]
+
+        flat = _runs(self.durations[start:end])
+        tables.append(_table(b'stts', flat, len(flat) // 2))
+        if self.ctts is not None:
+            flat = _runs(self.ctts[start:end])
+            tables.append(_table(b'ctts', flat, len(flat) // 2, version_flags=self.ctts_version))
+        if self.sync is not None:
+            numbers = [index - start + 1 for index in self.sync[bisect_left(self.sync, start):bisect_left(self.sync, end)]]
+            tables.append(_table(b'stss', numbers, len(numbers)))
+
+        # stsz has two counts (uniform size, sample count) before its entries
+        if self.uniform_size:
+            tables.append(_table(b'stsz', [end - start], self.uniform_size))
+        else:
+            tables.append(_table(b'stsz', [end - start] + self.sizes[start:end], 0))
+
+        stsc = []
+        for chunk, (_, _, samples, description) in enumerate(runs, start=1):
+            if not stsc or stsc[-2:] != [samples, description]:
+                stsc += [chunk, samples, description]
+        tables.append(_table(b'stsc', stsc, len(stsc) // 3))
+        tables.append(_table(b'stco', chunk_offsets, len(chunk_offsets)))
+
+        payload = b''.join(tables)
+        return write_header(b'stbl', len(payload)) + payload
+
+class KeyframeSplit:
+    """
+    Cut plan for an MP4 at sync samples of its video track. Every part is a complete
+    faststart file (ftyp, moov with its own sample tables, mdat) whose media bytes are
+    read from the source file, so parts are never written to disk.
+    Edit lists are dropped per part, so each part starts playing at its first keyframe.
+    """
+    mode = 'keyframe'
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+
+        boxes = read_top_level(path)
+        types = [box.type for box in boxes]
+        if not boxes or boxes[0].type != b'ftyp' or b'moov' not in types or b'mdat' not in types:
+            raise Mp4Error("bukan MP4 dengan moov dan mdat")
+        if b'moof' in types:
+            raise Mp4Error("MP4 fragmented tidak didukung")
+        moov_box = boxes[types.index(b'moov')]
+        if moov_box.size > MP4_MAX_MOOV_SIZE:
+            raise Mp4Error(f"moov {moov_box.size/1024/1024:.1f}MB terlalu besar")
+
+        with open(path, 'rb') as f:
+            self.ftyp = f.read(boxes[0].size)
+            f.seek(moov_box.offset)
+            self.moov = f.read(moov_box.size)
+        self.root = read_box_header(self.moov, 0, len(self.moov))
+        if find_child(self.moov, self.root, b'mvex'):
+            raise Mp4Error("MP4 fragmented tidak didukung")
+
+        self.mvhd = find_child(self.moov, self.root, b'mvhd')
+        body = _body(self.mvhd)
+        self.timescale = struct.unpack_from('>I', self.moov, body + (20 if self.moov[body] == 1 else 12))[0]
+        self.info = parse_moov(self.moov)
+
+        self.tracks = [Track(self.moov, trak) for trak in iter_boxes(self.moov, self.root.offset + self.root.header, self.root.end) if trak.type == b'trak']
+        if not self.tracks:
+            raise Mp4Error("tidak ada trak")
+
+        # Cuts follow the video track's keyframes; the other tracks are cut at the same instant
+        self.lead = next((track for track in self.tracks if track.handler == b'vide' and track.count), self.tracks[0])
+        candidates = self.lead.sync_samples() + [self.lead.count]
+        self.bounds = []
+        for track in self.tracks:
+            bounds = [track.sample_at(self.lead.dts[sample], self.lead.timescale) for sample in candidates[:-1]] + [track.count]
+            self.bounds.append(bounds)
+        totals = [sum(track.prefix_size[bounds[index]] for track, bounds in zip(self.tracks, self.bounds)) for index in range(len(candidates))]
+
+        # A part moov is never larger than the source moov plus a few runs per track
+        budget = max_size - len(self.ftyp) - len(self.moov) - 8 - MOOV_GROWTH_PER_TRACK * len(self.tracks)
+        if budget <= 0:
+            raise Mp4Error("moov lebih besar dari ukuran bagian")
+        self.cuts = [0]
+        while self.cuts[-1] < len(candidates) - 1:
+            start = self.cuts[-1]
+            end = bisect_right(totals, totals[start] + budget) - 1
+            if end <= start:
+                raise Mp4Error(f"Jarak antar keyframe lebih besar dari {max_size/1024/1024:.0f}MB")
+            self.cuts.append(end)
+        self.count = len(self.cuts) - 1
+
+    def part(self, index: int) -> Part:
+        """Layout of part index (0-based); built on demand so only one part moov is in memory"""
+        first, last = self.cuts[index], self.cuts[index + 1]
+        ranges = [(bounds[first], bounds[last]) for bounds in self.bounds]
+        runs = [track.chunk_runs(start, end) for track, (start, end) in zip(self.tracks, ranges)]
+
+        # Media bytes keep their source order (interleaving), merged into as few reads as possible
+        positions = [[0] * len(track_runs) for track_runs in runs]
+        pieces = []
+        data_size = 0
+        for offset, length, track_index, run_index in sorted(
+            (run[0], run[1], track_index, run_index)
+            for track_index, track_runs in enumerate(runs) for run_index, run in enumerate(track_runs)
+        ):
+            positions[track_index][run_index] = data_size
+            data_size += length
+            if pieces and pieces[-1][0] + pieces[-1][1] == offset:
+                pieces[-1] = (pieces[-1][0], pieces[-1][1] + length)
+            else:
+                pieces.append((offset, length))
+
+        durations = [track.dts[end] - track.dts[start] for track, (start, end) in zip(self.tracks, ranges)]
+        movie_duration = max(duration * self.timescale // track.timescale for track, duration in zip(self.tracks, durations))
+
+        def build_moov(data_start: int) -> bytes:
+            replacements = {self.mvhd.offset: _with_duration(self.moov, self.mvhd, 16, 24, movie_duration)}
+            for track, (start, end), track_runs, track_positions, duration in zip(self.tracks, ranges, runs, positions, durations):
+                replacements[track.tkhd.offset] = _with_duration(self.moov, track.tkhd, 20, 28, duration * self.timescale // track.timescale)
+                replacements[track.mdhd.offset] = _with_duration(self.moov, track.mdhd, 16, 24, duration)
+                if track.edts:
+                    replacements[track.edts.offset] = b''
+                replacements[track.stbl.offset] = track.build_stbl(start, end, track_runs, [data_start + position for position in track_positions])
+            return _rebuild(self.moov, self.root, replacements)
+
+        # stco entries are fixed-width, so the moov size does not depend on the offsets in it
+        data_start = len(self.ftyp) + len(build_moov(0)) + 8
+        if data_start + data_size > min(self.max_size, UINT32_MAX):
+            raise Mp4Error(f"Bagian {index + 1} melebihi {self.max_size} bytes")
+        moov = build_moov(data_start)
+
+        lead_start, lead_end = ranges[self.tracks.index(self.lead)]
+        info = MovieInfo((self.lead.dts[lead_end] - self.lead.dts[lead_start]) / self.lead.timescale, self.info.width, self.info.height)
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        layout = Mp4Layout(self.path, [self.ftyp, moov, write_header(b'mdat', data_size)] + pieces, info, remuxed=True)
+        return Part(f"{stem}.part{index + 1:02d}{ext}", layout)
+
+class ByteSplit:
+    """Fallback: consecutive byte ranges, rejoined with cat/copy /b after download"""
+    mode = 'bytes'
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.file_size = os.path.getsize(path)
+        self.count = max(1, -(-self.file_size // max_size))
+
+    def part(self, index: int) -> Part:
+        offset = index * self.max_size
+        layout = Mp4Layout(self.path, [(offset, min(self.max_size, self.file_size - offset))], None, remuxed=False)
+        return Part(f"{os.path.basename(self.path)}.{index + 1:03d}", layout)
+
+def plan_split(path: str, max_size: int) -> KeyframeSplit | ByteSplit:
+    """Keyframe cut plan for MP4 files we can read, byte ranges for everything else"""
+    try:
+        return KeyframeSplit(path, max_size)
+    except (Mp4Error, struct.error, IndexError, KeyError) as e:
+        log.info(f"{os.path.basename(path)} dipotong per byte: {str(e)}")
+        return ByteSplit(path, max_size)
@@ -0,0 +1,212 @@
+import os
+import re
+import time
+import shutil
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from bot.config import (
+    DOWNLOAD_FOLDER, STORAGE_QUOTA, STORAGE_MIN_FREE, STORAGE_POLL_INTERVAL, STORAGE_SWEEP_INTERVAL, ORPHAN_MIN_AGE
+)
+from core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+SIZE_RE = re.compile(r'([\d.,]+)\s*([KMGT]?i?B)\b', re.I)
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+
+# Sidecar suffixes of a download: <key>.tmp, <key>.tmp.journal and the journal's atomic-write <...>.new
+TEMP_SUFFIXES = ('.new', '.journal')
+# Private temp name of a second download of the same key in one process: <key>~<pid>-<n>.tmp
+PRIVATE_TEMP_RE = re.compile(r'~\d+-\d+\.tmp$')
+
+def parse_size(text: str | None) -> int:
+    """Bytes from a size label on the file page such as '245.7 MB'; 0 when it cannot be read"""
+    match = SIZE_RE.search(text or '')
+    if not match:
+        return 0
+    unit = match.group(2).upper().replace('I', '')
+    try:
+        return int(float(match.group(1).replace(',', '')) * SIZE_UNITS[unit])
+    except (ValueError, KeyError):
+        return 0
+
+def temp_base(filename: str) -> str:
+    """The .tmp name a sidecar file belongs to"""
+    for suffix in TEMP_SUFFIXES:
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    return filename
+
+class StorageError(Exception):
+    pass
+
+class Reservation:
+    """Bytes set aside for one download until it is either on disk or abandoned"""
+
+    def __init__(self, manager: 'StorageManager', key: str, size: int):
+        self.manager = manager
+        self.key = key
+        self.size = size
+        # Final path of the download when known up front; reserve_filepath may still add _1, _2, ...
+        self.target: str | None = None
+
+    def resize(self, size: int):
+        """Switch the estimate to the real Content-Length; raises StorageError when it can never fit"""
+        extra = size - self.size
+        if size > self.manager.quota:
+            raise StorageError(f"File {size/1024/1024:.1f}MB melebihi kuota penyimpanan {self.manager.quota/1024/1024:.0f}MB")
+        if extra > 0 and extra > self.manager.disk_free():
+            raise StorageError(f"Ruang disk tidak cukup untuk {size/1024/1024:.1f}MB")
+        self.size = size
+        self.manager.changed()
+
+    def owns(self, filepath: str) -> bool:
+        """filepath is this download's finished file, possibly renamed into place before file_added()"""
+        if not self.target:
+            return False
+        target_stem, target_ext = os.path.splitext(self.target)
+        stem, ext = os.path.splitext(filepath)
+        return ext == target_ext and (stem == target_stem or re.fullmatch(re.escape(target_stem) + r'_\d+', stem) is not None)
+
+class StorageManager:
+    """
+    Keeps DOWNLOAD_FOLDER within STORAGE_QUOTA without scanning it: finished files and in-flight
+    reservations are running totals. Downloads reserve their size before the first byte, new jobs
+    are held while free space is below STORAGE_MIN_FREE, and a background sweep removes temp
+    files no job owns any more.
+    """
+
+    def __init__(self, folder: str = DOWNLOAD_FOLDER, quota: int = STORAGE_QUOTA, min_free: int = STORAGE_MIN_FREE):
+        self.folder = folder
+        self.quota = quota
+        self.min_free = min_free
+        self.files: dict[str, int] = {}
+        self.used = 0
+        self.reservations: set[Reservation] = set()
+        self._changed = asyncio.Event()
+
+    @property
+    def reserved(self) -> int:
+        return sum(reservation.size for reservation in self.reservations)
+
+    def disk_free(self) -> int:
+        os.makedirs(self.folder, exist_ok=True)
+        return shutil.disk_usage(self.folder).free
+
+    def fits(self, size: int) -> bool:
+        if self.used + self.reserved + size > self.quota:
+            return False
+        return self.disk_free() - size >= self.min_free
+
+    def changed(self):
+        metrics.disk_reserved.set(self.reserved)
+        self._changed.set()
+
+    async def _wait_until_fits(self, size: int, on_wait=None):
+        """
+        Block until size fits; released space wakes waiters early, external free space is polled.
+        Raises StorageError for a download that cannot fit even though nothing here holds disk any more.
+        """
+        while not self.fits(size):
+            if size and not self.used and not self.reserved:
+                raise StorageError(
+                    f"Ruang disk tidak cukup untuk {size/1024/1024:.1f}MB "
+                    f"(kosong {self.disk_free()/1024/1024/1024:.1f}GB, minimal sisa {self.min_free/1024/1024/1024:.1f}GB)"
+                )
+            if on_wait:
+                on_wait()
+                on_wait = None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), STORAGE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def admit(self, on_wait=None):
+        """Hold a new job while the quota is used up or free space is below STORAGE_MIN_FREE"""
+        await self._wait_until_fits(0, on_wait)
+
+    @asynccontextmanager
+    async def reserve(self, key: str, size: int, on_wait=None):
+        """Set size bytes aside for the download of key (a file id, its temp file is <key>.tmp)"""
+        if size > self.quota:
+            raise StorageError(f"File {size/1024/1024:.1f}MB melebihi kuota penyimpanan {self.quota/1024/1024:.0f}MB")
+        await self._wait_until_fits(size, on_wait)
+        reservation = Reservation(self, key, size)
+        self.reservations.add(reservation)
+        self.changed()
+        try:
+            yield reservation
+        finally:
+            self.reservations.discard(reservation)
+            self.changed()
+
+    def file_added(self, filepath: str):
+        """A finished download now occupies disk until discarded"""
+        size = os.path.getsize(filepath)
+        self.used += size - self.files.get(filepath, 0)
+        if filepath not in self.files:
+            metrics.file_added(size)
+        self.files[filepath] = size
+        self.changed()
+
+    def file_removed(self, filepath: str):
+        size = self.files.pop(filepath, None)
+        if size is None:
+            return
+        self.used -= size
+        metrics.file_removed(size)
+        self.changed()
+
+    def sweep(self, protected: set[str] = frozenset(), min_age: float = ORPHAN_MIN_AGE, temp_only: bool = True) -> tuple[int, int]:
+        """
+        Delete files in the folder that nothing owns: not a tracked download (or its thumbnail),
+        not the temp file or target path of a live reservation, not in protected (paths or file names).
+        Returns (files removed, bytes freed).
+        """
+        active_temps = {f"{reservation.key}.tmp" for reservation in self.reservations}
+        tracked_stems = {os.path.splitext(filepath)[0] for filepath in self.files}
+        now = time.time()
+        removed, freed = 0, 0
+
+        os.makedirs(self.folder, exist_ok=True)
+        for filename in os.listdir(self.folder):
+            filepath = os.path.join(self.folder, filename)
+            base_name = temp_base(filename)
+            if temp_only and not base_name.endswith('.tmp'):
+                continue
+            if PRIVATE_TEMP_RE.sub('.tmp', base_name) in active_temps or filepath in protected or base_name in protected:
+                continue
+            if os.path.splitext(filepath)[0] in tracked_stems:
+                continue
+            if any(reservation.owns(filepath) for reservation in self.reservations):
+                continue
+            try:
+                stat = os.stat(filepath)
+                if not os.path.isfile(filepath) or now - stat.st_mtime < min_age:
+                    continue
+                os.remove(filepath)
+            except OSError as e:
+                log.warning(f"Gagal menghapus file yatim {filepath}: {str(e)}")
+                continue
+            removed += 1
+            freed += stat.st_size
+
+        if removed:
+            log.warning(f"🧹 {removed} file yatim dihapus ({freed/1024/1024:.1f}MB)")
+            self.changed()
+        return removed, freed
+
+    async def run_sweeper(self, protected_fn, interval: float = STORAGE_SWEEP_INTERVAL):
+        """Background task: protected_fn() returns what unfinished jobs may still resume"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sweep(protected_fn())
+            except Exception as e:
+                log.warning(f"Sweep file yatim gagal: {str(e)}")
+
+# Shared instance for the whole process
+storage = StorageManager()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import aiohttp
+
+from bot.config import CHUNK_SIZE
+
+log = logging.getLogger(__name__)
+
+_EOF = object()
+
+class ResponseStream:
+    """
+    Read-only file-like view over an aiohttp response body, consumed by Telethon's upload_file.
+
+    A producer task keeps reading the response into a bounded queue of part-sized blocks,
+    so the download keeps running while a part is being sent to Telegram, and total time
+    approaches max(download, upload) instead of their sum. The bounded queue caps memory
+    at roughly max_parts * part_size. A hasher, when given, sees every byte in order.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, name: str, size: int, part_size: int, max_parts: int, hasher=None):
+        self.name = name
+        self.size = size
+        self._response = response
+        self._part_size = part_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_parts)
+        self._buffer = bytearray()
+        self._eof = False
+        self._producer: asyncio.Task | None = None
+        self._hasher = hasher
+        self.downloaded = 0
+
+    async def __aenter__(self):
+        self._producer = asyncio.create_task(self._produce())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._producer and not self._producer.done():
+            self._producer.cancel()
+            try:
+                await self._producer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _produce(self):
+        pending = bytearray()
+        try:
+            async for chunk in self._response.content.iter_chunked(CHUNK_SIZE):
+                pending += chunk
+                self.downloaded += len(chunk)
+                if self._hasher:
+                    self._hasher.update(chunk)
+                while len(pending) >= self._part_size:
+                    await self._queue.put(bytes(pending[:self._part_size]))
+                    del pending[:self._part_size]
+            if pending:
+                await self._queue.put(bytes(pending))
+            await self._queue.put(_EOF)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Hand the failure to the consumer so the upload aborts instead of hanging
+            await self._queue.put(e)
+
+    def seekable(self) -> bool:
+        return False
+
+    async def _fill(self, n: int):
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            item = await self._queue.get()
+            if item is _EOF:
+                self._eof = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                self._buffer += item
+
+    async def peek(self, n: int) -> bytes:
+        """First n bytes (fewer at EOF) without consuming them; they stay buffered for read()"""
+        await self._fill(n)
+        return bytes(self._buffer[:n])
+
+    async def read(self, n: int = -1) -> bytes:
+        await self._fill(n)
+
+        if n < 0:
+            n = len(self._buffer)
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
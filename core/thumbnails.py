@@ -0,0 +1,129 @@
+import struct
+import asyncio
+import logging
+from collections import OrderedDict
+
+import aiohttp
+
+from bot.config import THUMB_CACHE_MAX_BYTES, THUMB_MAX_SIZE, THUMB_MAX_DIMENSION, THUMB_TIMEOUT
+from core.http_session import get_session
+from core.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+JPEG_MAGIC = b'\xff\xd8\xff'
+# Start-of-frame markers (baseline, progressive, ...); C4, C8 and CC share the range but are not frames
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def jpeg_dimensions(data: bytes) -> tuple[int, int] | None:
+    """(width, height) from the first start-of-frame segment, None when the JPEG cannot be read"""
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1  # fill byte
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            position += 2  # segments without a length
+            continue
+        length = struct.unpack_from('>H', data, position + 2)[0]
+        if marker in JPEG_SOF_MARKERS:
+            if position + 9 > len(data):
+                return None
+            height, width = struct.unpack_from('>HH', data, position + 5)
+            return width, height
+        if marker == 0xDA:
+            return None  # image data started without a frame header
+        position += 2 + length
+    return None
+
+class ThumbnailCache:
+    """
+    In-memory LRU of JPEG thumbnails by provider file id, bounded by total bytes.
+    Thumbnails are fetched in the background while the video downloads and handed to
+    send_file as bytes, so they never touch disk and never delay the upload.
+    """
+
+    def __init__(self, max_bytes: int = THUMB_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def get(self, file_id: str) -> bytes | None:
+        data = self._entries.get(file_id)
+        if data is not None:
+            self._entries.move_to_end(file_id)
+        return data
+
+    def put(self, file_id: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        old = self._entries.pop(file_id, None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[file_id] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def prefetch(self, file_id: str, url: str | None) -> asyncio.Task | None:
+        """Start (or join) the fetch for file_id; the task resolves to the JPEG bytes or None"""
+        if not url:
+            return None
+        task = self._inflight.get(file_id)
+        if task is None:
+            task = self._inflight[file_id] = asyncio.create_task(self._fetch(file_id, url))
+            task.add_done_callback(lambda _task: self._inflight.pop(file_id, None))
+        return task
+
+    async def _fetch(self, file_id: str, url: str) -> bytes | None:
+        cached = self.get(file_id)
+        metrics.cache_total.inc(1, 'thumbnail', 'hit' if cached is not None else 'miss')
+        if cached is not None:
+            return cached
+
+        try:
+            session = await get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=THUMB_TIMEOUT)) as resp:
+                if resp.status != 200 or int(resp.headers.get('Content-Length', 0)) > THUMB_MAX_SIZE:
+                    log.info(f"Thumbnail {file_id} dilewati (HTTP {resp.status}, {resp.headers.get('Content-Length')} bytes)")
+                    return None
+                # Content-Length may be missing; anything larger than Telegram accepts is dropped
+                data = b''
+                async for chunk in resp.content.iter_chunked(16 * 1024):
+                    data += chunk
+                    if len(data) > THUMB_MAX_SIZE:
+                        return None
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            log.info(f"Thumbnail {file_id} gagal diambil: {str(e)}")
+            return None
+
+        # Telegram only uses JPEG thumbnails for documents, and ignores them above 320px on either side
+        if not data.startswith(JPEG_MAGIC):
+            log.info(f"Thumbnail {file_id} bukan JPEG, dilewati")
+            metrics.cache_total.inc(1, 'thumbnail', 'skipped')
+            return None
+        dimensions = jpeg_dimensions(data)
+        if dimensions is None or max(dimensions) > THUMB_MAX_DIMENSION:
+            log.info(f"Thumbnail {file_id} dilewati: ukuran {dimensions or 'tidak terbaca'}, maksimal {THUMB_MAX_DIMENSION}px")
+            metrics.cache_total.inc(1, 'thumbnail', 'skipped')
+            return None
+        self.put(file_id, data)
+        return data
+
+async def resolve_thumbnail(thumb: asyncio.Task | None) -> bytes | None:
+    """Result of a prefetch task, None when there is none or it failed"""
+    if thumb is None:
+        return None
+    try:
+        return await asyncio.shield(thumb)
+    except Exception as e:
+        log.info(f"Thumbnail tidak tersedia: {str(e)}")
+        return None
+
+# Shared instance for the whole process
+thumbnail_cache = ThumbnailCache()
@@ -1,19 +1,45 @@
 import os
 import asyncio
+import itertools
 import aiohttp
 import aiofiles
 import logging
-import time
 
-from telethon import TelegramClient
-from telethon.errors import FloodWaitError, FilePartMissingError
+from telethon import TelegramClient, types
+from telethon.errors import FloodWaitError, FilePartMissingError, FileReferenceExpiredError, MediaEmptyError
+from telethon.tl.custom import Message
 
-from bot.config import MAX_RETRIES, RETRY_DELAY, CHUNK_SIZE, MAX_FILE_SIZE, DOWNLOAD_FOLDER
+from bot.config import (
+    MAX_RETRIES, RETRY_DELAY, MAX_FILE_SIZE, DOWNLOAD_FOLDER, DOWNLOAD_TIMEOUT,
+    UPLOAD_PART_SIZE_KB, STREAM_BUFFER_PARTS, MP4_FASTSTART, MP4_HEAD_PEEK, MP4_MAX_MOOV_SIZE,
+    SPLIT_LARGE_FILES, SPLIT_PART_SIZE, MAX_SPLIT_SOURCE_SIZE, DEDUP_ENABLED
+)
 from utils.helpers import sanitize_filename, cleanup_temp_file
-from core.provider.poop_download import PoopDownload # Import PoopDownload
+from core.provider.async_poop_download import AsyncPoopDownload
+from core.media_cache import media_cache
+from core.http_session import get_session, TRANSFER_TIMEOUT
+from core.streaming import ResponseStream
+from core.parallel_upload import parallel_upload_file
+from core.progress import ItemProgress
+from core.metrics import metrics
+from core.storage import storage, Reservation, StorageError
+from core.thumbnails import resolve_thumbnail
+from core.mp4 import Mp4Error, MovieInfo, plan_faststart, scan_head
+from core.splitter import plan_split
+from core.dedup import ContentHasher, content_index, fingerprint_file
+from core.downloader import (
+    DownloadJournal, supports_ranges, response_validator, iter_chunks_guarded, download_segmented
+)
 
 log = logging.getLogger(__name__)
 
+# Files above MAX_FILE_SIZE are still downloaded when they can be sent as parts
+MAX_DOWNLOAD_SIZE = MAX_SPLIT_SOURCE_SIZE if SPLIT_LARGE_FILES else MAX_FILE_SIZE
+
+# Stable temp paths (<file_id>.tmp) with a download running in this process
+_active_temps: set[str] = set()
+_temp_ids = itertools.count(1)
+
 class DownloadError(Exception):
     pass
 
@@ -24,9 +50,7 @@ async def get_video_info(url: str, max_retries: int = MAX_RETRIES) -> list[dict]
     """Get video info with retry mechanism and filename fixing"""
     for attempt in range(max_retries):
         try:
-            poop = PoopDownload()
-            poop.execute(url)
-            result = poop.result
+            result = await AsyncPoopDownload.resolve(url)
 
             if result['status'] != 'success' or not result['data']:
                 raise DownloadError("Gagal parsing video dari URL")
@@ -38,9 +62,34 @@ async def get_video_info(url: str, max_retries: int = MAX_RETRIES) -> list[dict]
                 raise DownloadError(f"Gagal mendapatkan info video setelah {max_retries} percobaan: {str(e)}")
             await asyncio.sleep(RETRY_DELAY)
 
-async def download_video_with_retry(url: str, filename: str, max_retries: int = MAX_RETRIES) -> str:
-    """Download video with retry mechanism and better error handling"""
-    filename = sanitize_filename(filename)
+async def iter_video_info(url: str, max_retries: int = MAX_RETRIES):
+    """
+    Yield video info items as the provider resolves them, so the first download can start
+    while the rest of a folder is still being scraped.
+    Retries only while nothing has been yielded yet; raises DownloadError if the URL gives no video.
+    """
+    for attempt in range(max_retries):
+        found = 0
+        try:
+            async for video_info in AsyncPoopDownload.stream(url):
+                found += 1
+                yield video_info
+        except Exception as e:
+            if found:
+                raise
+            log.warning(f"Attempt {attempt + 1}/{max_retries} failed for iter_video_info: {str(e)}")
+        else:
+            if found:
+                return
+            log.warning(f"Attempt {attempt + 1}/{max_retries}: tidak ada video dari {url}")
+
+        if attempt < max_retries - 1:
+            await asyncio.sleep(RETRY_DELAY)
+
+    raise DownloadError(f"Gagal mendapatkan info video setelah {max_retries} percobaan")
+
+def reserve_filepath(filename: str) -> str:
+    """Pick a free path in DOWNLOAD_FOLDER, adding _1, _2, ... when the name is taken"""
     filepath = os.path.join(DOWNLOAD_FOLDER, filename)
     
     counter = 1
@@ -49,107 +98,186 @@ async def download_video_with_retry(url: str, filename: str, max_retries: int =
         name, ext = os.path.splitext(original_filepath)
         filepath = f"{name}_{counter}{ext}"
         counter += 1
+    return filepath
+
+def claim_temp_filepath(filepath: str, file_key: str | None) -> str:
+    """
+    Temp path for a download: <file_key>.tmp, which a restart resumes from its journal, unless another
+    download of the same file id in this process holds it; that one gets a private, non-resumable name.
+    Release it with _active_temps.discard() when the download ends.
+    """
+    if not file_key:
+        return f"{filepath}.tmp"
+    temp_filepath = os.path.join(DOWNLOAD_FOLDER, f"{file_key}.tmp")
+    if temp_filepath in _active_temps:
+        temp_filepath = os.path.join(DOWNLOAD_FOLDER, f"{file_key}~{os.getpid()}-{next(_temp_ids)}.tmp")
+    _active_temps.add(temp_filepath)
+    return temp_filepath
+
+@metrics.timed('download')
+async def download_video_with_retry(url: str, filename: str, max_retries: int = MAX_RETRIES, file_key: str | None = None,
+                                    progress: ItemProgress | None = None, reservation: Reservation | None = None) -> str:
+    """
+    Download video with retry mechanism and better error handling.
+    With file_key (the provider file id) the partial file gets a stable name, so a restarted
+    process resumes it from its journal instead of starting over.
+    Byte counts are reported to progress (a dashboard line) when given, and the storage
+    reservation is corrected to the real Content-Length before anything is written.
+    The content is hashed during the download and recorded under file_key in the content index.
+    """
+    filename = sanitize_filename(filename)
+    filepath = reserve_filepath(filename)
     
+    temp_filepath = claim_temp_filepath(filepath, file_key)
+    try:
+        return await _download_with_retry(url, filepath, temp_filepath, max_retries, file_key, progress, reservation)
+    finally:
+        _active_temps.discard(temp_filepath)
+
+async def _download_with_retry(url: str, filepath: str, temp_filepath: str, max_retries: int, file_key: str | None,
+                               progress: ItemProgress | None, reservation: Reservation | None) -> str:
+    journal = DownloadJournal(temp_filepath)
+
     for attempt in range(max_retries):
-        temp_filepath = f"{filepath}.tmp"
         try:
             log.info(f"Attempt {attempt + 1}/{max_retries} - Downloading {os.path.basename(filepath)}")
+            if attempt:
+                metrics.retries_total.inc(1, 'download')
             
-            timeout = aiohttp.ClientTimeout(total=1800)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        raise DownloadError(f"HTTP {resp.status}: {resp.reason}")
-                    
-                    total_size = int(resp.headers.get('Content-Length', 0))
-                    
-                    if total_size > MAX_FILE_SIZE:
-                        raise DownloadError(f"File terlalu besar ({total_size/1024/1024:.1f}MB). Maksimal {MAX_FILE_SIZE/1024/1024:.0f}MB")
-                    
+            # Shared pool: keep-alive connections from the previous video on this CDN host are reused
+            session = await get_session()
+            async with session.get(url, timeout=TRANSFER_TIMEOUT) as resp:
+                if resp.status != 200:
+                    raise DownloadError(f"HTTP {resp.status}: {resp.reason}")
+                
+                total_size = int(resp.headers.get('Content-Length', 0))
+                
+                if total_size > MAX_DOWNLOAD_SIZE:
+                    raise DownloadError(f"File terlalu besar ({total_size/1024/1024:.1f}MB). Maksimal {MAX_DOWNLOAD_SIZE/1024/1024:.0f}MB")
+                if reservation and total_size:
+                    reservation.resize(total_size)
+                
+                # Ranges let us split the file across connections and resume from the journal
+                ranged = supports_ranges(resp, total_size)
+                validator = response_validator(resp)
+                segments = journal.load(total_size, validator) if ranged else None
+
+                downloaded = sum(segment.pos - segment.start for segment in segments) if segments else 0
+                if downloaded:
+                    log.info(f"Melanjutkan {os.path.basename(filepath)} dari {downloaded/1024/1024:.1f}/{total_size/1024/1024:.1f}MB")
+                else:
                     log.info(f"Downloading {os.path.basename(filepath)} ({total_size/1024/1024:.1f}MB)")
-                    
-                    downloaded = 0
-                    start_time = time.time()
-                    
+                hasher = ContentHasher(temp_filepath)
+
+                def report_progress(chunk_size: int):
+                    # Called per chunk: only counts bytes, the dashboard renders on its own schedule
+                    nonlocal downloaded
+                    downloaded += chunk_size
+                    metrics.bytes_total.inc(chunk_size, 'download')
+                    if progress:
+                        progress.update(downloaded, total_size)
+
+                if not ranged:
                     async with aiofiles.open(temp_filepath, 'wb') as f:
-                        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        async for chunk in iter_chunks_guarded(resp):
                             await f.write(chunk)
-                            downloaded += len(chunk)
-                            
-                            if total_size > 0:
-                                percent = (downloaded / total_size) * 100
-                                elapsed = time.time() - start_time
-                                speed = downloaded / elapsed if elapsed > 0 else 0
-                                done = int(50 * downloaded / total_size)
-                                print(f"\r📥 [{os.path.basename(filepath)[:20]}...]: [{'█' * done}{'.' * (50 - done)}] {percent:.1f}% - {speed/1024:.1f} KB/s", end='')
-            
+                            hasher.update(chunk)
+                            report_progress(len(chunk))
+
+            if ranged:
+                written = await download_segmented(
+                    session, url, temp_filepath, total_size, segments=segments,
+                    on_progress=report_progress, journal=journal, validator=validator, hasher=hasher
+                )
+                # preallocate() already sized the temp file, so only the segments tell what is really on disk
+                if written != total_size:
+                    raise DownloadError(f"Segmen belum lengkap ({written} != {total_size} bytes)")
+        
+            # Never publish a truncated file, whether it was resumed or not
+            actual_size = os.path.getsize(temp_filepath)
+            if total_size > 0 and actual_size != total_size:
+                raise DownloadError(f"Ukuran file tidak cocok ({actual_size} != {total_size} bytes)")
+
+            # Re-check the name: another job may have finished a file with the same name meanwhile
+            filepath = reserve_filepath(os.path.basename(filepath))
             os.rename(temp_filepath, filepath)
-            print()
-            log.info(f"✅ Download berhasil: {filepath} ({downloaded/1024/1024:.1f}MB)")
+            journal.remove()
+            storage.file_added(filepath)
+            if file_key and DEDUP_ENABLED:
+                fingerprint = await asyncio.to_thread(fingerprint_file, filepath)
+                content_index.record(file_key, actual_size, fingerprint=fingerprint, digest=hasher.hexdigest(actual_size))
+            log.info(f"✅ Download berhasil: {filepath} ({actual_size/1024/1024:.1f}MB)")
             return filepath
             
+        except StorageError as e:
+            # Retrying cannot make room; give up before the volume fills halfway through the file
+            if not journal.exists():
+                await cleanup_temp_file(temp_filepath)
+            raise DownloadError(str(e))
         except asyncio.TimeoutError:
             log.warning(f"Timeout saat download attempt {attempt + 1}")
-            await cleanup_temp_file(temp_filepath)
         except aiohttp.ClientError as e:
             log.warning(f"Network error attempt {attempt + 1}: {str(e)}")
-            await cleanup_temp_file(temp_filepath)
         except Exception as e:
             log.warning(f"Download attempt {attempt + 1} failed: {str(e)}")
+
+        # Keep the partial file only when the journal says which bytes can be reused
+        if not journal.exists():
+            await cleanup_temp_file(temp_filepath)
         
         if attempt < max_retries - 1:
             log.info(f"Retrying in {RETRY_DELAY} seconds...")
             await asyncio.sleep(RETRY_DELAY)
     
+    await cleanup_temp_file(temp_filepath)
+    journal.remove()
     raise DownloadError(f"Download gagal setelah {max_retries} percobaan")
 
-async def upload_with_retry(client: TelegramClient, chat_id: int, filepath: str, caption: str, max_retries: int = MAX_RETRIES) -> bool:
-    """Upload file with retry mechanism"""
-    
-    if not os.path.exists(filepath):
-        raise UploadError("File tidak ditemukan untuk upload")
-    
-    file_size = os.path.getsize(filepath)
-    if file_size > MAX_FILE_SIZE:
-        raise UploadError(f"File terlalu besar untuk Telegram ({file_size/1024/1024:.1f}MB > {MAX_FILE_SIZE/1024/1024:.0f}MB)")
-    
+def make_upload_progress_callback(progress: ItemProgress | None, note: str = ''):
+    """Forward upload byte counts to a dashboard line; None when there is nothing to report to"""
+    if progress is None:
+        return None
+    progress.set_stage('upload', note)
+    return progress.update
+
+def video_attributes(info: MovieInfo | None) -> list | None:
+    """Duration and dimensions for send_file; Telegram clients need them to play before the download ends"""
+    if info is None:
+        return None
+    return [types.DocumentAttributeVideo(duration=info.duration, w=info.width, h=info.height, supports_streaming=True)]
+
+async def send_with_retry(client: TelegramClient, chat_id: int, open_source, file_size: int, file_name: str, caption: str,
+                          attributes: list | None = None, max_retries: int = MAX_RETRIES, progress: ItemProgress | None = None,
+                          thumb: asyncio.Task | None = None, note: str = '') -> Message:
+    """Upload one file (open_source() gives a fresh path or reader per attempt) and send it, with retries"""
     for attempt in range(max_retries):
         try:
-            log.info(f"Upload attempt {attempt + 1}/{max_retries} - {os.path.basename(filepath)}")
-            
-            thumb_path = os.path.splitext(filepath)[0] + '.jpg'
-            thumb_exists = os.path.exists(thumb_path)
-            
-            upload_start_time = time.time()
-            last_progress_time = time.time()
-            
-            def progress_callback(current: int, total: int):
-                nonlocal last_progress_time
-                current_time = time.time()
-                
-                if current_time - last_progress_time >= 2 or current == total:
-                    percent = (current / total) * 100
-                    elapsed = current_time - upload_start_time
-                    speed = current / elapsed if elapsed > 0 else 0
-                    print(f"\r📤 Uploading: {percent:.1f}% ({current/1024/1024:.1f}/{total/1024/1024:.1f}MB) - {speed/1024:.1f} KB/s", end='')
-                    last_progress_time = current_time
+            log.info(f"Upload attempt {attempt + 1}/{max_retries} - {file_name}")
+            if attempt:
+                metrics.retries_total.inc(1, 'upload')
             
-            await client.send_file(
+            # Parts go out over several senders; send_file then only attaches the uploaded handle
+            input_file = await parallel_upload_file(
+                client, open_source(), file_size, file_name,
+                progress_callback=make_upload_progress_callback(progress, note)
+            )
+
+            message = await client.send_file(
                 chat_id,
-                filepath,
+                input_file,
                 caption=caption,
-                thumb=thumb_path if thumb_exists else None,
-                supports_streaming=True,
-                progress_callback=progress_callback,
-                part_size_kb=512
+                thumb=await resolve_thumbnail(thumb),
+                attributes=attributes,
+                supports_streaming=True
             )
             
-            print()
-            log.info(f"✅ Upload berhasil: {os.path.basename(filepath)}")
-            return True
+            metrics.bytes_total.inc(file_size, 'upload')
+            log.info(f"✅ Upload berhasil: {file_name}")
+            return message
             
         except FloodWaitError as e:
             log.warning(f"FloodWait: need to wait {e.seconds} seconds")
+            metrics.flood_wait_seconds.inc(e.seconds + 1, 'upload')
             await asyncio.sleep(e.seconds + 1)
         except FilePartMissingError:
             log.warning(f"FilePartMissing on attempt {attempt + 1}, retrying...")
@@ -160,4 +288,159 @@ async def upload_with_retry(client: TelegramClient, chat_id: int, filepath: str,
             log.info(f"Retrying upload in {RETRY_DELAY} seconds...")
             await asyncio.sleep(RETRY_DELAY)
     
-    raise UploadError(f"Upload gagal setelah {max_retries} percobaan")
\ No newline at end of file
+    raise UploadError(f"Upload gagal setelah {max_retries} percobaan")
+
+@metrics.timed('upload')
+async def upload_with_retry(client: TelegramClient, chat_id: int, filepath: str, caption: str, max_retries: int = MAX_RETRIES,
+                            progress: ItemProgress | None = None, thumb: asyncio.Task | None = None) -> Message:
+    """
+    Upload file with retry mechanism, returns the sent message so its media can be reused.
+    thumb is the thumbnail prefetch task; it is only awaited once the parts are uploaded.
+    MP4 files with moov at the end are uploaded with moov moved to the front (read from the
+    original file in a different order, no second copy on disk).
+    """
+    
+    if not os.path.exists(filepath):
+        raise UploadError("File tidak ditemukan untuk upload")
+    
+    layout = await asyncio.to_thread(plan_faststart, filepath) if MP4_FASTSTART else None
+    if layout and layout.remuxed:
+        log.info(f"Faststart {os.path.basename(filepath)}: moov dipindah ke depan")
+    file_size = layout.size if layout else os.path.getsize(filepath)
+    if file_size > MAX_FILE_SIZE:
+        raise UploadError(f"File terlalu besar untuk Telegram ({file_size/1024/1024:.1f}MB > {MAX_FILE_SIZE/1024/1024:.0f}MB)")
+    
+    return await send_with_retry(
+        client, chat_id, lambda: layout.open() if layout else filepath, file_size, os.path.basename(filepath), caption,
+        attributes=video_attributes(layout.info if layout else None), max_retries=max_retries, progress=progress, thumb=thumb
+    )
+
+@metrics.timed('upload')
+async def upload_split_with_retry(client: TelegramClient, chat_id: int, filepath: str, make_caption, max_retries: int = MAX_RETRIES,
+                                  progress: ItemProgress | None = None, thumb: asyncio.Task | None = None) -> list[Message]:
+    """
+    Upload a file larger than MAX_FILE_SIZE as a numbered series of parts of at most SPLIT_PART_SIZE.
+    MP4s are cut at keyframes so every part plays on its own, anything else is cut by bytes.
+    Parts are read from the downloaded file one after another; none is written to disk.
+    make_caption(number, count, size) gives the caption of each part.
+    """
+    if not os.path.exists(filepath):
+        raise UploadError("File tidak ditemukan untuk upload")
+
+    plan = await asyncio.to_thread(plan_split, filepath, SPLIT_PART_SIZE)
+    log.info(f"{os.path.basename(filepath)} dikirim dalam {plan.count} bagian (potong per {plan.mode})")
+
+    messages = []
+    for index in range(plan.count):
+        try:
+            part = await asyncio.to_thread(plan.part, index)
+        except Mp4Error as e:
+            raise UploadError(f"Bagian {index + 1}/{plan.count} gagal disiapkan: {str(e)}")
+        number = index + 1
+        messages.append(await send_with_retry(
+            client, chat_id, part.layout.open, part.layout.size, part.name, make_caption(number, plan.count, part.layout.size),
+            attributes=video_attributes(part.layout.info), max_retries=max_retries, progress=progress, thumb=thumb,
+            note=f"bagian {number}/{plan.count}"
+        ))
+    return messages
+
+async def peek_mp4_head(stream: ResponseStream, total_size: int) -> tuple[str, MovieInfo | None]:
+    """Look at the start of the stream, growing the peek while moov is in front but not complete yet"""
+    peek_size = MP4_HEAD_PEEK
+    while True:
+        state, info = scan_head(await stream.peek(peek_size))
+        if state != 'need_more' or peek_size >= min(total_size, MP4_MAX_MOOV_SIZE + MP4_HEAD_PEEK):
+            return state, info
+        peek_size *= 2
+
+@metrics.timed('stream')
+async def stream_upload_video(client: TelegramClient, chat_id: int, url: str, filename: str, make_caption,
+                              progress: ItemProgress | None = None, thumb: asyncio.Task | None = None,
+                              file_key: str | None = None) -> Message | None:
+    """
+    Pipe the CDN response straight into the Telegram upload without touching disk.
+    The content digest is recorded under file_key in the content index, as for disk downloads.
+    Returns None when the size is unknown, the transfer fails or the MP4 has its moov at the end
+    (only the disk path can move it), so the caller can fall back to the disk path.
+    """
+    filename = sanitize_filename(filename)
+    try:
+        session = await get_session()
+        timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)
+        async with session.get(url, timeout=timeout) as resp:
+            total_size = int(resp.headers.get('Content-Length', 0))
+            # Telethon needs the exact size up front to plan the parts
+            if resp.status != 200 or total_size <= 0 or total_size > MAX_FILE_SIZE:
+                log.info(f"Streaming dilewati untuk {filename} (HTTP {resp.status}, {total_size} bytes), pakai disk")
+                return None
+
+            log.info(f"Streaming {filename} ({total_size/1024/1024:.1f}MB) langsung ke Telegram")
+            part_size = UPLOAD_PART_SIZE_KB * 1024
+            hasher = ContentHasher()
+            async with ResponseStream(resp, filename, total_size, part_size, STREAM_BUFFER_PARTS, hasher=hasher) as stream:
+                info = None
+                if MP4_FASTSTART:
+                    state, info = await peek_mp4_head(stream, total_size)
+                    if state == 'moov_at_end':
+                        log.info(f"{filename}: moov di akhir file, pakai disk untuk faststart")
+                        return None
+                input_file = await parallel_upload_file(
+                    client, stream, total_size, filename,
+                    progress_callback=make_upload_progress_callback(progress)
+                )
+
+            message = await client.send_file(
+                chat_id,
+                input_file,
+                caption=make_caption(total_size),
+                thumb=await resolve_thumbnail(thumb),
+                attributes=video_attributes(info),
+                supports_streaming=True
+            )
+
+        metrics.bytes_total.inc(total_size, 'download')
+        metrics.bytes_total.inc(total_size, 'upload')
+        if file_key and DEDUP_ENABLED:
+            content_index.record(file_key, total_size, digest=hasher.hexdigest(total_size))
+        log.info(f"✅ Streaming upload berhasil: {filename}")
+        return message
+
+    except FloodWaitError as e:
+        log.warning(f"FloodWait: need to wait {e.seconds} seconds")
+        metrics.flood_wait_seconds.inc(e.seconds + 1, 'stream')
+        await asyncio.sleep(e.seconds + 1)
+    except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+        log.warning(f"Network error saat streaming {filename}: {str(e)}")
+    except Exception as e:
+        log.warning(f"Streaming upload {filename} gagal: {str(e)}")
+    return None
+
+async def send_cached_media(client: TelegramClient, chat_id: int, file_id: str, cached: dict, caption: str) -> Message | None:
+    """
+    Re-send a previously uploaded document (a media_cache entry, possibly of another file id),
+    returns None when the reference is no longer usable
+    """
+    # One retry after a FloodWait: waiting is still far cheaper than downloading and uploading again
+    for attempt in range(2):
+        try:
+            message = await client.send_file(chat_id, cached['media'], caption=caption, supports_streaming=True)
+            break
+        except FloodWaitError as e:
+            log.warning(f"FloodWait: need to wait {e.seconds} seconds")
+            metrics.flood_wait_seconds.inc(e.seconds + 1, 'cached_media')
+            await asyncio.sleep(e.seconds + 1)
+        except (FileReferenceExpiredError, MediaEmptyError) as e:
+            # The entry may belong to another file id with the same content (content index match)
+            log.warning(f"Media cache untuk {cached['file_id']} tidak valid lagi: {str(e)}")
+            media_cache.forget(cached['file_id'])
+            return None
+        except Exception as e:
+            log.warning(f"Kirim ulang media cache untuk {file_id} gagal: {str(e)}")
+            return None
+    else:
+        return None
+
+    # Telegram may hand back a fresher file_reference on every send
+    media_cache.put(file_id, message, cached['title'], cached['file_size'])
+    log.info(f"♻️ Media cache dipakai untuk {file_id}")
+    return message
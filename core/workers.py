@@ -0,0 +1,335 @@
+import os
+import time
+import zlib
+import queue
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing
+from urllib.parse import urlsplit
+
+from bot.config import WORKER_PROGRESS_INTERVAL, WORKER_RESTART_DELAY, WORKER_CHECK_INTERVAL, MAX_RETRIES, LOGGING_LEVEL, LOGGING_FORMAT
+from core.uploader import iter_video_info, download_video_with_retry, DownloadError
+from core.http_session import close_session
+from core.progress import ItemProgress
+from core.storage import storage, Reservation, StorageError
+from core.metrics import metrics
+from utils.helpers import sanitize_filename
+
+log = logging.getLogger(__name__)
+
+class _RemoteProgress:
+    """ItemProgress stand-in inside a worker: byte counts go back to the coordinator, throttled"""
+
+    def __init__(self, send, task_id: int):
+        self._send = send
+        self._task_id = task_id
+        self._last = 0.0
+
+    def update(self, done: int, total: int):
+        now = time.monotonic()
+        if now - self._last >= WORKER_PROGRESS_INTERVAL or (total and done >= total):
+            self._last = now
+            self._send(self._task_id, 'progress', (done, total))
+
+class _RemoteReservation:
+    """Reservation stand-in inside a worker: the coordinator owns the storage totals and applies the resize"""
+
+    def __init__(self, send, task_id: int):
+        self._send = send
+        self._task_id = task_id
+
+    def resize(self, size: int):
+        self._send(self._task_id, 'size', size)
+
+def _next_request(requests: multiprocessing.Queue):
+    """Blocking read of the next request; None (stop) once the coordinator process is gone"""
+    while True:
+        try:
+            return requests.get(timeout=1)
+        except queue.Empty:
+            if not multiprocessing.parent_process().is_alive():
+                return None
+
+async def _serve(requests: multiprocessing.Queue, events: multiprocessing.Queue):
+    """Worker event loop: run resolve/download requests until the coordinator sends None"""
+    loop = asyncio.get_running_loop()
+    tasks: dict[int, asyncio.Task] = {}
+    credits: dict[int, asyncio.Semaphore] = {}
+    forwarded_coalesced = 0.0
+
+    def send(task_id: int, kind: str, payload=None):
+        # Scrape coalescing happens in here; the coordinator's /metrics and status only see it forwarded
+        nonlocal forwarded_coalesced
+        coalesced = metrics.coalesced_total.get('scrape')
+        if coalesced != forwarded_coalesced:
+            events.put((0, 'coalesced', coalesced - forwarded_coalesced))
+            forwarded_coalesced = coalesced
+        events.put((task_id, kind, payload))
+
+    async def resolve(task_id: int, url: str):
+        # Only resolve an item once the coordinator asks for it, so video_url tokens stay fresh
+        video_infos = iter_video_info(url)
+        try:
+            while True:
+                await credits[task_id].acquire()
+                try:
+                    video_info = await anext(video_infos)
+                except StopAsyncIteration:
+                    send(task_id, 'end')
+                    return
+                send(task_id, 'item', video_info)
+        finally:
+            await video_infos.aclose()
+
+    async def download(task_id: int, url: str, filename: str, max_retries: int, file_key: str | None):
+        filepath = await download_video_with_retry(
+            url, filename, max_retries, file_key=file_key,
+            progress=_RemoteProgress(send, task_id), reservation=_RemoteReservation(send, task_id)
+        )
+        send(task_id, 'end', filepath)
+
+    async def run(task_id: int, kind: str, args: tuple):
+        try:
+            await (resolve(task_id, *args) if kind == 'resolve' else download(task_id, *args))
+        except asyncio.CancelledError:
+            pass  # Dibatalkan oleh coordinator, tidak ada yang menunggu hasilnya
+        except Exception as e:
+            send(task_id, 'error', str(e))
+        finally:
+            tasks.pop(task_id, None)
+            credits.pop(task_id, None)
+
+    while True:
+        request = await loop.run_in_executor(None, _next_request, requests)
+        if request is None:
+            break
+        kind, task_id, args = request
+        if kind == 'next':
+            if task_id in credits:
+                credits[task_id].release()
+        elif kind == 'cancel':
+            if task_id in tasks:
+                tasks[task_id].cancel()
+        else:
+            credits[task_id] = asyncio.Semaphore(0)
+            tasks[task_id] = asyncio.create_task(run(task_id, kind, args))
+
+    for task in list(tasks.values()):
+        task.cancel()
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    await close_session()
+
+def _worker_main(index: int, requests: multiprocessing.Queue, events: multiprocessing.Queue, initializer, initargs: tuple):
+    """Entry point of a worker process (spawned, so it starts from a clean interpreter)"""
+    logging.basicConfig(level=LOGGING_LEVEL, format=f'[worker {index}] {LOGGING_FORMAT}')
+    if initializer:
+        initializer(*initargs)
+    try:
+        asyncio.run(_serve(requests, events))
+    except KeyboardInterrupt:
+        pass
+
+class _Task:
+    def __init__(self, worker: int):
+        self.worker = worker
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.ended = False
+
+class WorkerPool:
+    """
+    Runs scraping and downloads in separate processes so parsing, hashing and socket work use
+    more than one core. The coordinator (the process with the Telegram client) keeps the chat UI,
+    scheduler, storage totals and uploads; iter_video_info() and download() mirror the functions
+    of core.uploader and forward their results and progress over multiprocessing queues.
+    Resolve requests are routed by URL path so concurrent requests for the same file or folder
+    meet in one worker's scrape flights; downloads go to the worker with the fewest tasks in
+    flight. A worker that dies fails its tasks (the callers' retry/fallback paths take over)
+    and is started again.
+    """
+
+    def __init__(self):
+        self.processes: list[multiprocessing.Process] = []
+        self._requests: list[multiprocessing.Queue] = []
+        self._load: list[int] = []
+        self._events: multiprocessing.Queue | None = None
+        self._tasks: dict[int, _Task] = {}
+        self._ids = itertools.count(1)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reader: threading.Thread | None = None
+        self._monitor: asyncio.Task | None = None
+        self._stopping = False
+        self._context = multiprocessing.get_context('spawn')
+        self._initializer = None
+        self._initargs: tuple = ()
+        self._spawned_at: list[float] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self.processes)
+
+    def start(self, count: int, loop: asyncio.AbstractEventLoop | None = None, initializer=None, initargs: tuple = ()):
+        """
+        Spawn count workers; events are delivered on loop (the running loop by default).
+        initializer(*initargs) runs first in every worker, e.g. to apply the same settings as the coordinator.
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        self._initializer, self._initargs = initializer, initargs
+        self._stopping = False
+        self._events = self._context.Queue()
+        for index in range(count):
+            self._requests.append(self._context.Queue())
+            self._load.append(0)
+            self._spawned_at.append(0.0)
+            self.processes.append(self._spawn(index))
+        self._reader = threading.Thread(target=self._read_events, name='worker-events', daemon=True)
+        self._reader.start()
+        self._monitor = self._loop.create_task(self._watch_workers())
+        log.info(f"⚙️ {count} proses worker berjalan")
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        process = self._context.Process(
+            target=_worker_main, name=f'worker-{index}', daemon=True,
+            args=(index, self._requests[index], self._events, self._initializer, self._initargs)
+        )
+        process.start()
+        self._spawned_at[index] = time.monotonic()
+        return process
+
+    def stop(self, timeout: float = 10):
+        """Ask every worker to finish (in-flight tasks are cancelled) and wait for them to exit"""
+        self._stopping = True
+        if self._monitor:
+            self._loop.call_soon_threadsafe(self._monitor.cancel)
+        for requests in self._requests:
+            requests.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._reader:
+            self._reader.join(timeout)
+        self.processes, self._requests, self._load, self._spawned_at = [], [], [], []
+        self._tasks.clear()
+
+    def _read_events(self):
+        """Reader thread: hand worker events to the event loop"""
+        while not self._stopping:
+            try:
+                event = self._events.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: tuple):
+        task_id, kind, payload = event
+        if kind == 'coalesced':
+            metrics.coalesced_total.inc(payload, 'scrape')
+            return
+        task = self._tasks.get(task_id)
+        if task:
+            task.events.put_nowait((kind, payload))
+
+    async def _watch_workers(self):
+        """Liveness check on its own timer, so progress from busy workers cannot hide a dead one"""
+        while not self._stopping:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            self._check_workers()
+
+    def _check_workers(self):
+        if self._stopping:
+            return
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            for task in self._tasks.values():
+                if task.worker == index and not task.ended:
+                    task.ended = True
+                    task.events.put_nowait(('error', f"worker {index} berhenti"))
+            # A worker that keeps crashing is started again at most every WORKER_RESTART_DELAY
+            if time.monotonic() - self._spawned_at[index] < WORKER_RESTART_DELAY:
+                continue
+            log.error(f"Worker {index} berhenti (exit code {process.exitcode}), dijalankan ulang")
+            # Requests still queued for the dead worker belong to tasks that were just failed
+            self._requests[index] = self._context.Queue()
+            self._load[index] = 0
+            self.processes[index] = self._spawn(index)
+
+    def _submit(self, kind: str, args: tuple, route_key: str | None = None) -> tuple[int, _Task]:
+        """Queue a request on the worker route_key maps to (when alive), else on the least-loaded one"""
+        alive = [index for index, process in enumerate(self.processes) if process.is_alive()]
+        if not alive:
+            raise DownloadError("Tidak ada worker yang berjalan")
+        index = zlib.crc32(route_key.encode()) % len(self.processes) if route_key is not None else None
+        if index not in alive:
+            index = min(alive, key=lambda i: self._load[i])
+        task_id = next(self._ids)
+        task = self._tasks[task_id] = _Task(index)
+        self._load[index] += 1
+        self._requests[index].put((kind, task_id, args))
+        return task_id, task
+
+    def _finish(self, task_id: int):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        if not task.ended:
+            self._requests[task.worker].put(('cancel', task_id, None))
+        self._load[task.worker] = max(0, self._load[task.worker] - 1)
+
+    async def iter_video_info(self, url: str):
+        """Like core.uploader.iter_video_info, resolved in a worker"""
+        # Same file/folder path (on any mirror host) -> same worker, whose scrape flights coalesce it
+        task_id, task = self._submit('resolve', (url,), route_key=urlsplit(url).path.rstrip('/'))
+        try:
+            while True:
+                self._requests[task.worker].put(('next', task_id, None))
+                kind, payload = await task.events.get()
+                if kind == 'item':
+                    yield payload
+                    continue
+                task.ended = True
+                if kind == 'end':
+                    return
+                raise DownloadError(payload)
+        finally:
+            self._finish(task_id)
+
+    @metrics.timed('download')
+    async def download(self, url: str, filename: str, max_retries: int = MAX_RETRIES, file_key: str | None = None,
+                       progress: ItemProgress | None = None, reservation: Reservation | None = None) -> str:
+        """Like core.uploader.download_video_with_retry, downloaded by a worker into the shared DOWNLOAD_FOLDER"""
+        if reservation:
+            # The worker renames the file into place before 'end' gets here; keep sweeps off it meanwhile
+            reservation.target = os.path.join(storage.folder, sanitize_filename(filename))
+        task_id, task = self._submit('download', (url, filename, max_retries, file_key))
+        downloaded = 0
+        try:
+            while True:
+                kind, payload = await task.events.get()
+                if kind == 'progress':
+                    done, total = payload
+                    metrics.bytes_total.inc(max(0, done - downloaded), 'download')
+                    downloaded = done
+                    if progress:
+                        progress.update(done, total)
+                elif kind == 'size':
+                    if reservation:
+                        reservation.resize(payload)
+                elif kind == 'end':
+                    task.ended = True
+                    storage.file_added(payload)
+                    return payload
+                else:
+                    task.ended = True
+                    raise DownloadError(payload)
+        except StorageError as e:
+            raise DownloadError(str(e))
+        finally:
+            self._finish(task_id)
+
+# Shared instance for the whole process
+worker_pool = WorkerPool()
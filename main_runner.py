@@ -1,11 +1,20 @@
 import os
 import sys
+import argparse
 
 # Add project root to sys.path to allow absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '')))
 
+from bot.config import WORKER_PROCESSES
 from bot.main import initialize_bot, run_bot
 
 if __name__ == '__main__':
-    bot_client = initialize_bot()
-    run_bot(bot_client)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Enhanced Video Bot")
+    parser.add_argument(
+        '--workers', type=int, default=WORKER_PROCESSES,
+        help="proses worker untuk scraping & unduhan, 0 = satu proses (default: WORKER_PROCESSES)"
+    )
+    args = parser.parse_args()
+
+    bot_client = initialize_bot(workers=args.workers)
+    run_bot(bot_client)